@@ -7,6 +7,9 @@ from tornado.escape import json_decode, json_encode
 from kairon.shared.tornado.handlers.base import BaseHandler
 from rasa_sdk.executor import CollectingDispatcher, ActionExecutor
 from .processor import ActionProcessor
+from ...shared.actions.cache import ActionConfigCache
+from ...shared.actions.log_writer import ActionLogWriter
+from ...shared.actions.resilience import CircuitBreaker, HttpResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -54,3 +57,15 @@ class ActionHandler(BaseHandler, ABC):
             body = {"error": e.message, "action_name": e.action_name}
             self.set_status(400)
             self.write(json_encode(body))
+
+
+class MetricsHandler(BaseHandler, ABC):
+
+    async def get(self):
+        response = {
+            "circuit_breakers": CircuitBreaker.all_stats(),
+            "response_cache": HttpResponseCache.stats(),
+            "config_cache": ActionConfigCache.stats(),
+            "logs": ActionLogWriter.stats()
+        }
+        self.write(json_encode({"data": response, "success": True, "error_code": 0, "message": None}))
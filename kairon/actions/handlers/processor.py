@@ -1,3 +1,5 @@
+import asyncio
+from functools import partial
 from typing import Dict, Text, List, Any
 
 from mongoengine import DoesNotExist
@@ -6,9 +8,12 @@ from rasa_sdk.events import SlotSet
 from rasa_sdk.forms import REQUESTED_SLOT
 from rasa_sdk.interfaces import Tracker
 
-from ...shared.actions.models import KAIRON_ACTION_RESPONSE_SLOT, ActionType
+from ...shared.actions.models import KAIRON_ACTION_RESPONSE_SLOT, ActionType, MAIN_HTTP_REQUEST
 from ...shared.actions.data_objects import ActionServerLogs
-from ...shared.actions.exception import ActionFailure
+from ...shared.actions.email_outbox import EmailOutbox
+from ...shared.actions.exception import ActionFailure, ActionHttpFailure
+from ...shared.actions.log_writer import ActionLogWriter
+from ...shared.actions.resilience import CircuitBreaker, HttpResponseCache
 from ...shared.actions.utils import ActionUtility, ExpressionEvaluator
 from loguru import logger
 
@@ -54,7 +59,7 @@ class ActionProcessor:
             return [SlotSet(slot, value) for slot, value in slots.items()]
         except Exception as e:
             logger.exception(e)
-            ActionServerLogs(
+            ActionLogWriter.write(ActionServerLogs(
                 type=action_type,
                 intent=tracker.get_intent_of_latest_message(),
                 action=action,
@@ -62,7 +67,7 @@ class ActionProcessor:
                 exception=str(e),
                 bot=tracker.get_slot("bot"),
                 status="FAILURE"
-            ).save()
+            ))
 
     @staticmethod
     async def __process_http_action(tracker: Tracker, http_action_config: dict):
@@ -75,19 +80,41 @@ class ActionProcessor:
         request_method = None
         headers = None
         try:
-            headers = ActionUtility.prepare_request(tracker, http_action_config.get('headers'))
-            request_body = ActionUtility.prepare_request(tracker, http_action_config['params_list'])
+            bot = tracker.get_slot("bot")
+            chat_log = {}
+            headers, http_url, request_method, request_body = ActionProcessor.__prepare_http_request(
+                tracker, http_action_config, chat_log
+            )
             logger.info("request_body: " + str(request_body))
-            request_method = http_action_config['request_method']
-            http_url = ActionUtility.prepare_url(request_method=request_method,
-                                                 http_url=http_action_config['http_url'],
-                                                 request_body=request_body)
-            http_response = ActionUtility.execute_http_request(headers=headers,
-                                                               http_url=http_url,
-                                                               request_method=request_method,
-                                                               request_body=request_body)
+            sub_requests = http_action_config.get('requests')
+            if sub_requests:
+                names = [MAIN_HTTP_REQUEST]
+                calls = [ActionProcessor.__execute_http_request(bot, http_action_config['action_name'],
+                                                                http_action_config.get('cache_ttl'), headers,
+                                                                http_url, request_method, request_body)]
+                for sub_request in sub_requests:
+                    sub_headers, sub_url, sub_method, sub_body = ActionProcessor.__prepare_http_request(
+                        tracker, sub_request, chat_log
+                    )
+                    names.append(sub_request['name'])
+                    calls.append(ActionProcessor.__execute_http_request(
+                        bot, f"{http_action_config['action_name']}.{sub_request['name']}",
+                        http_action_config.get('cache_ttl'), sub_headers, sub_url, sub_method, sub_body
+                    ))
+                responses = await asyncio.gather(*calls, return_exceptions=True)
+                for response in responses:
+                    if isinstance(response, Exception):
+                        raise response
+                http_response = dict(zip(names, responses))
+            else:
+                http_response = await ActionProcessor.__execute_http_request(bot, http_action_config['action_name'],
+                                                                             http_action_config.get('cache_ttl'),
+                                                                             headers, http_url, request_method,
+                                                                             request_body)
             logger.info("http response: " + str(http_response))
-            bot_response = ActionUtility.prepare_response(http_action_config['response'], http_response)
+            render_response = http_action_config.get('response_renderer') or \
+                ActionUtility.compile_response_template(http_action_config['response'])
+            bot_response = render_response(http_response)
             logger.info("response: " + str(bot_response))
         except ActionFailure as e:
             exception = str(e)
@@ -100,7 +127,7 @@ class ActionProcessor:
             status = "FAILURE"
             bot_response = "I have failed to process your request"
         finally:
-            ActionServerLogs(
+            ActionLogWriter.write(ActionServerLogs(
                 type=ActionType.http_action.value,
                 intent=tracker.get_intent_of_latest_message(),
                 action=http_action_config['action_name'],
@@ -113,9 +140,51 @@ class ActionProcessor:
                 exception=exception,
                 bot=tracker.get_slot("bot"),
                 status=status
-            ).save()
+            ))
         return {KAIRON_ACTION_RESPONSE_SLOT: bot_response}
 
+    @staticmethod
+    def __prepare_http_request(tracker: Tracker, request_config: dict, chat_log: dict):
+        headers = ActionUtility.prepare_request(tracker, request_config.get('headers'), chat_log)
+        request_body = ActionUtility.prepare_request(tracker, request_config.get('params_list'), chat_log)
+        request_method = request_config['request_method']
+        http_url = ActionUtility.prepare_url(request_method=request_method,
+                                             http_url=request_config['http_url'],
+                                             request_body=request_body)
+        return headers, http_url, request_method, request_body
+
+    @staticmethod
+    async def __execute_http_request(bot: Text, action_name: Text, cache_ttl: int, headers: dict, http_url: Text,
+                                     request_method: Text, request_body: dict):
+        use_cache = request_method.lower() == "get" and cache_ttl
+        if use_cache:
+            http_response = HttpResponseCache.get(bot, action_name, http_url, headers)
+            if http_response is not None:
+                logger.debug("http response served from cache")
+                return http_response
+
+        breaker = CircuitBreaker.get_instance(bot, action_name)
+        if breaker and not breaker.allow_request():
+            raise ActionFailure(f"Circuit breaker is open for action: {action_name}")
+        try:
+            http_response = await ActionUtility.execute_http_request_async(headers=dict(headers or {}),
+                                                                           http_url=http_url,
+                                                                           request_method=request_method,
+                                                                           request_body=request_body)
+        except ActionHttpFailure:
+            if breaker:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if breaker:
+                breaker.release()
+            raise
+        if breaker:
+            breaker.record_success()
+        if use_cache:
+            HttpResponseCache.set(bot, action_name, http_url, headers, http_response, cache_ttl)
+        return http_response
+
     @staticmethod
     async def __process_slot_set_action(tracker: Tracker, action_config: dict):
         message = []
@@ -128,7 +197,7 @@ class ActionProcessor:
             message.append(f"Resetting slot '{action_config['slot']}' value to None.")
             value = None
 
-        ActionServerLogs(
+        ActionLogWriter.write(ActionServerLogs(
             type=ActionType.slot_set_action.value,
             intent=tracker.get_intent_of_latest_message(),
             action=action_config['name'],
@@ -137,7 +206,7 @@ class ActionProcessor:
             messages=message,
             bot=tracker.get_slot("bot"),
             status=status
-        ).save()
+        ))
         return {action_config['slot']: value}
 
     @staticmethod
@@ -149,7 +218,9 @@ class ActionProcessor:
         if ActionUtility.is_empty(slot):
             return {}
         try:
-            validation = form_validations.get(slot=slot)
+            validation = next((validation for validation in form_validations if validation.slot == slot), None)
+            if not validation:
+                raise DoesNotExist(f'No validation found for slot: {slot}')
             slot_type = ActionUtility.get_slot_type(validation.bot, slot)
             msg.append(f'slot_type: {slot_type}')
             semantic = validation.validation_semantic
@@ -158,8 +229,8 @@ class ActionProcessor:
             utter_msg_on_invalid = validation.invalid_response
             msg.append(f'utter_msg_on_valid: {utter_msg_on_valid}')
             msg.append(f'utter_msg_on_valid: {utter_msg_on_invalid}')
-            expr_as_str, is_valid = ExpressionEvaluator.is_valid_slot_value(slot_type, slot_value, semantic)
-            msg.append(f'Expression: {expr_as_str}')
+            is_valid, expr_as_str = ExpressionEvaluator.get_slot_validation(validation, slot_type)(slot_value)
+            msg.append(f'Expression: {expr_as_str()}')
             msg.append(f'is_valid: {is_valid}')
 
             if is_valid:
@@ -176,7 +247,7 @@ class ActionProcessor:
             msg.append(f'Skipping validation as no validation config found for slot: {slot}')
             logger.debug(e)
         finally:
-            ActionServerLogs(
+            ActionLogWriter.write(ActionServerLogs(
                 type=ActionType.form_validation_action.value,
                 intent=tracker.get_intent_of_latest_message(),
                 action=tracker.latest_action_name,
@@ -184,7 +255,7 @@ class ActionProcessor:
                 bot=tracker.get_slot("bot"),
                 messages=msg,
                 status=status
-            ).save()
+            ))
 
         return {slot: slot_value}
 
@@ -196,16 +267,21 @@ class ActionProcessor:
         to_email = action_config['to_email']
         try:
             body = ActionUtility.prepare_email_body(tracker.events)
-            await Utility.trigger_email(email=to_email,
-                                        subject=f"{tracker.sender_id} {action_config['subject']}",
-                                        body=f"{body}",
-                                        smtp_url=action_config['smtp_url'],
-                                        smtp_port=action_config['smtp_port'],
-                                        sender_email=action_config['from_email'],
-                                        smtp_password=action_config['smtp_password'],
-                                        smtp_userid=action_config.get("smtp_userid"),
-                                        tls=action_config['tls'],
-                                        )
+            subject = f"{tracker.sender_id} {action_config['subject']}"
+            if EmailOutbox.is_enabled():
+                EmailOutbox.enqueue(bot=tracker.get_slot("bot"), action_name=action_config['action_name'],
+                                    sender=tracker.sender_id, to_email=to_email, subject=subject, body=f"{body}")
+            else:
+                await Utility.trigger_email(email=to_email,
+                                            subject=subject,
+                                            body=f"{body}",
+                                            smtp_url=action_config['smtp_url'],
+                                            smtp_port=action_config['smtp_port'],
+                                            sender_email=action_config['from_email'],
+                                            smtp_password=action_config['smtp_password'],
+                                            smtp_userid=action_config.get("smtp_userid"),
+                                            tls=action_config['tls'],
+                                            )
 
         except Exception as e:
             logger.exception(e)
@@ -214,7 +290,7 @@ class ActionProcessor:
             bot_response = "I have failed to process your request"
             status = "FAILURE"
         finally:
-            ActionServerLogs(
+            ActionLogWriter.write(ActionServerLogs(
                 type=ActionType.email_action.value,
                 intent=tracker.get_intent_of_latest_message(),
                 action=tracker.latest_action_name,
@@ -222,7 +298,7 @@ class ActionProcessor:
                 bot=tracker.get_slot("bot"),
                 exception=exception,
                 status=status
-            ).save()
+            ))
         dispatcher.utter_message(bot_response)
         return {KAIRON_ACTION_RESPONSE_SLOT: bot_response}
 
@@ -234,10 +310,11 @@ class ActionProcessor:
         bot_response = action_config.get("failure_response")
         try:
             if not ActionUtility.is_empty(latest_msg):
-                results = ActionUtility.perform_google_search(
+                results = await asyncio.get_event_loop().run_in_executor(None, partial(
+                    ActionUtility.perform_google_search,
                     action_config['api_key'], action_config['search_engine_id'], latest_msg,
                     num=action_config.get("num_results")
-                )
+                ))
                 if results:
                     bot_response = ActionUtility.format_search_result(results)
         except Exception as e:
@@ -245,7 +322,7 @@ class ActionProcessor:
             exception = str(e)
             status = "FAILURE"
         finally:
-            ActionServerLogs(
+            ActionLogWriter.write(ActionServerLogs(
                 type=ActionType.google_search_action.value,
                 intent=tracker.get_intent_of_latest_message(),
                 action=tracker.latest_action_name,
@@ -254,6 +331,6 @@ class ActionProcessor:
                 bot=tracker.get_slot("bot"),
                 exception=exception,
                 status=status
-            ).save()
+            ))
         dispatcher.utter_message(bot_response)
         return {KAIRON_ACTION_RESPONSE_SLOT: bot_response}
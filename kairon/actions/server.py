@@ -1,9 +1,14 @@
+import signal
+
 from tornado.ioloop import IOLoop
 from tornado.web import Application
 from tornado.httpserver import HTTPServer
 from tornado.options import parse_command_line
 from kairon.shared.tornado.handlers.index import IndexHandler
-from .handlers.action import ActionHandler
+from .handlers.action import ActionHandler, MetricsHandler
+from ..shared.actions.email_outbox import EmailOutbox
+from ..shared.actions.log_writer import ActionLogWriter
+from ..shared.actions.utils import ActionUtility
 from ..shared.utils import Utility
 from loguru import logger
 from mongoengine import connect
@@ -15,6 +20,7 @@ def make_app():
     return Application([
         (r"/", IndexHandler),
         (r"/webhook", ActionHandler),
+        (r"/metrics", MetricsHandler),
     ], compress_response=True, debug=False)
 
 
@@ -26,5 +32,12 @@ if __name__ == "__main__":
     server = HTTPServer(app)
     server.bind(5055)
     server.start(num_processes=int(getenv("WEB_CONCURRENCY", "1")))
+    signal.signal(signal.SIGTERM, lambda *args: IOLoop.current().add_callback_from_signal(IOLoop.current().stop))
+    if EmailOutbox.is_enabled():
+        EmailOutbox.start()
+    logger.info("Server Started")
     IOLoop.current().start()
-    logger.info("Server Started")
\ No newline at end of file
+    IOLoop.current().run_sync(ActionUtility.close_http_session)
+    EmailOutbox.stop()
+    ActionLogWriter.stop()
+    logger.info("Server Stopped")
\ No newline at end of file
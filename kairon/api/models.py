@@ -1,7 +1,8 @@
 from typing import List, Any, Dict
 import validators
 from kairon.shared.data.constant import EVENT_STATUS, SLOT_MAPPING_TYPE, SLOT_TYPE, ACCESS_ROLES, ACTIVITY_STATUS
-from ..shared.actions.models import SlotValidationOperators, LogicalOperators
+from ..shared.actions.models import SlotValidationOperators, LogicalOperators, MAIN_HTTP_REQUEST, \
+    CHAT_LOG_SESSION_WINDOW
 from ..shared.constants import SLOT_SET_TYPE
 from kairon.exceptions import AppException
 
@@ -164,9 +165,44 @@ class HttpActionParameters(BaseModel):
 
         if values.get('parameter_type') == ParameterChoice.slot and Utility.check_empty_string(values.get('value')):
             raise ValueError("Provide name of the slot as value")
+
+        value = values.get('value')
+        if values.get('parameter_type') == ParameterChoice.chat_log and not Utility.check_empty_string(value) \
+                and value != CHAT_LOG_SESSION_WINDOW and not (value.isdigit() and int(value) > 0):
+            raise ValueError(f"chat_log value must be empty, '{CHAT_LOG_SESSION_WINDOW}' or number of turns")
         return values
 
 
+class HttpActionSubRequest(BaseModel):
+    name: constr(to_lower=True, strip_whitespace=True)
+    http_url: str
+    request_method: str
+    params_list: List[HttpActionParameters] = []
+    headers: List[HttpActionParameters] = []
+
+    @validator("name")
+    def validate_name(cls, v, values, **kwargs):
+        from kairon.shared.utils import Utility
+
+        if Utility.check_empty_string(v):
+            raise ValueError("name is required")
+        if "." in v or v == MAIN_HTTP_REQUEST:
+            raise ValueError(f"name cannot contain '.' or be '{MAIN_HTTP_REQUEST}'")
+        return v
+
+    @validator("http_url")
+    def validate_http_url(cls, v, values, **kwargs):
+        if isinstance(validators.url(v), ValidationFailure):
+            raise ValueError("URL is malformed")
+        return v
+
+    @validator("request_method")
+    def validate_request_method(cls, v, values, **kwargs):
+        if v.upper() not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError("Invalid HTTP method")
+        return v.upper()
+
+
 class HttpActionConfigRequest(BaseModel):
     action_name: constr(to_lower=True, strip_whitespace=True)
     response: str
@@ -174,6 +210,8 @@ class HttpActionConfigRequest(BaseModel):
     request_method: str
     params_list: List[HttpActionParameters] = []
     headers: List[HttpActionParameters] = []
+    cache_ttl: int = None
+    requests: List[HttpActionSubRequest] = []
 
     @validator("action_name")
     def validate_action_name(cls, v, values, **kwargs):
@@ -195,6 +233,19 @@ class HttpActionConfigRequest(BaseModel):
             raise ValueError("Invalid HTTP method")
         return v.upper()
 
+    @validator("cache_ttl")
+    def validate_cache_ttl(cls, v, values, **kwargs):
+        if v is not None and v < 0:
+            raise ValueError("cache_ttl must be a positive number of seconds")
+        return v
+
+    @validator("requests")
+    def validate_requests(cls, v, values, **kwargs):
+        names = [request.name for request in v or []]
+        if len(names) != len(set(names)):
+            raise ValueError("request names must be unique")
+        return v
+
 
 class GoogleSearchActionRequest(BaseModel):
     name: constr(to_lower=True, strip_whitespace=True)
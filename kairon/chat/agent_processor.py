@@ -1,3 +1,6 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Text
 
 from loguru import logger as logging
@@ -6,7 +9,7 @@ from rasa.core.agent import Agent
 from kairon.chat.cache import AgentCache
 from kairon.exceptions import AppException
 from kairon.shared.data.processor import MongoProcessor
-from .cache import InMemoryAgentCache
+from .cache import MemoryBudgetedAgentCache, ModelArtifactCache
 from ..shared.utils import Utility
 
 
@@ -16,7 +19,10 @@ class AgentProcessor:
     """
 
     mongo_processor = MongoProcessor()
-    cache_provider: AgentCache = InMemoryAgentCache()
+    cache_provider: AgentCache = MemoryBudgetedAgentCache()
+    loader = None
+    loading = {}
+    swap_stats = {}
 
     @staticmethod
     def get_agent(bot: Text) -> Agent:
@@ -31,25 +37,131 @@ class AgentProcessor:
         return AgentProcessor.cache_provider.get(bot)
 
     @staticmethod
-    def reload(bot: Text):
+    async def get_agent_async(bot: Text) -> Agent:
         """
-        reload bot agent
+        fetch the bot agent from cache if exist otherwise load it in the loader thread pool
+        without blocking the event loop. Only one load is in flight per bot and
+        concurrent requests for the same bot await it.
 
         :param bot: bot id
-        :return: None
+        :return: Agent Object
+        """
+        if AgentProcessor.cache_provider.is_exists(bot):
+            agent = AgentProcessor.cache_provider.get(bot)
+            if agent:
+                return agent
+        future = AgentProcessor.loading.get(bot)
+        if future is None:
+            future = AgentProcessor.__load(bot)
+        return await asyncio.shield(future)
+
+    @staticmethod
+    async def reload_async(bot: Text) -> Agent:
+        """
+        reloads the bot agent in the loader thread pool through the same in-flight map as cold loads.
+        A load already in flight for the bot is awaited first, as it may have read an older model
+        and would swap it in after this reload. The reload then takes its place in the map, so that
+        requests for a cold bot await the reload instead of starting another load.
+
+        :param bot: bot id
+        :return: Agent Object
+        """
+        future = AgentProcessor.loading.get(bot)
+        while future is not None and not future.done():
+            try:
+                await asyncio.shield(future)
+            except AppException:
+                pass
+            future = AgentProcessor.loading.get(bot)
+        return await asyncio.shield(AgentProcessor.__load(bot))
+
+    @staticmethod
+    def __load(bot: Text) -> asyncio.Future:
+        loop = asyncio.get_event_loop()
+        future = loop.run_in_executor(AgentProcessor.get_loader(), AgentProcessor.reload, bot)
+        AgentProcessor.loading[bot] = future
+        future.add_done_callback(lambda done: AgentProcessor.__loaded(bot, done))
+        return future
+
+    @staticmethod
+    def __loaded(bot: Text, future: asyncio.Future):
+        if AgentProcessor.loading.get(bot) is future:
+            del AgentProcessor.loading[bot]
+
+    @staticmethod
+    def get_loader() -> ThreadPoolExecutor:
+        """
+        thread pool used for loading agents off the event loop.
+        Agents are not picklable, hence a process pool cannot be used.
+
+        :return: ThreadPoolExecutor
+        """
+        if AgentProcessor.loader is None:
+            workers = Utility.environment.get('agent_cache', {}).get('loader_workers') or 4
+            AgentProcessor.loader = ThreadPoolExecutor(int(workers), thread_name_prefix="agent_loader")
+        return AgentProcessor.loader
+
+    @staticmethod
+    def reload(bot: Text) -> Agent:
+        """
+        loads and warms up a new bot agent and then swaps it with the
+        cached one in a single cache write, so that requests never see a
+        missing or partially loaded agent. Requests already being handled
+        finish on the previous agent. Swap latency covers only the cache
+        write, the agent size is estimated beforehand.
+
+        :param bot: bot id
+        :return: Agent Object
         """
         try:
-            endpoint = AgentProcessor.mongo_processor.get_endpoints(
-                bot, raise_exception=False
-            )
-            action_endpoint = Utility.get_action_url(endpoint)
-            model_path = Utility.get_latest_model(bot)
-            domain = AgentProcessor.mongo_processor.load_domain(bot)
-            mongo_store = Utility.get_local_mongo_store(bot, domain)
-            agent = Agent.load(
-                model_path, action_endpoint=action_endpoint, tracker_store=mongo_store
-            )
-            AgentProcessor.cache_provider.set(bot, agent)
+            start = time.perf_counter()
+            agent = AgentProcessor.load_agent(bot)
+            loaded = time.perf_counter()
+            AgentProcessor.warm_up(agent)
+            size = AgentProcessor.cache_provider.estimate_size(agent)
+            warmed = time.perf_counter()
+            AgentProcessor.cache_provider.set(bot, agent, size)
+            swapped = time.perf_counter()
+            AgentProcessor.swap_stats[bot] = {
+                "load_time": round((loaded - start) * 1000, 2),
+                "warm_up_time": round((warmed - loaded) * 1000, 2),
+                "swap_latency": round((swapped - warmed) * 1000, 2)
+            }
+            logging.info(f"Agent swapped for bot {bot}: {AgentProcessor.swap_stats[bot]}")
+            return agent
         except Exception as e:
             logging.exception(e)
             raise AppException("Bot has not been trained yet!")
+
+    @staticmethod
+    def load_agent(bot: Text) -> Agent:
+        """
+        loads bot agent from the latest model
+
+        :param bot: bot id
+        :return: Agent Object
+        """
+        endpoint = AgentProcessor.mongo_processor.get_endpoints(
+            bot, raise_exception=False
+        )
+        action_endpoint = Utility.get_action_url(endpoint)
+        model_path = ModelArtifactCache.get(Utility.get_latest_model(bot))
+        domain = AgentProcessor.mongo_processor.load_domain(bot)
+        mongo_store = Utility.get_local_mongo_store(bot, domain)
+        return Agent.load(
+            model_path, action_endpoint=action_endpoint, tracker_store=mongo_store
+        )
+
+    @staticmethod
+    def warm_up(agent: Agent):
+        """
+        runs a dry-run parse through the nlu pipeline so that the
+        first user message does not pay for graph initialization.
+        Nothing is written to the tracker store.
+
+        :param agent: bot agent
+        :return: None
+        """
+        interpreter = getattr(agent.interpreter, "interpreter", None)
+        if interpreter:
+            interpreter.parse("hello")
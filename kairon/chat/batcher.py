@@ -0,0 +1,113 @@
+import asyncio
+from typing import Text
+
+from cachetools import TTLCache
+from loguru import logger as logging
+
+from ..shared.utils import Utility
+
+
+class MicroBatcher:
+    """
+    Collects messages arriving concurrently for a bot and parses them together off the event loop.
+    A message arriving while no batch is being parsed is parsed right away, so batching never adds
+    latency to a lone message. Messages arriving meanwhile wait for the running batch, up to max wait
+    time. Rasa 2.8 interpreters still parse one message at a time, hence batches only pay off once
+    the interpreter parses a batch in a single vectorized pass.
+    """
+
+    instances = {}
+    enabled = TTLCache(maxsize=10000, ttl=60)
+
+    def __init__(self, bot: Text, max_batch_size: int, max_wait_ms: float):
+        self.bot = bot
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pending = []
+        self.interpreter = None
+        self.flush_handle = None
+        self.running = 0
+        self.histogram = {}
+
+    @staticmethod
+    def is_enabled(bot: Text) -> bool:
+        """
+        checks if micro batching is enabled in bot settings.
+        Settings are cached for a minute to keep mongo off the chat path.
+
+        :param bot: bot id
+        :return: True/False
+        """
+        if bot not in MicroBatcher.enabled:
+            from kairon.shared.data.data_objects import BotSettings
+
+            settings = BotSettings.objects(bot=bot, status=True).first()
+            MicroBatcher.enabled[bot] = bool(settings and settings.micro_batching)
+        return MicroBatcher.enabled[bot]
+
+    @staticmethod
+    def get_instance(bot: Text) -> "MicroBatcher":
+        if bot not in MicroBatcher.instances:
+            config = Utility.environment.get('chat', {}).get('micro_batching') or {}
+            MicroBatcher.instances[bot] = MicroBatcher(
+                bot, int(config.get('max_batch_size') or 8), float(config.get('max_wait_ms') or 5)
+            )
+        return MicroBatcher.instances[bot]
+
+    @staticmethod
+    def stats() -> dict:
+        """
+        fetches batch size histogram for every bot
+
+        :return: dict of bot and histogram of batch size to number of batches
+        """
+        return {bot: dict(batcher.histogram) for bot, batcher in MicroBatcher.instances.items()}
+
+    async def parse(self, interpreter, text: Text) -> dict:
+        """
+        adds message to the current batch and waits for its parse result.
+        Batch is flushed right away when no batch is being parsed,
+        otherwise when it reaches max batch size or max wait time.
+
+        :param interpreter: nlu interpreter of the bot agent
+        :param text: user message
+        :return: parse data
+        """
+        if self.pending and interpreter is not self.interpreter:
+            self.flush()
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.interpreter = interpreter
+        self.pending.append((text, future))
+        if len(self.pending) >= self.max_batch_size or not self.running:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            self.histogram[len(batch)] = self.histogram.get(len(batch), 0) + 1
+            self.running += 1
+            asyncio.ensure_future(self.__run(self.interpreter, batch))
+
+    async def __run(self, interpreter, batch: list):
+        loop = asyncio.get_event_loop()
+        try:
+            results = await loop.run_in_executor(None, lambda: [interpreter.parse(text) for text, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            logging.exception(e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.running -= 1
+            if self.pending and not self.running:
+                self.flush()
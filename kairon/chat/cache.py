@@ -1,15 +1,36 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from threading import RLock
 from typing import Text
 
 from cachetools import LRUCache
+from loguru import logger as logging
 from rasa.core.agent import Agent
 
+from kairon.shared.utils import Utility
+
 
 class AgentCache:
-    def set(self, bot: Text, agent: Agent):
+    def set(self, bot: Text, agent: Agent, size: int = None):
         """
         loads the bot agent into cache
 
         :param bot: bot id
+        :param agent: bot agent
+        :param size: estimated size of the agent, if already computed
+        :return: pass
+        """
+        pass
+
+    def estimate_size(self, agent: Agent) -> int:
+        """
+        estimates the size of the agent held in cache
+
         :param agent: bot agent
         :return: pass
         """
@@ -33,22 +54,29 @@ class AgentCache:
         """
         pass
 
+    def stats(self) -> dict:
+        """
+        fetches cache statistics
+
+        :return: pass
+        """
+        pass
+
 
 class InMemoryAgentCache(AgentCache):
 
     def __init__(self):
         self.cache = LRUCache(maxsize=100)
 
-    def set(self, bot: Text, agent: Agent):
+    def set(self, bot: Text, agent: Agent, size: int = None):
         """
         loads bot agent in LRU cache
 
         :param bot: bot id
         :param agent:  bot agent
+        :param size: not used
         :return: None
         """
-        if bot in self.cache.keys():
-            self.cache.pop(bot)
         self.cache.__setitem__(bot, agent)
 
     def get(self, bot: Text) -> Agent:
@@ -68,3 +96,257 @@ class InMemoryAgentCache(AgentCache):
         :return: True/False
         """
         return bot in self.cache.keys()
+
+    def stats(self) -> dict:
+        """
+        fetches LRU cache statistics
+
+        :return: dict of cached agents count and capacity
+        """
+        return {"agents": self.cache.currsize, "max_size": self.cache.maxsize}
+
+
+class MemoryBudgetedAgentCache(AgentCache):
+    """
+    LRU agent cache which evicts on the estimated resident size
+    of the loaded agents instead of the number of agents.
+    """
+
+    def __init__(self, memory_budget: int = None):
+        """
+        :param memory_budget: memory budget in bytes, read from agent_cache.memory_budget_mb in system.yaml if not passed
+        """
+        self._memory_budget = memory_budget
+        self.cache = OrderedDict()
+        self.sizes = {}
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = RLock()
+
+    @property
+    def memory_budget(self) -> int:
+        if self._memory_budget is None:
+            budget_mb = Utility.environment.get('agent_cache', {}).get('memory_budget_mb') or 2048
+            return int(budget_mb) * 1024 * 1024
+        return self._memory_budget
+
+    @staticmethod
+    def estimate_size(agent: Agent) -> int:
+        """
+        estimates the resident size of the agent using its unpacked model directory,
+        as the model weights and featurizer vocabularies dominate agent memory
+
+        :param agent: bot agent
+        :return: size in bytes
+        """
+        model_directory = getattr(agent, "model_directory", None)
+        if not model_directory or not os.path.isdir(model_directory):
+            return sys.getsizeof(agent)
+        return Utility.get_directory_size(model_directory)
+
+    def set(self, bot: Text, agent: Agent, size: int = None):
+        """
+        loads bot agent in cache and evicts least recently used
+        agents until the resident size is within the memory budget.
+        An agent larger than the budget is still cached alone.
+
+        :param bot: bot id
+        :param agent:  bot agent
+        :param size: estimated size of the agent, estimated here if not passed
+        :return: None
+        """
+        if size is None:
+            size = self.estimate_size(agent)
+        with self.lock:
+            if bot in self.cache:
+                replaced = self.cache.pop(bot)
+                self.resident_bytes -= self.sizes.pop(bot)
+                ModelArtifactCache.remove_reference(getattr(replaced, "model_directory", None))
+            while self.cache and self.resident_bytes + size > self.memory_budget:
+                evicted_bot, evicted = self.cache.popitem(last=False)
+                self.resident_bytes -= self.sizes.pop(evicted_bot)
+                ModelArtifactCache.remove_reference(getattr(evicted, "model_directory", None))
+                self.evictions += 1
+                logging.info(f"Evicted agent for bot {evicted_bot} from cache")
+            if size > self.memory_budget:
+                logging.warning(f"Agent for bot {bot} of {size} bytes exceeds cache memory budget")
+            self.cache[bot] = agent
+            ModelArtifactCache.add_reference(getattr(agent, "model_directory", None))
+            self.sizes[bot] = size
+            self.resident_bytes += size
+
+    def get(self, bot: Text) -> Agent:
+        """
+        fetches bot agent from cache and marks it as recently used
+
+        :param bot: bot id
+        :return: Agent object
+        """
+        with self.lock:
+            agent = self.cache.get(bot)
+            if agent is not None:
+                self.cache.move_to_end(bot)
+            return agent
+
+    def is_exists(self, bot: Text) -> bool:
+        """
+        checks if bot agent exist in cache.
+        AgentProcessor looks up agents through this method,
+        hence hits and misses are recorded here.
+
+        :param bot: bot id
+        :return: True/False
+        """
+        with self.lock:
+            exists = bot in self.cache
+            if exists:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return exists
+
+    def stats(self) -> dict:
+        """
+        fetches cache statistics
+
+        :return: dict of hits, misses, evictions, resident bytes and budget
+        """
+        with self.lock:
+            return {
+                "agents": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "resident_bytes": self.resident_bytes,
+                "memory_budget": self.memory_budget
+            }
+
+
+class ModelArtifactCache:
+    """
+    On-disk cache of unpacked models shared by reloads and by
+    all chat server processes on the same node.
+    Models referenced by agents cached in this process are never evicted,
+    neither are models used by any process within the grace period.
+    """
+
+    references = {}
+    lock = RLock()
+
+    @staticmethod
+    def get_cache_dir() -> Text:
+        return Utility.environment.get('model_cache', {}).get('path') or os.path.join(tempfile.gettempdir(), "kairon_models")
+
+    @staticmethod
+    def get_disk_budget() -> int:
+        budget_mb = Utility.environment.get('model_cache', {}).get('disk_budget_mb') or 10240
+        return int(budget_mb) * 1024 * 1024
+
+    @staticmethod
+    def get_grace_period() -> float:
+        return float(Utility.environment.get('model_cache', {}).get('grace_period_seconds') or 3600)
+
+    @staticmethod
+    def add_reference(model_dir: Text):
+        """
+        marks unpacked model as in use by an agent of this process
+
+        :param model_dir: unpacked model directory
+        :return: None
+        """
+        if not model_dir:
+            return
+        with ModelArtifactCache.lock:
+            ModelArtifactCache.references[model_dir] = ModelArtifactCache.references.get(model_dir, 0) + 1
+
+    @staticmethod
+    def remove_reference(model_dir: Text):
+        """
+        releases reference added for an agent of this process
+
+        :param model_dir: unpacked model directory
+        :return: None
+        """
+        if not model_dir:
+            return
+        with ModelArtifactCache.lock:
+            count = ModelArtifactCache.references.get(model_dir, 0) - 1
+            if count > 0:
+                ModelArtifactCache.references[model_dir] = count
+            else:
+                ModelArtifactCache.references.pop(model_dir, None)
+
+    @staticmethod
+    def fingerprint(model_path: Text) -> Text:
+        """
+        computes model fingerprint from the archive path, size and modification time.
+        Model archives are written once with a timestamped name, hence this identifies
+        the model without reading the whole archive.
+
+        :param model_path: model archive path
+        :return: fingerprint
+        """
+        stat = os.stat(model_path)
+        key = f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get(model_path: Text) -> Text:
+        """
+        fetches unpacked model directory for the model archive,
+        unpacking it into the cache only if it is not already present
+
+        :param model_path: model archive path
+        :return: unpacked model directory
+        """
+        from rasa.model import unpack_model
+
+        cache_dir = ModelArtifactCache.get_cache_dir()
+        model_dir = os.path.join(cache_dir, ModelArtifactCache.fingerprint(model_path))
+        if not os.path.isdir(model_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+            working_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".unpack_")
+            try:
+                unpack_model(model_path, working_dir)
+                os.rename(working_dir, model_dir)
+                logging.info(f"Model {model_path} unpacked to {model_dir}")
+            except OSError:
+                # model was unpacked concurrently by another process
+                if not os.path.isdir(model_dir):
+                    raise
+            finally:
+                shutil.rmtree(working_dir, ignore_errors=True)
+        os.utime(model_dir)
+        ModelArtifactCache.evict(model_dir)
+        return model_dir
+
+    @staticmethod
+    def evict(in_use: Text):
+        """
+        deletes least recently used unpacked models until the cache is within disk budget.
+        Models referenced by cached agents of this process and models used within
+        the grace period, possibly by other processes, are kept.
+
+        :param in_use: model directory which must not be evicted
+        :return: None
+        """
+        cache_dir = ModelArtifactCache.get_cache_dir()
+        with ModelArtifactCache.lock:
+            protected = set(ModelArtifactCache.references.keys())
+        protected.add(in_use)
+        grace_until = time.time() - ModelArtifactCache.get_grace_period()
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if not name.startswith('.') and os.path.isdir(path):
+                entries.append((os.path.getmtime(path), Utility.get_directory_size(path), path))
+        total_size = sum(entry[1] for entry in entries)
+        for last_used, size, path in sorted(entries):
+            if total_size <= ModelArtifactCache.get_disk_budget() or last_used > grace_until:
+                break
+            if path not in protected:
+                shutil.rmtree(path, ignore_errors=True)
+                total_size -= size
+                logging.info(f"Evicted unpacked model {path}")
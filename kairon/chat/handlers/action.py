@@ -1,18 +1,19 @@
 import logging
 from abc import ABC
 
-from kairon.shared.tornado.handlers.base import BaseHandler
+from .base import BotAffinityHandler
 from tornado.escape import json_decode, json_encode
 from ..utils import ChatUtils
+from ..agent_processor import AgentProcessor
+from ..warmup import WarmUpProcessor
+from ..batcher import MicroBatcher
+from kairon.shared.tornado.handlers.base import BaseHandler
 from kairon.shared.models import User
-from tornado import concurrent
-
-executor = concurrent.futures.ThreadPoolExecutor(2)
 
 logger = logging.getLogger(__name__)
 
 
-class ChatHandler(BaseHandler, ABC):
+class ChatHandler(BotAffinityHandler, ABC):
 
     async def post(self, bot: str):
         success = True
@@ -32,7 +33,7 @@ class ChatHandler(BaseHandler, ABC):
         self.write(json_encode({"data": response, "success": success, "error_code": error_code, "message": message}))
 
 
-class ReloadHandler(BaseHandler, ABC):
+class ReloadHandler(BotAffinityHandler, ABC):
 
     async def get(self, bot: str):
         success = True
@@ -41,10 +42,45 @@ class ReloadHandler(BaseHandler, ABC):
         error_code = 0
         try:
             user: User = super().authenticate(self.request, bot=bot)
-            executor.submit(ChatUtils.reload, bot)
+            response = await ChatUtils.reload(bot)
+        except Exception as e:
+            message = str(e)
+            error_code = 422
+            success = False
+        self.set_status(200)
+        self.write(json_encode({"data": response, "success": success, "error_code": error_code, "message": message}))
+
+
+class ParseBatchHandler(BotAffinityHandler, ABC):
+
+    async def post(self, bot: str):
+        success = True
+        message = None
+        response = None
+        error_code = 0
+        try:
+            user: User = super().authenticate(self.request, bot=bot)
+            body = json_decode(self.request.body.decode("utf8"))
+            response = await ChatUtils.parse_batch(body.get("data"), bot)
         except Exception as e:
             message = str(e)
             error_code = 422
             success = False
         self.set_status(200)
         self.write(json_encode({"data": response, "success": success, "error_code": error_code, "message": message}))
+
+
+class ReadinessHandler(BaseHandler, ABC):
+
+    async def get(self):
+        ready = WarmUpProcessor.is_ready()
+        response = {"ready": ready, "warm_up": WarmUpProcessor.status, "cache": AgentProcessor.cache_provider.stats()}
+        self.set_status(200 if ready else 503)
+        self.write(json_encode({"data": response, "success": ready, "error_code": 0 if ready else 503, "message": None}))
+
+
+class MetricsHandler(BaseHandler, ABC):
+
+    async def get(self):
+        response = {"cache": AgentProcessor.cache_provider.stats(), "batch_size_histogram": MicroBatcher.stats()}
+        self.write(json_encode({"data": response, "success": True, "error_code": 0, "message": None}))
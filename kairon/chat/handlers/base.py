@@ -0,0 +1,50 @@
+from abc import ABC
+
+from loguru import logger as logging
+from tornado.escape import json_encode
+from tornado.httpclient import AsyncHTTPClient
+from tornado.simple_httpclient import HTTPTimeoutError
+
+from kairon.shared.tornado.handlers.base import BaseHandler
+from kairon.shared.utils import Utility
+from ..routing import BotAffinityRouter
+
+FORWARDED_HEADER = "X-Kairon-Forwarded"
+SKIPPED_RESPONSE_HEADERS = {"Content-Length", "Transfer-Encoding", "Connection", "Content-Encoding"}
+
+
+class BotAffinityHandler(BaseHandler, ABC):
+    """
+    Forwards requests for bots owned by another chat server worker to that worker.
+    """
+
+    async def prepare(self):
+        if self.request.method == "OPTIONS" or not self.path_args:
+            return
+        bot = self.path_args[0]
+        if BotAffinityRouter.is_local(bot) or self.request.headers.get(FORWARDED_HEADER):
+            return
+        headers = self.request.headers.copy()
+        headers[FORWARDED_HEADER] = "1"
+        owner = BotAffinityRouter.get_owner(bot)
+        try:
+            response = await AsyncHTTPClient().fetch(
+                BotAffinityRouter.get_worker_url(owner, self.request.uri),
+                method=self.request.method,
+                headers=headers,
+                body=self.request.body if self.request.method in {"POST", "PUT"} else None,
+                request_timeout=float(Utility.environment.get('chat', {}).get('forward_timeout') or 60),
+                raise_error=False
+            )
+        except Exception as e:
+            status = 503 if isinstance(e, HTTPTimeoutError) else 502
+            logging.error(f"Could not forward request for bot {bot} to worker {owner}: {e}")
+            self.set_status(status)
+            self.finish(json_encode({"data": None, "success": False, "error_code": status,
+                                     "message": "Chat server worker of the bot is unavailable"}))
+            return
+        for name, value in response.headers.get_all():
+            if name not in SKIPPED_RESPONSE_HEADERS:
+                self.set_header(name, value)
+        self.set_status(response.code)
+        self.finish(response.body)
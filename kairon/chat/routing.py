@@ -0,0 +1,78 @@
+import hashlib
+from bisect import bisect
+from typing import Text
+
+from kairon.shared.utils import Utility
+
+
+class BotAffinityRouter:
+    """
+    Consistent hash ring assigning every bot to a single chat server worker,
+    so that the bot agent is loaded only in the memory of that worker.
+    """
+
+    worker_id = None
+    num_workers = 1
+    ring = []
+    ring_workers = []
+
+    @staticmethod
+    def initialize(worker_id: int, num_workers: int, replicas: int = 100):
+        """
+        builds hash ring with virtual nodes for every worker
+
+        :param worker_id: id of the current worker process
+        :param num_workers: number of worker processes
+        :param replicas: virtual nodes per worker
+        :return: None
+        """
+        nodes = sorted(
+            (BotAffinityRouter.hash(f"worker_{worker}_{replica}"), worker)
+            for worker in range(num_workers) for replica in range(replicas)
+        )
+        BotAffinityRouter.ring = [node[0] for node in nodes]
+        BotAffinityRouter.ring_workers = [node[1] for node in nodes]
+        BotAffinityRouter.num_workers = num_workers
+        BotAffinityRouter.worker_id = worker_id
+
+    @staticmethod
+    def hash(key: Text) -> int:
+        return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+    @staticmethod
+    def get_owner(bot: Text) -> int:
+        """
+        fetches worker owning the bot
+
+        :param bot: bot id
+        :return: worker id
+        """
+        if not BotAffinityRouter.ring:
+            return 0
+        index = bisect(BotAffinityRouter.ring, BotAffinityRouter.hash(bot)) % len(BotAffinityRouter.ring)
+        return BotAffinityRouter.ring_workers[index]
+
+    @staticmethod
+    def is_local(bot: Text) -> bool:
+        """
+        checks if bot is owned by the current worker
+
+        :param bot: bot id
+        :return: True/False
+        """
+        return BotAffinityRouter.worker_id is None or BotAffinityRouter.get_owner(bot) == BotAffinityRouter.worker_id
+
+    @staticmethod
+    def get_worker_port(worker_id: int) -> int:
+        """
+        fetches internal port on which the worker listens for forwarded requests
+
+        :param worker_id: worker id
+        :return: port
+        """
+        base_port = Utility.environment.get('chat', {}).get('worker_base_port') or 5100
+        return int(base_port) + worker_id
+
+    @staticmethod
+    def get_worker_url(worker_id: int, uri: Text) -> Text:
+        return f"http://127.0.0.1:{BotAffinityRouter.get_worker_port(worker_id)}{uri}"
@@ -1,8 +1,16 @@
+from os import getenv
+
+from tornado.httpserver import HTTPServer
 from tornado.ioloop import IOLoop
+from tornado.netutil import bind_sockets
+from tornado.process import fork_processes
 from tornado.web import Application
 from tornado.options import parse_command_line
 from kairon.shared.tornado.handlers.index import IndexHandler
-from .handlers.action import ChatHandler, ReloadHandler
+from .handlers.action import ChatHandler, ReloadHandler, ParseBatchHandler, ReadinessHandler, \
+    MetricsHandler
+from .routing import BotAffinityRouter
+from .warmup import WarmUpProcessor
 from ..shared.utils import Utility
 from loguru import logger
 from mongoengine import connect
@@ -14,14 +22,28 @@ def make_app():
         (r"/", IndexHandler),
         (r"/api/bot/([^/]+)/chat", ChatHandler),
         (r"/api/bot/([^/]+)/reload", ReloadHandler),
+        (r"/api/bot/([^/]+)/parse/batch", ParseBatchHandler),
+        (r"/api/readiness", ReadinessHandler),
+        (r"/api/metrics", MetricsHandler),
     ], compress_response=True, debug=False)
 
 
 if __name__ == "__main__":
+    parse_command_line()
+    num_processes = int(getenv("WEB_CONCURRENCY", "1"))
+    sockets = bind_sockets(5000)
+    if num_processes > 1:
+        worker_id = fork_processes(num_processes)
+        BotAffinityRouter.initialize(worker_id, num_processes)
     connect(**Utility.mongoengine_connection())
     app = make_app()
     Utility.initiate_tornado_apm_client(app)
-    app.listen(5000)
-    parse_command_line()
+    if WarmUpProcessor.get_config().get('enable'):
+        IOLoop.current().spawn_callback(WarmUpProcessor.warm_up)
+    server = HTTPServer(app)
+    server.add_sockets(sockets)
+    if BotAffinityRouter.worker_id is not None:
+        HTTPServer(app).listen(BotAffinityRouter.get_worker_port(BotAffinityRouter.worker_id), address="127.0.0.1")
+        logger.info(f"Worker {BotAffinityRouter.worker_id} listening on port {BotAffinityRouter.get_worker_port(BotAffinityRouter.worker_id)}")
     logger.info("Server Started")
-    IOLoop.current().start()
\ No newline at end of file
+    IOLoop.current().start()
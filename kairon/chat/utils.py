@@ -1,19 +1,74 @@
-from typing import Text
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Text, List
+from rasa.core.channels import UserMessage
+from rasa.shared.constants import INTENT_MESSAGE_PREFIX
+
 from .agent_processor import AgentProcessor
+from .batcher import MicroBatcher
+from ..exceptions import AppException
+from ..shared.utils import Utility
 
 
 class ChatUtils:
+    parser = None
 
     @staticmethod
     async def chat(data: Text, bot: Text, user: Text):
-        model = AgentProcessor.get_agent(bot)
+        model = await AgentProcessor.get_agent_async(bot)
+        interpreter = getattr(model.interpreter, "interpreter", None)
+        if interpreter and isinstance(data, str) and not data.startswith(INTENT_MESSAGE_PREFIX) \
+                and MicroBatcher.is_enabled(bot):
+            parse_data = await MicroBatcher.get_instance(bot).parse(interpreter, data)
+            return await model.handle_message(UserMessage(data, sender_id=user, parse_data=parse_data))
         chat_response = await model.handle_text(
             data, sender_id=user
         )
         return chat_response
 
     @staticmethod
-    def reload(bot: Text):
-        AgentProcessor.reload(bot)
+    async def reload(bot: Text):
+        await AgentProcessor.reload_async(bot)
+        return AgentProcessor.swap_stats.get(bot)
+
+    @staticmethod
+    def get_parser() -> ThreadPoolExecutor:
+        """
+        fetches thread pool parsing messages of batch requests,
+        kept apart from the default executor used by agent loads and reloads
 
+        :return: ThreadPoolExecutor
+        """
+        if ChatUtils.parser is None:
+            workers = int(Utility.environment.get('chat', {}).get('parse_batch_workers') or 4)
+            ChatUtils.parser = ThreadPoolExecutor(workers, thread_name_prefix="parse_batch")
+        return ChatUtils.parser
+
+    @staticmethod
+    async def parse_batch(data: List[Text], bot: Text):
+        """
+        parses list of messages through the bot's nlu pipeline. Rasa interpreters parse one
+        message at a time, hence messages are parsed concurrently on the parser threads,
+        off the event loop. Trackers are neither read nor written.
 
+        :param data: list of messages, capped at parse_batch_limit
+        :param bot: bot id
+        :return: list of intent and entities for every message
+        """
+        limit = int(Utility.environment.get('chat', {}).get('parse_batch_limit') or 100)
+        if not isinstance(data, list) or not data or not all(isinstance(text, str) for text in data):
+            raise AppException("data must be a non empty list of messages")
+        if len(data) > limit:
+            raise AppException(f"Batch size exceeds limit of {limit} messages")
+        agent = await AgentProcessor.get_agent_async(bot)
+        interpreter = getattr(agent.interpreter, "interpreter", None)
+        if interpreter:
+            loop = asyncio.get_event_loop()
+            parser = ChatUtils.get_parser()
+            parsed = await asyncio.gather(*[loop.run_in_executor(parser, interpreter.parse, text) for text in data])
+        else:
+            parsed = await asyncio.gather(*[agent.parse_message_using_nlu_interpreter(text) for text in data])
+        return [
+            {"text": result.get("text"), "intent": result.get("intent"), "entities": result.get("entities")}
+            for result in parsed
+        ]
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+from typing import Text, List
+
+from loguru import logger as logging
+from .agent_processor import AgentProcessor
+from .routing import BotAffinityRouter
+from ..shared.tracker_store import KaironMongoTrackerStore
+from ..shared.utils import Utility
+
+
+class WarmUpProcessor:
+    """
+    Class contains logic for pre-loading agents of the most active bots on chat server startup
+    """
+
+    status = {"state": "not_started", "total": 0, "loaded": 0, "failed": 0}
+
+    @staticmethod
+    def get_config() -> dict:
+        return Utility.environment.get('chat', {}).get('warm_up') or {}
+
+    @staticmethod
+    def is_ready() -> bool:
+        """
+        checks if warm up is either disabled or completed
+
+        :return: True/False
+        """
+        return not WarmUpProcessor.get_config().get('enable') or WarmUpProcessor.status["state"] == "completed"
+
+    @staticmethod
+    def rank_bots(limit: int, days: int) -> List[Text]:
+        """
+        ranks bots by number of users who conversed with the bot recently.
+        Only bots having a trained model and owned by the current worker are considered.
+        Reads through the connection pool of the tracker stores.
+
+        :param limit: number of bots to return
+        :param days: traffic window in days
+        :return: list of bot ids
+        """
+        from rasa.shared.constants import DEFAULT_MODELS_PATH
+
+        config = Utility.get_local_db()
+        timestamp = time.time() - days * 24 * 60 * 60
+        traffic = {}
+        db = KaironMongoTrackerStore.get_client().get_database(config['db'])
+        for bot in db.list_collection_names():
+            if not BotAffinityRouter.is_local(bot) or not os.path.isdir(os.path.join(DEFAULT_MODELS_PATH, bot)):
+                continue
+            traffic[bot] = db.get_collection(bot).count_documents({"latest_event_time": {"$gte": timestamp}})
+        ranked = sorted((bot for bot in traffic if traffic[bot]), key=lambda bot: traffic[bot], reverse=True)
+        return ranked[:limit]
+
+    @staticmethod
+    async def warm_up():
+        """
+        loads agents of the most active bots into the agent cache one at a time.
+        Stops once the agent cache starts evicting, as the memory budget is full.
+
+        :return: None
+        """
+        config = WarmUpProcessor.get_config()
+        WarmUpProcessor.status.update({"state": "in_progress", "total": 0, "loaded": 0, "failed": 0})
+        try:
+            loop = asyncio.get_event_loop()
+            bots = await loop.run_in_executor(
+                AgentProcessor.get_loader(), WarmUpProcessor.rank_bots,
+                int(config.get('limit') or 10), int(config.get('traffic_days') or 7)
+            )
+            WarmUpProcessor.status["total"] = len(bots)
+            logging.info(f"Warming up agents for bots: {bots}")
+            evictions = (AgentProcessor.cache_provider.stats() or {}).get("evictions")
+            for bot in bots:
+                try:
+                    await AgentProcessor.get_agent_async(bot)
+                    WarmUpProcessor.status["loaded"] += 1
+                except Exception as e:
+                    logging.exception(e)
+                    WarmUpProcessor.status["failed"] += 1
+                if (AgentProcessor.cache_provider.stats() or {}).get("evictions") != evictions:
+                    logging.info("Agent cache memory budget reached, stopping warm up")
+                    break
+        except Exception as e:
+            logging.exception(e)
+        WarmUpProcessor.status["state"] = "completed"
@@ -0,0 +1,142 @@
+import time
+from typing import Text
+
+from pymongo import ReplaceOne, ASCENDING
+from pymongo.database import Database
+
+from kairon.shared.utils import Utility
+
+
+class ArchivedCollection:
+    """
+    Reads a tracker collection together with its archive collection.
+    Archived buckets are read first, sorted by sender and bucket, followed by the live trackers,
+    so that events of a sender remain in chronological order.
+    """
+
+    def __init__(self, db: Database, collection: Text):
+        self.live = db.get_collection(collection)
+        self.archive = db.get_collection(ConversationArchive.get_archive_name(collection))
+
+    def aggregate(self, pipeline: list, **kwargs):
+        """
+        runs aggregation over archived and live events.
+        A leading $match stage is applied to both collections so that indexes are used.
+        Archived buckets are sorted before the union, as the union itself does not order them.
+
+        :param pipeline: aggregation pipeline
+        :return: cursor
+        """
+        if pipeline and "$match" in pipeline[0]:
+            match, pipeline = [pipeline[0]], pipeline[1:]
+        else:
+            match = []
+        sort = [{"$sort": {"sender_id": 1, "bucket": 1}}]
+        union = [{"$unionWith": {"coll": self.live.name, "pipeline": match}}]
+        return self.archive.aggregate(match + sort + union + pipeline, **kwargs)
+
+    def find(self, filter: dict = None, projection: dict = None):
+        """
+        finds documents in archived and live events.
+        A sender having archived events is returned once per matching document.
+
+        :param filter: query
+        :param projection: fields to return
+        :return: cursor
+        """
+        pipeline = [{"$match": filter or {}}]
+        if projection:
+            pipeline.append({"$project": projection})
+        return self.aggregate(pipeline, allowDiskUse=True)
+
+    def __getattr__(self, item):
+        return getattr(self.live, item)
+
+
+class ConversationArchive:
+    """
+    Class contains logic for moving old tracker events into an archive collection
+    """
+
+    @staticmethod
+    def get_config() -> dict:
+        return Utility.environment.get('tracker', {}).get('archive') or {}
+
+    @staticmethod
+    def get_archive_name(collection: Text) -> Text:
+        return f"{collection}_archive"
+
+    @staticmethod
+    def get_collection(db: Database, collection: Text):
+        """
+        fetches tracker collection, reading across the archive if archival is enabled
+
+        :param db: tracker database
+        :param collection: tracker collection
+        :return: collection
+        """
+        if ConversationArchive.get_config().get('enable'):
+            return ArchivedCollection(db, collection)
+        return db.get_collection(collection)
+
+    @staticmethod
+    def get_compaction_index(events: list, cutoff: float) -> int:
+        """
+        finds number of leading events to archive, ie, events older than cutoff.
+        Events of the latest session are never archived as they are needed to restore the tracker,
+        hence nothing is archived from a tracker without any session start.
+
+        :param events: tracker events
+        :param cutoff: timestamp before which events are archived
+        :return: number of events to archive
+        """
+        index = next((i for i, event in enumerate(events) if event.get("timestamp", 0) >= cutoff), len(events))
+        for i in range(len(events) - 1, -1, -1):
+            if events[i].get("event") == "action" and events[i].get("name") == "action_session_start":
+                return min(index, i)
+        return 0
+
+    @staticmethod
+    def compact(db: Database, collection: Text):
+        """
+        moves events older than the horizon into bucketed documents of the archive collection.
+        A tracker updated while being compacted is skipped and compacted in the next run.
+        Buckets are upserted by sender and first event timestamp, so a run interrupted before
+        trimming the tracker writes the same buckets again instead of duplicating them.
+
+        :param db: tracker database
+        :param collection: tracker collection
+        :return: number of senders and events archived
+        """
+        config = ConversationArchive.get_config()
+        cutoff = time.time() - int(config.get('horizon_days') or 180) * 24 * 60 * 60
+        bucket_size = int(config.get('bucket_size') or 500)
+        live = db.get_collection(collection)
+        archive = db.get_collection(ConversationArchive.get_archive_name(collection))
+        archive.create_index([("sender_id", ASCENDING), ("bucket", ASCENDING)])
+        senders, archived_events = 0, 0
+        for tracker in live.find({"events.0.timestamp": {"$lt": cutoff}}, {"sender_id": 1, "events": 1}):
+            events = tracker.get("events") or []
+            index = ConversationArchive.get_compaction_index(events, cutoff)
+            if not index or index >= len(events):
+                continue
+            buckets = [
+                {"sender_id": tracker["sender_id"], "bucket": events[i].get("timestamp"),
+                 "events": events[i:min(i + bucket_size, index)]}
+                for i in range(0, index, bucket_size)
+            ]
+            archive.bulk_write([
+                ReplaceOne({"sender_id": bucket["sender_id"], "bucket": bucket["bucket"]}, bucket, upsert=True)
+                for bucket in buckets
+            ], ordered=True)
+            result = live.update_one(
+                {"_id": tracker["_id"], "events": {"$size": len(events)}},
+                {"$push": {"events": {"$each": [], "$slice": index - len(events)}}}
+            )
+            if result.modified_count:
+                senders += 1
+                archived_events += index
+            else:
+                archive.delete_many({"sender_id": tracker["sender_id"],
+                                     "bucket": {"$in": [bucket["bucket"] for bucket in buckets]}})
+        return {"senders": senders, "events": archived_events}
@@ -26,6 +26,7 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from kairon import Utility
 from kairon.api.models import Response
 from kairon.exceptions import AppException
+from kairon.history.processor import HistoryProcessor
 from kairon.history.router import metrics, conversations, trends
 
 logging.basicConfig(level="DEBUG")
@@ -288,6 +289,12 @@ async def app_exception_handler(request, exc):
     )
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """ Tracker connection pool is closed when history server is shut down """
+    HistoryProcessor.close_client()
+
+
 @app.get("/", response_model=Response)
 def index():
     return {"message": "hello"}
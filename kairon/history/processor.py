@@ -1,5 +1,9 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Text
+from threading import RLock
+from typing import Text, Callable
 
 from loguru import logger
 from pymongo import MongoClient
@@ -8,6 +12,8 @@ from pymongo.errors import ServerSelectionTimeoutError
 from kairon import Utility
 from kairon.exceptions import AppException
 from kairon.shared.actions.utils import ActionUtility
+from .archive import ConversationArchive
+from .rollup import MetricRollup
 
 
 class HistoryProcessor:
@@ -15,13 +21,77 @@ class HistoryProcessor:
     """
     Class contains logic for fetching history data and metrics from mongo tracker."""
 
+    client = None
+    executor = None
+    refreshing = set()
+    lock = RLock()
+
     @staticmethod
     def get_mongo_connection():
         url = Utility.environment["tracker"]["url"]
         config = ActionUtility.extract_db_config(url)
         message = f"Loading host:{config.get('host')}, db:{config.get('db')}"
-        client = MongoClient(host=url)
-        return client, message
+        return HistoryProcessor.get_client(), message
+
+    @staticmethod
+    def get_client() -> MongoClient:
+        """
+        Fetches connection pool shared by all history and metrics requests.
+        Client is created on first use.
+
+        :return: MongoClient
+        """
+        with HistoryProcessor.lock:
+            if HistoryProcessor.client is None:
+                config = Utility.environment["tracker"]
+                HistoryProcessor.client = MongoClient(
+                    host=config["url"],
+                    maxPoolSize=int(config.get("pool_size", 100)),
+                    minPoolSize=int(config.get("min_pool_size", 0)),
+                    connect=False
+                )
+            return HistoryProcessor.client
+
+    @staticmethod
+    def get_executor() -> ThreadPoolExecutor:
+        """
+        Fetches bounded thread pool on which history queries are executed.
+
+        :return: ThreadPoolExecutor
+        """
+        with HistoryProcessor.lock:
+            if HistoryProcessor.executor is None:
+                HistoryProcessor.executor = ThreadPoolExecutor(
+                    int(Utility.environment["tracker"].get("workers", 8)), thread_name_prefix="history"
+                )
+            return HistoryProcessor.executor
+
+    @staticmethod
+    async def run_in_executor(method: Callable, *args):
+        """
+        Runs history query on the thread pool, so that event loop stays
+        free to serve other requests while the query is running.
+
+        :param method: HistoryProcessor method
+        :param args: method arguments
+        :return: method result
+        """
+        return await asyncio.get_running_loop().run_in_executor(HistoryProcessor.get_executor(), method, *args)
+
+    @staticmethod
+    def close_client():
+        """
+        Closes shared connection pool and thread pool.
+
+        :return: None
+        """
+        with HistoryProcessor.lock:
+            if HistoryProcessor.executor is not None:
+                HistoryProcessor.executor.shutdown(wait=True)
+                HistoryProcessor.executor = None
+            if HistoryProcessor.client is not None:
+                HistoryProcessor.client.close()
+                HistoryProcessor.client = None
 
     @staticmethod
     def fetch_chat_history(collection: Text, sender, month: int = 1):
@@ -53,23 +123,22 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            try:
-                values = conversations.find({"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}},
-                                            {"_id": 0, "sender_id": 1})
-                users = [
-                    sender["sender_id"]
-                    for sender in values
-                ]
-                return users, message
-            except ServerSelectionTimeoutError as e:
-                logger.error(e)
-                raise AppException(f'Could not connect to tracker: {e}')
-            except Exception as e:
-                logger.error(e)
-                raise AppException(e)
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        try:
+            values = conversations.find({"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}},
+                                        {"_id": 0, "sender_id": 1})
+            users = list(dict.fromkeys(
+                sender["sender_id"]
+                for sender in values
+            ))
+            return users, message
+        except ServerSelectionTimeoutError as e:
+            logger.error(e)
+            raise AppException(f'Could not connect to tracker: {e}')
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
 
     @staticmethod
     def __prepare_data(events):
@@ -118,30 +187,29 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            try:
-                db = client.get_database()
-                conversations = db.get_collection(collection)
-                values = list(conversations
-                              .aggregate([{"$match": {"sender_id": sender_id}},
-                                          {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$match": {"events.event": {"$in": ["user", "bot", "action"]}}},
-                                          {"$group": {"_id": None, "events": {"$push": "$events"}}},
-                                          {"$project": {"_id": 0, "events": 1}}])
-                              )
-                if values:
-                    return (
-                        values[0]['events'],
-                        message
-                    )
-                return [], message
-            except ServerSelectionTimeoutError as e:
-                logger.error(e)
-                raise AppException(f'Could not connect to tracker: {e}')
-            except Exception as e:
-                logger.error(e)
-                raise AppException(e)
+        try:
+            db = client.get_database()
+            conversations = ConversationArchive.get_collection(db, collection)
+            values = list(conversations
+                          .aggregate([{"$match": {"sender_id": sender_id}},
+                                      {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$match": {"events.event": {"$in": ["user", "bot", "action"]}}},
+                                      {"$group": {"_id": None, "events": {"$push": "$events"}}},
+                                      {"$project": {"_id": 0, "events": 1}}])
+                          )
+            if values:
+                return (
+                    values[0]['events'],
+                    message
+                )
+            return [], message
+        except ServerSelectionTimeoutError as e:
+            logger.error(e)
+            raise AppException(f'Could not connect to tracker: {e}')
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
 
     @staticmethod
     def visitor_hit_fallback(collection: Text,
@@ -160,51 +228,55 @@ class HistoryProcessor:
         :param nlu_fallback_action: nlu fallback configured for bot
         :return: list of visitor fallback
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.visitor_hit_fallback, month, fallback_action, nlu_fallback_action,
+                default={"fallback_count": 0, "total_count": 0}
+            )
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
         default_actions = Utility.load_default_actions()
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            fallback_counts, total_counts = [], []
-            try:
-                fallback_counts = list(conversations.aggregate([{"$unwind": "$events"},
-                                                                {"$match": {"events.event": "action",
-                                                                            "events.name": {"$nin": default_actions},
-                                                                            "events.timestamp": {
-                                                                        "$gte": Utility.get_timestamp_previous_month(
-                                                                                    month)}}},
-                                                                {"$match": {'$or': [{"events.name": fallback_action},
-                                                                                    {
-                                                                                "events.name": nlu_fallback_action}]}},
-                                                                {"$group": {"_id": None,
-                                                                            "fallback_count": {"$sum": 1}}},
-                                                                {"$project": {"fallback_count": 1, "_id": 0}}
-                                                                ], allowDiskUse=True))
-
-                total_counts = list(conversations.aggregate([{"$unwind": "$events"},
-                                                             {"$match": {"events.event": "action",
-                                                                         "events.name": {"$nin": default_actions},
-                                                                         "events.timestamp": {
-                                                                         "$gte": Utility.get_timestamp_previous_month(
-                                                                                 month)}}},
-                                                             {"$group": {"_id": None, "total_count": {"$sum": 1}}},
-                                                             {"$project": {"total_count": 1, "_id": 0}}
-                                                             ], allowDiskUse=True))
-
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            if not (fallback_counts and total_counts):
-                fallback_count = 0
-                total_count = 0
-            else:
-                fallback_count = fallback_counts[0]['fallback_count'] if fallback_counts[0]['fallback_count'] else 0
-                total_count = total_counts[0]['total_count'] if total_counts[0]['total_count'] else 0
-            return (
-                {"fallback_count": fallback_count, "total_count": total_count},
-                message,
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        fallback_counts, total_counts = [], []
+        try:
+            fallback_counts = list(conversations.aggregate([{"$unwind": "$events"},
+                                                            {"$match": {"events.event": "action",
+                                                                        "events.name": {"$nin": default_actions},
+                                                                        "events.timestamp": {
+                                                                    "$gte": Utility.get_timestamp_previous_month(
+                                                                                month)}}},
+                                                            {"$match": {'$or': [{"events.name": fallback_action},
+                                                                                {
+                                                                            "events.name": nlu_fallback_action}]}},
+                                                            {"$group": {"_id": None,
+                                                                        "fallback_count": {"$sum": 1}}},
+                                                            {"$project": {"fallback_count": 1, "_id": 0}}
+                                                            ], allowDiskUse=True))
+
+            total_counts = list(conversations.aggregate([{"$unwind": "$events"},
+                                                         {"$match": {"events.event": "action",
+                                                                     "events.name": {"$nin": default_actions},
+                                                                     "events.timestamp": {
+                                                                     "$gte": Utility.get_timestamp_previous_month(
+                                                                             month)}}},
+                                                         {"$group": {"_id": None, "total_count": {"$sum": 1}}},
+                                                         {"$project": {"total_count": 1, "_id": 0}}
+                                                         ], allowDiskUse=True))
+
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        if not (fallback_counts and total_counts):
+            fallback_count = 0
+            total_count = 0
+        else:
+            fallback_count = fallback_counts[0]['fallback_count'] if fallback_counts[0]['fallback_count'] else 0
+            total_count = total_counts[0]['total_count'] if total_counts[0]['total_count'] else 0
+        return (
+            {"fallback_count": fallback_count, "total_count": total_count},
+            message,
+        )
 
     @staticmethod
     def conversation_steps(collection: Text, month: int = 1):
@@ -221,45 +293,44 @@ class HistoryProcessor:
         values = []
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            try:
-                values = list(conversations
-                     .aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                 {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                             "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                 {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                             "allevents": {"$push": "$events"}}},
-                                 {"$unwind": "$events"},
-                                 {"$project": {
-                                     "_id": 1,
-                                     "events": 1,
-                                     "following_events": {
-                                         "$arrayElemAt": [
-                                             "$allevents",
-                                             {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                         ]
-                                     }
-                                 }},
-                                 {"$project": {
-                                     "user_event": "$events.event",
-                                     "bot_event": "$following_events.event",
-                                 }},
-                                 {"$match": {"user_event": "user", "bot_event": "bot"}},
-                                 {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
-                                 {"$project": {
-                                     "sender_id": "$_id",
-                                     "_id": 0,
-                                     "event": 1,
-                                 }}
-                                 ], allowDiskUse=True)
-                        )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        try:
+            values = list(conversations
+                 .aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                             {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                         "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                             {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                         "allevents": {"$push": "$events"}}},
+                             {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                             {"$project": {
+                                 "_id": 1,
+                                 "events": 1,
+                                 "following_events": {
+                                     "$arrayElemAt": [
+                                         "$allevents",
+                                         {"$add": ["$index", 1]}
+                                     ]
+                                 }
+                             }},
+                             {"$project": {
+                                 "user_event": "$events.event",
+                                 "bot_event": "$following_events.event",
+                             }},
+                             {"$match": {"user_event": "user", "bot_event": "bot"}},
+                             {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
+                             {"$project": {
+                                 "sender_id": "$_id",
+                                 "_id": 0,
+                                 "event": 1,
+                             }}
+                             ], allowDiskUse=True)
+                    )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
 
-            return values, message
+        return values, message
 
     @staticmethod
     def conversation_time(collection: Text, month: int = 1):
@@ -276,7 +347,7 @@ class HistoryProcessor:
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
         db = client.get_database()
-        conversations = db.get_collection(collection)
+        conversations = ConversationArchive.get_collection(db, collection)
         values = []
         try:
             values = list(conversations.aggregate([{"$unwind": "$events"},
@@ -284,14 +355,14 @@ class HistoryProcessor:
                                          "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
                              {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
                                          "allevents": {"$push": "$events"}}},
-                             {"$unwind": "$events"},
+                             {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
                              {"$project": {
                                  "_id": 1,
                                  "events": 1,
                                  "following_events": {
                                      "$arrayElemAt": [
                                          "$allevents",
-                                         {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
+                                         {"$add": ["$index", 1]}
                                      ]
                                  }
                              }},
@@ -328,58 +399,57 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            users = []
-            try:
-                users = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                                         "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                             {"$group": {"_id": "$sender_id",
-                                                         "latest_event_time": {"$first": "$latest_event_time"},
-                                                         "events": {"$push": "$events"},
-                                                         "allevents": {"$push": "$events"}}},
-                                             {"$unwind": "$events"},
-                                             {"$project": {
-                                                 "_id": 1,
-                                                 "events": 1,
-                                                 "latest_event_time": 1,
-                                                 "following_events": {
-                                                     "$arrayElemAt": [
-                                                         "$allevents",
-                                                         {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                     ]
-                                                 }
-                                             }},
-                                             {"$project": {
-                                                 "latest_event_time": 1,
-                                                 "user_timestamp": "$events.timestamp",
-                                                 "bot_timestamp": "$following_events.timestamp",
-                                                 "user_event": "$events.event",
-                                                 "bot_event": "$following_events.event",
-                                                 "time_diff": {
-                                                     "$subtract": ["$following_events.timestamp", "$events.timestamp"]
-                                                 }
-                                             }},
-                                             {"$match": {"user_event": "user", "bot_event": "bot"}},
-                                             {"$group": {"_id": "$_id",
-                                                         "latest_event_time": {"$first": "$latest_event_time"},
-                                                         "steps": {"$sum": 1}, "time": {"$sum": "$time_diff"}}},
-                                             {"$project": {
-                                                 "sender_id": "$_id",
-                                                 "_id": 0,
-                                                 "steps": 1,
-                                                 "time": 1,
-                                                 "latest_event_time": 1,
-                                             }},
-                                             {"$sort": {"latest_event_time": -1}}
-                                             ], allowDiskUse=True))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            return users, message
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        users = []
+        try:
+            users = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                                     "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                         {"$group": {"_id": "$sender_id",
+                                                     "latest_event_time": {"$max": "$latest_event_time"},
+                                                     "events": {"$push": "$events"},
+                                                     "allevents": {"$push": "$events"}}},
+                                         {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                         {"$project": {
+                                             "_id": 1,
+                                             "events": 1,
+                                             "latest_event_time": 1,
+                                             "following_events": {
+                                                 "$arrayElemAt": [
+                                                     "$allevents",
+                                                     {"$add": ["$index", 1]}
+                                                 ]
+                                             }
+                                         }},
+                                         {"$project": {
+                                             "latest_event_time": 1,
+                                             "user_timestamp": "$events.timestamp",
+                                             "bot_timestamp": "$following_events.timestamp",
+                                             "user_event": "$events.event",
+                                             "bot_event": "$following_events.event",
+                                             "time_diff": {
+                                                 "$subtract": ["$following_events.timestamp", "$events.timestamp"]
+                                             }
+                                         }},
+                                         {"$match": {"user_event": "user", "bot_event": "bot"}},
+                                         {"$group": {"_id": "$_id",
+                                                     "latest_event_time": {"$first": "$latest_event_time"},
+                                                     "steps": {"$sum": 1}, "time": {"$sum": "$time_diff"}}},
+                                         {"$project": {
+                                             "sender_id": "$_id",
+                                             "_id": 0,
+                                             "steps": 1,
+                                             "time": 1,
+                                             "latest_event_time": 1,
+                                         }},
+                                         {"$sort": {"latest_event_time": -1}}
+                                         ], allowDiskUse=True))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        return users, message
 
     @staticmethod
     def engaged_users(collection: Text, month: int = 1, conversation_limit: int = 10):
@@ -392,58 +462,61 @@ class HistoryProcessor:
         :param conversation_limit: conversation step number to determine engaged users
         :return: number of engaged users
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.engaged_users, month, conversation_limit, default={"engaged_users": 0}
+            )
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            values = []
-            try:
-                values = list(
-                     conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                              {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                                          "events.timestamp": {
-                                                              "$gte": Utility.get_timestamp_previous_month(month)}}
-                                               },
-                                              {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                               "allevents": {"$push": "$events"}}},
-                                              {"$unwind": "$events"},
-                                              {"$project": {
-                                               "_id": 1,
-                                               "events": 1,
-                                               "following_events": {
-                                                 "$arrayElemAt": [
-                                                     "$allevents",
-                                                     {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                 ]
-                                               }
-                                               }},
-                                              {"$project": {
-                                               "user_event": "$events.event",
-                                               "bot_event": "$following_events.event",
-                                               }},
-                                             {"$match": {"user_event": "user", "bot_event": "bot"}},
-                                             {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
-                                             {"$match": {"event": {"$gte": conversation_limit}}},
-                                             {"$group": {"_id": None, "event": {"$sum": 1}}},
-                                             {"$project": {
-                                              "_id": 0,
-                                              "event": 1,
-                                              }}
-                                              ], allowDiskUse=True)
-                                           )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            if not values:
-                event = 0
-            else:
-                event = values[0]['event'] if values[0]['event'] else 0
-            return (
-                {"engaged_users": event},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        values = []
+        try:
+            values = list(
+                 conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                          {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                                      "events.timestamp": {
+                                                          "$gte": Utility.get_timestamp_previous_month(month)}}
+                                           },
+                                          {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                           "allevents": {"$push": "$events"}}},
+                                          {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                          {"$project": {
+                                           "_id": 1,
+                                           "events": 1,
+                                           "following_events": {
+                                             "$arrayElemAt": [
+                                                 "$allevents",
+                                                 {"$add": ["$index", 1]}
+                                             ]
+                                           }
+                                           }},
+                                          {"$project": {
+                                           "user_event": "$events.event",
+                                           "bot_event": "$following_events.event",
+                                           }},
+                                         {"$match": {"user_event": "user", "bot_event": "bot"}},
+                                         {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
+                                         {"$match": {"event": {"$gte": conversation_limit}}},
+                                         {"$group": {"_id": None, "event": {"$sum": 1}}},
+                                         {"$project": {
+                                          "_id": 0,
+                                          "event": 1,
+                                          }}
+                                          ], allowDiskUse=True)
+                                       )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        if not values:
+            event = 0
+        else:
+            event = values[0]['event'] if values[0]['event'] else 0
+        return (
+            {"engaged_users": event},
+            message
+        )
 
     @staticmethod
     def new_users(collection: Text, month: int = 1):
@@ -455,34 +528,35 @@ class HistoryProcessor:
         :param month: default is current month and max is last 6 months
         :return: number of new users
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(collection, MetricRollup.new_users, month, default={"new_users": 0})
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            values = []
-            try:
-                values = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                              {"$match": {"events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
-                                              {"$group": {"_id": '$sender_id',
-                                                          "latest_event_time": {"$first": "$events.timestamp"}}},
-                                              {"$match": {"latest_event_time": {
-                                                              "$gte": Utility.get_timestamp_previous_month(month)}}},
-                                              {"$group": {"_id": None, "count": {"$sum": 1}}},
-                                              {"$project": {"_id": 0, "count": 1}}
-                                              ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            if not values:
-                count = 0
-            else:
-                count = values[0]['count'] if values[0]['count'] else 0
-            return (
-                {"new_users": count},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        values = []
+        try:
+            values = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                          {"$match": {"events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
+                                          {"$group": {"_id": '$sender_id',
+                                                      "latest_event_time": {"$first": "$events.timestamp"}}},
+                                          {"$match": {"latest_event_time": {
+                                                          "$gte": Utility.get_timestamp_previous_month(month)}}},
+                                          {"$group": {"_id": None, "count": {"$sum": 1}}},
+                                          {"$project": {"_id": 0, "count": 1}}
+                                          ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        if not values:
+            count = 0
+        else:
+            count = values[0]['count'] if values[0]['count'] else 0
+        return (
+            {"new_users": count},
+            message
+        )
 
     @staticmethod
     def successful_conversations(collection: Text,
@@ -501,52 +575,51 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            fallback_count = []
-            try:
-                total = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                             {"$group": {"_id": "$sender_id"}},
-                                             {"$group": {"_id": None, "count": {"$sum": 1}}},
-                                             {"$project": {"_id": 0, "count": 1}}
-                                             ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        fallback_count = []
+        try:
+            total = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                         {"$group": {"_id": "$sender_id"}},
+                                         {"$group": {"_id": None, "count": {"$sum": 1}}},
+                                         {"$project": {"_id": 0, "count": 1}}
+                                         ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
 
-            try:
-                fallback_count = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$match": {'$or': [{"events.name": fallback_action}, {"events.name": nlu_fallback_action}]}},
-                        {"$group": {"_id": "$sender_id"}},
-                        {"$group": {"_id": None, "count": {"$sum": 1}}},
-                        {"$project": {"_id": 0, "count": 1}}
-                    ]))
-
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-
-            if not total:
-                total_count = 0
-            else:
-                total_count = total[0]['count'] if total[0]['count'] else 0
+        try:
+            fallback_count = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$match": {'$or': [{"events.name": fallback_action}, {"events.name": nlu_fallback_action}]}},
+                    {"$group": {"_id": "$sender_id"}},
+                    {"$group": {"_id": None, "count": {"$sum": 1}}},
+                    {"$project": {"_id": 0, "count": 1}}
+                ]))
 
-            if not fallback_count:
-                fallbacks_count = 0
-            else:
-                fallbacks_count = fallback_count[0]['count'] if fallback_count[0]['count'] else 0
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
 
-            return (
-                {"successful_conversations": total_count-fallbacks_count, "total": total_count},
-                message
-            )
+        if not total:
+            total_count = 0
+        else:
+            total_count = total[0]['count'] if total[0]['count'] else 0
+
+        if not fallback_count:
+            fallbacks_count = 0
+        else:
+            fallbacks_count = fallback_count[0]['count'] if fallback_count[0]['count'] else 0
+
+        return (
+            {"successful_conversations": total_count-fallbacks_count, "total": total_count},
+            message
+        )
 
     @staticmethod
     def user_retention(collection: Text, month: int = 1):
@@ -561,53 +634,52 @@ class HistoryProcessor:
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            repeating_users = []
-            try:
-                total = list(
-                    conversations.aggregate([{"$match": {"latest_event_time": {
-                        "$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$group": {"_id": None, "count": {"$sum": 1}}},
-                        {"$project": {"_id": 0, "count": 1}}
-                    ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        repeating_users = []
+        try:
+            total = list(
+                conversations.aggregate([{"$match": {"latest_event_time": {
+                    "$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$group": {"_id": None, "count": {"$sum": 1}}},
+                    {"$project": {"_id": 0, "count": 1}}
+                ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
 
-            try:
-                repeating_users = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {"events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
-                                             {"$group": {"_id": '$sender_id', "count": {"$sum": 1},
-                                                         "latest_event_time": {"$first": "$latest_event_time"}}},
-                                             {"$match": {"count": {"$gte": 2}}},
-                                             {"$match": {"latest_event_time": {
-                                                 "$gte": Utility.get_timestamp_previous_month(month)}}},
-                                             {"$group": {"_id": None, "count": {"$sum": 1}}},
-                                             {"$project": {"_id": 0, "count": 1}}
-                                             ]))
-
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-
-            if not total:
-                total_count = 1
-            else:
-                total_count = total[0]['count'] if total[0]['count'] else 1
+        try:
+            repeating_users = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {"events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
+                                         {"$group": {"_id": '$sender_id', "count": {"$sum": 1},
+                                                     "latest_event_time": {"$max": "$latest_event_time"}}},
+                                         {"$match": {"count": {"$gte": 2}}},
+                                         {"$match": {"latest_event_time": {
+                                             "$gte": Utility.get_timestamp_previous_month(month)}}},
+                                         {"$group": {"_id": None, "count": {"$sum": 1}}},
+                                         {"$project": {"_id": 0, "count": 1}}
+                                         ]))
 
-            if not repeating_users:
-                repeat_count = 0
-            else:
-                repeat_count = repeating_users[0]['count'] if repeating_users[0]['count'] else 0
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
 
-            return (
-                {"user_retention": 100*(repeat_count/total_count)},
-                message
-            )
+        if not total:
+            total_count = 1
+        else:
+            total_count = total[0]['count'] if total[0]['count'] else 1
+
+        if not repeating_users:
+            repeat_count = 0
+        else:
+            repeat_count = repeating_users[0]['count'] if repeating_users[0]['count'] else 0
+
+        return (
+            {"user_retention": 100*(repeat_count/total_count)},
+            message
+        )
 
     @staticmethod
     def engaged_users_range(collection: Text, month: int = 6, conversation_limit: int = 10):
@@ -620,60 +692,64 @@ class HistoryProcessor:
         :param conversation_limit: conversation step number to determine engaged users
         :return: dictionary of counts of engaged users for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.engaged_users_range, month, conversation_limit,
+                default={"engaged_user_range": {}}
+            )
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            engaged = []
-            try:
-                engaged = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                                      "events.timestamp": {
-                                                          "$gte": Utility.get_timestamp_previous_month(month)}}
-                                           },
-
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-
-                                          {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"},
-                                                      "events": {"$push": "$events"},
-                                                      "allevents": {"$push": "$events"}}},
-                                          {"$unwind": "$events"},
-                                          {"$project": {
-                                              "_id": 1,
-                                              "events": 1,
-                                              "following_events": {
-                                                  "$arrayElemAt": [
-                                                      "$allevents",
-                                                      {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                  ]
-                                              }
-                                          }},
-                                          {"$project": {
-                                              "user_event": "$events.event",
-                                              "bot_event": "$following_events.event",
-                                          }},
-                                          {"$match": {"user_event": "user", "bot_event": "bot"}},
-                                          {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
-                                          {"$match": {"event": {"$gte": conversation_limit}}},
-                                          {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
-                                          {"$project": {
-                                              "_id": 1,
-                                              "count": 1,
-                                          }}
-                                          ], allowDiskUse=True)
-                )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            engaged_users = {d['_id']: d['count'] for d in engaged}
-            return (
-                {"engaged_user_range": engaged_users},
-                message
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        engaged = []
+        try:
+            engaged = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                                  "events.timestamp": {
+                                                      "$gte": Utility.get_timestamp_previous_month(month)}}
+                                       },
+
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+
+                                      {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"},
+                                                  "events": {"$push": "$events"},
+                                                  "allevents": {"$push": "$events"}}},
+                                      {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                      {"$project": {
+                                          "_id": 1,
+                                          "events": 1,
+                                          "following_events": {
+                                              "$arrayElemAt": [
+                                                  "$allevents",
+                                                  {"$add": ["$index", 1]}
+                                              ]
+                                          }
+                                      }},
+                                      {"$project": {
+                                          "user_event": "$events.event",
+                                          "bot_event": "$following_events.event",
+                                      }},
+                                      {"$match": {"user_event": "user", "bot_event": "bot"}},
+                                      {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
+                                      {"$match": {"event": {"$gte": conversation_limit}}},
+                                      {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
+                                      {"$project": {
+                                          "_id": 1,
+                                          "count": 1,
+                                      }}
+                                      ], allowDiskUse=True)
             )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        engaged_users = {d['_id']: d['count'] for d in engaged}
+        return (
+            {"engaged_user_range": engaged_users},
+            message
+        )
 
     @staticmethod
     def new_users_range(collection: Text, month: int = 6):
@@ -685,35 +761,38 @@ class HistoryProcessor:
         :param month: default is 6 months
         :return: dictionary of counts of new users for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.new_users_range, month, default={"new_user_range": {}}
+            )
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            values = []
-            try:
-                values = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {
-                                              "events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
-                                          {"$group": {"_id": '$sender_id',
-                                                      "latest_event_time": {"$first": "$events.timestamp"}}},
-                                          {"$match": {"latest_event_time": {
-                                              "$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
-
-                                          {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                          {"$project": {"_id": 1, "count": 1}}
-                                          ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            new_users = {d['_id']: d['count'] for d in values}
-            return (
-                {"new_user_range": new_users},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        values = []
+        try:
+            values = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {
+                                          "events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
+                                      {"$group": {"_id": '$sender_id',
+                                                  "latest_event_time": {"$first": "$events.timestamp"}}},
+                                      {"$match": {"latest_event_time": {
+                                          "$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
+
+                                      {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                      {"$project": {"_id": 1, "count": 1}}
+                                      ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        new_users = {d['_id']: d['count'] for d in values}
+        return (
+            {"new_user_range": new_users},
+            message
+        )
 
     @staticmethod
     def successful_conversation_range(collection: Text,
@@ -732,148 +811,146 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            new_session_total, single_session_total = [], []
-            unsuccessful_new_session, unsuccessful_single_session = [], []
-            try:
-                new_session_total = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$match": {"events.name": "action_session_start"}},
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-                                          {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                          ], allowDiskUse=True))
-
-                single_session_total = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$match": {"$or": [{"events.event": "user"},
-                                                              {"events.name": "action_session_start"}]}},
-                                          {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                                          {"$addFields": {"first_event": {"$first": "$events"}}},
-                                          {"$match": {"first_event.event": "user"}},
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$first_event.timestamp", 1000]}}}}},
-                                          {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                          ], allowDiskUse=True))
-
-                unsuccessful_new_session = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$match": {"events.name": {
-                                              "$in": ["action_session_start", fallback_action,
-                                                      nlu_fallback_action]}}},
-                                          {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                                      "allevents": {"$push": "$events"}}},
-                                          {"$unwind": "$events"},
-                                          {"$project": {
-                                              "_id": 1,
-                                              "events": 1,
-                                              "following_events": {
-                                                  "$arrayElemAt": [
-                                                      "$allevents",
-                                                      {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                  ]
-                                              }
-                                          }},
-                                          {"$match": {'$or': [{"events.name": fallback_action},
-                                                              {"events.name": nlu_fallback_action}],
-                                                      "following_events.name": "action_session_start"}},
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-                                          {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-
-                                          ], allowDiskUse=True))
-
-                unsuccessful_single_session = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                          {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                          {"$match": {"events.name": {
-                                              "$in": ["action_session_start", fallback_action,
-                                                      nlu_fallback_action]}}},
-                                          {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                                          {"$addFields": {"last_event": {"$last": "$events"}}},
-                                          {"$match": {'$or': [{"last_event.name": fallback_action},
-                                                              {"last_event.name": nlu_fallback_action}]}},
-                                          {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$last_event.timestamp", 1000]}}}}},
-                                          {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                          ], allowDiskUse=True)
-                    )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            single_session_total = {d['_id']: d['count'] for d in single_session_total}
-            new_session_total = {d['_id']: d['count'] for d in new_session_total}
-            single_session_total = {k: single_session_total.get(k, 0) for k in new_session_total.keys()}
-            total_sessions = {k: single_session_total[k] + new_session_total[k] for k in new_session_total.keys()}
-            unsuccessful_single_session = {d['_id']: d['count'] for d in unsuccessful_single_session}
-            unsuccessful_new_session = {d['_id']: d['count'] for d in unsuccessful_new_session}
-            unsuccessful_single_session = {k: unsuccessful_single_session.get(k, 0) for k in
-                                           unsuccessful_new_session.keys()}
-            total_unsuccessful_sessions = {k: unsuccessful_single_session[k] + unsuccessful_new_session[k] for k in
-                                           unsuccessful_new_session.keys()}
-            successful_sessions = {k: total_sessions[k] - total_unsuccessful_sessions.get(k, 0) for k in
-                                   total_sessions.keys()}
-            return (
-                {"successful_sessions": successful_sessions, "total_sessions": total_sessions},
-                message
-            )
-
-    @staticmethod
-    def user_retention_range(collection: Text, month: int = 6):
-
-        """
-        Computes the trend for user retention percentages
-
-        :param collection: collection to connect to
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        new_session_total, single_session_total = [], []
+        unsuccessful_new_session, unsuccessful_single_session = [], []
+        try:
+            new_session_total = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$match": {"events.name": "action_session_start"}},
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+                                      {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                      ], allowDiskUse=True))
+
+            single_session_total = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$match": {"$or": [{"events.event": "user"},
+                                                          {"events.name": "action_session_start"}]}},
+                                      {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                                      {"$addFields": {"first_event": {"$first": "$events"}}},
+                                      {"$match": {"first_event.event": "user"}},
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$first_event.timestamp", 1000]}}}}},
+                                      {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                      ], allowDiskUse=True))
+
+            unsuccessful_new_session = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$match": {"events.name": {
+                                          "$in": ["action_session_start", fallback_action,
+                                                  nlu_fallback_action]}}},
+                                      {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                                  "allevents": {"$push": "$events"}}},
+                                      {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                      {"$project": {
+                                          "_id": 1,
+                                          "events": 1,
+                                          "following_events": {
+                                              "$arrayElemAt": [
+                                                  "$allevents",
+                                                  {"$add": ["$index", 1]}
+                                              ]
+                                          }
+                                      }},
+                                      {"$match": {'$or': [{"events.name": fallback_action},
+                                                          {"events.name": nlu_fallback_action}],
+                                                  "following_events.name": "action_session_start"}},
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+                                      {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+
+                                      ], allowDiskUse=True))
+
+            unsuccessful_single_session = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                      {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                      {"$match": {"events.name": {
+                                          "$in": ["action_session_start", fallback_action,
+                                                  nlu_fallback_action]}}},
+                                      {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                                      {"$addFields": {"last_event": {"$last": "$events"}}},
+                                      {"$match": {'$or': [{"last_event.name": fallback_action},
+                                                          {"last_event.name": nlu_fallback_action}]}},
+                                      {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$last_event.timestamp", 1000]}}}}},
+                                      {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                      ], allowDiskUse=True)
+                )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        single_session_total = {d['_id']: d['count'] for d in single_session_total}
+        new_session_total = {d['_id']: d['count'] for d in new_session_total}
+        single_session_total = {k: single_session_total.get(k, 0) for k in new_session_total.keys()}
+        total_sessions = {k: single_session_total[k] + new_session_total[k] for k in new_session_total.keys()}
+        unsuccessful_single_session = {d['_id']: d['count'] for d in unsuccessful_single_session}
+        unsuccessful_new_session = {d['_id']: d['count'] for d in unsuccessful_new_session}
+        unsuccessful_single_session = {k: unsuccessful_single_session.get(k, 0) for k in
+                                       unsuccessful_new_session.keys()}
+        total_unsuccessful_sessions = {k: unsuccessful_single_session[k] + unsuccessful_new_session[k] for k in
+                                       unsuccessful_new_session.keys()}
+        successful_sessions = {k: total_sessions[k] - total_unsuccessful_sessions.get(k, 0) for k in
+                               total_sessions.keys()}
+        return (
+            {"successful_sessions": successful_sessions, "total_sessions": total_sessions},
+            message
+        )
+
+    @staticmethod
+    def user_retention_range(collection: Text, month: int = 6):
+
+        """
+        Computes the trend for user retention percentages
+
+        :param collection: collection to connect to
         :param month: default is 6 months
         :return: dictionary of user retention percentages for the previous months
         """
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            repeating_users = []
-            try:
-                total = list(
-                    conversations.aggregate([{"$match": {"latest_event_time": {
-                        "$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
-                        {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                        {"$project": {"_id": 1, "count": 1}}
-                    ]))
-
-                repeating_users = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {
-                                                 "events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
-                                             {"$group": {"_id": '$sender_id', "count": {"$sum": 1},
-                                                         "latest_event_time": {"$first": "$latest_event_time"}}},
-                                             {"$match": {"count": {"$gte": 2}}},
-                                             {"$match": {"latest_event_time": {
-                                                 "$gte": Utility.get_timestamp_previous_month(month)}}},
-                                             {"$addFields": {"month": {
-                                                 "$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
-                                             {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                             {"$project": {"_id": 1, "count": 1}}
-                                             ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            total_users = {d['_id']: d['count'] for d in total}
-            repeat_users = {d['_id']: d['count'] for d in repeating_users}
-            retention = {k: 100 * (repeat_users[k] / total_users[k]) for k in repeat_users.keys()}
-            return (
-                {"retention_range": retention},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        repeating_users = []
+        try:
+            total = list(
+                conversations.aggregate([{"$match": {"latest_event_time": {
+                    "$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
+                    {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                    {"$project": {"_id": 1, "count": 1}}
+                ]))
+
+            repeating_users = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {
+                                             "events.name": {"$regex": ".*session_start*.", "$options": "$i"}}},
+                                         {"$group": {"_id": '$sender_id', "count": {"$sum": 1},
+                                                     "latest_event_time": {"$max": "$latest_event_time"}}},
+                                         {"$match": {"count": {"$gte": 2}}},
+                                         {"$match": {"latest_event_time": {
+                                             "$gte": Utility.get_timestamp_previous_month(month)}}},
+                                         {"$addFields": {"month": {
+                                             "$month": {"$toDate": {"$multiply": ["$latest_event_time", 1000]}}}}},
+                                         {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                         {"$project": {"_id": 1, "count": 1}}
+                                         ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        total_users = {d['_id']: d['count'] for d in total}
+        repeat_users = {d['_id']: d['count'] for d in repeating_users}
+        retention = {k: 100 * (repeat_users[k] / total_users[k]) for k in repeat_users.keys()}
+        return (
+            {"retention_range": retention},
+            message
+        )
 
     @staticmethod
     def fallback_count_range(collection: Text,
@@ -889,49 +966,53 @@ class HistoryProcessor:
         :param nlu_fallback_action: nlu fallback configured for bot
         :return: dictionary of fallback counts for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.fallback_count_range, month, fallback_action, nlu_fallback_action,
+                default={"fallback_count_rate": {}, "total_fallback_count": {}}
+            )
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            action_counts = []
-            fallback_counts = []
-            try:
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        action_counts = []
+        fallback_counts = []
+        try:
 
-                fallback_counts = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events"}},
-                                             {"$match": {"events.event": "action",
-                                                         "events.timestamp": {
-                                                             "$gte": Utility.get_timestamp_previous_month(
-                                                                 month)}}},
-                                             {"$match": {'$or': [{"events.name": fallback_action},
-                                                                 {"events.name": nlu_fallback_action}]}},
-                                             {"$addFields": {"month": {
-                                                 "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-                                             {"$group": {"_id": "$month", "count": {"$sum": 1}}},
-                                             {"$project": {"_id": 1, "count": 1}}
-                                             ]))
-                action_counts = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events"}},
-                                             {"$match": {"$and": [{"events.event": "action"},
-                                             {"events.name": {"$nin": ['action_listen', 'action_session_start']}}]}},
-                                             {"$match": {"events.timestamp": {
-                                              "$gte": Utility.get_timestamp_previous_month(month)}}},
-                                             {"$addFields": {"month": {
-                                              "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-                                             {"$group": {"_id": "$month", "total_count": {"$sum": 1}}},
-                                             {"$project": {"_id": 1, "total_count": 1}}
-                                             ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            action_count = {d['_id']: d['total_count'] for d in action_counts}
-            fallback_count = {d['_id']: d['count'] for d in fallback_counts}
-            final_trend = {k: 100*(fallback_count.get(k)/action_count.get(k)) for k in list(fallback_count.keys())}
-            return (
-                {"fallback_count_rate": final_trend, "total_fallback_count": fallback_count},
-                message
-            )
+            fallback_counts = list(
+                conversations.aggregate([{"$unwind": {"path": "$events"}},
+                                         {"$match": {"events.event": "action",
+                                                     "events.timestamp": {
+                                                         "$gte": Utility.get_timestamp_previous_month(
+                                                             month)}}},
+                                         {"$match": {'$or': [{"events.name": fallback_action},
+                                                             {"events.name": nlu_fallback_action}]}},
+                                         {"$addFields": {"month": {
+                                             "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+                                         {"$group": {"_id": "$month", "count": {"$sum": 1}}},
+                                         {"$project": {"_id": 1, "count": 1}}
+                                         ]))
+            action_counts = list(
+                conversations.aggregate([{"$unwind": {"path": "$events"}},
+                                         {"$match": {"$and": [{"events.event": "action"},
+                                         {"events.name": {"$nin": ['action_listen', 'action_session_start']}}]}},
+                                         {"$match": {"events.timestamp": {
+                                          "$gte": Utility.get_timestamp_previous_month(month)}}},
+                                         {"$addFields": {"month": {
+                                          "$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+                                         {"$group": {"_id": "$month", "total_count": {"$sum": 1}}},
+                                         {"$project": {"_id": 1, "total_count": 1}}
+                                         ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        action_count = {d['_id']: d['total_count'] for d in action_counts}
+        fallback_count = {d['_id']: d['count'] for d in fallback_counts}
+        final_trend = {k: 100*(fallback_count.get(k)/action_count.get(k)) for k in list(fallback_count.keys())}
+        return (
+            {"fallback_count_rate": final_trend, "total_fallback_count": fallback_count},
+            message
+        )
 
     @staticmethod
     def flatten_conversations(collection: Text, month: int = 3, sort_by_date: bool = True):
@@ -946,56 +1027,54 @@ class HistoryProcessor:
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        user_data = []
+        try:
+            senders = conversations.aggregate(
+                [{"$match": {"latest_event_time": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                 {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                 {"$match": {"$or": [{"events.event": {"$in": ['bot', 'user']}},
+                 {"$and": [{"events.event": "action"},
+                 {"events.name": {"$nin": ['action_listen', 'action_session_start']}}]}]}},
+                 {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                 {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}}
+                 ], allowDiskUse=True)
+            for sender in senders:
+                user_data.extend(HistoryProcessor.__flatten_events(sender['_id'], sender['events']))
+            if sort_by_date:
+                user_data.sort(key=lambda conversation: conversation['timestamp'], reverse=True)
+            for conversation in user_data:
+                conversation['timestamp'] = datetime.utcfromtimestamp(
+                    conversation['timestamp']).strftime("%d-%m-%Y %H:%M:%S")
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
             user_data = []
-            try:
 
-                user_data = list(
-                    conversations.aggregate(
-                        [{"$match": {"latest_event_time": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                         {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                         {"$match": {"$or": [{"events.event": {"$in": ['bot', 'user']}},
-                         {"$and": [{"events.event": "action"},
-                         {"events.name": {"$nin": ['action_listen', 'action_session_start']}}]}]}},
-                         {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                         {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                            "allevents": {"$push": "$events"}}},
-                         {"$unwind": "$events"},
-                         {"$match": {"events.event": 'user'}},
-                         {"$group": {"_id": "$_id", "events": {"$push": "$events"}, "user_array":
-                         {"$push": "$events"}, "all_events": {"$first": "$allevents"}}},
-                         {"$unwind": "$events"},
-                         {"$project": {"user_input": "$events.text", "intent": "$events.parse_data.intent.name",
-                            "message_id": "$events.message_id",
-                            "timestamp": "$events.timestamp",
-                            "confidence": "$events.parse_data.intent.confidence",
-                            "action_bot_array": {
-                            "$cond": [{"$gte": [{"$indexOfArray": ["$all_events", {"$arrayElemAt":
-                            ["$user_array", {"$add": [{"$indexOfArray": ["$user_array","$events"]}, 1]}]}]},
-                         {"$indexOfArray": ["$all_events", "$events"]}]},
-                         {"$slice": ["$all_events", {"$add": [{"$indexOfArray":["$all_events", "$events"]}, 1]},
-                         {"$subtract": [{"$subtract": [{"$indexOfArray": ["$all_events", {"$arrayElemAt":
-                            ["$user_array", {"$add": [{"$indexOfArray": ["$user_array", "$events"]}, 1]}]}]},
-                         {"$indexOfArray": ["$all_events", "$events"]}]}, 1]}]}, {"$slice": ["$all_events",
-                         {"$add": [{"$indexOfArray": ["$all_events", "$events"]}, 1]}, 100]}]}}},
-                         {"$addFields": {"t_stamp": {"$toDate": {"$multiply": ["$timestamp", 1000]}}}},
-                         {"$project": {"user_input": 1, "intent": 1, "confidence": 1, "action": "$action_bot_array.name"
-                          , "timestamp": "$t_stamp", "bot_response": "$action_bot_array.text", "sort": {
-                             "$cond": {"if": sort_by_date, "then": "$t_stamp", "else": "_id"}}}},
-                         {"$sort": {"sort": -1}},
-                         {"$project": {"user_input": 1, "intent": 1, "confidence": 1, "action": 1,
-                                       "timestamp": {'$dateToString': {'format': "%d-%m-%Y %H:%M:%S", 'date': '$timestamp'}}, "bot_response": 1}}
-                         ], allowDiskUse=True))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-
-            return (
-                {"conversation_data": user_data},
-                message
-            )
+        return (
+            {"conversation_data": user_data},
+            message
+        )
+
+    @staticmethod
+    def __flatten_events(sender_id: Text, events: list):
+        """
+        Pairs each user message with the actions and bot responses that follow it, up to the next user message.
+        Events following the last user message are capped at 100.
+        """
+        user_indexes = [index for index, event in enumerate(events) if event.get('event') == 'user']
+        for position, index in enumerate(user_indexes):
+            end = user_indexes[position + 1] if position + 1 < len(user_indexes) else index + 101
+            following = events[index + 1:end]
+            event = events[index]
+            intent = (event.get('parse_data') or {}).get('intent') or {}
+            conversation = {"_id": sender_id, "user_input": event.get('text'), "intent": intent.get('name'),
+                            "confidence": intent.get('confidence'),
+                            "action": [e['name'] for e in following if e.get('name') is not None],
+                            "timestamp": event['timestamp'],
+                            "bot_response": [e['text'] for e in following if e.get('text') is not None]}
+            yield {key: value for key, value in conversation.items() if value is not None}
 
     @staticmethod
     def total_conversation_range(collection: Text, month: int = 6):
@@ -1007,33 +1086,36 @@ class HistoryProcessor:
         :param month: default is 6 months
         :return: dictionary of counts of bot conversations for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.total_conversation_range, month, default={"total_conversation_range": {}}
+            )
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            try:
-                total = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-
-                        {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
-                        {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
-                        {"$project": {"_id": 1, "count": 1}}
-                    ]))
-
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            total_users = {d['_id']: d['count'] for d in total}
-            return (
-                {"total_conversation_range": total_users},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        try:
+            total = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+
+                    {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
+                    {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
+                    {"$project": {"_id": 1, "count": 1}}
+                ]))
+
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        total_users = {d['_id']: d['count'] for d in total}
+        return (
+            {"total_conversation_range": total_users},
+            message
+        )
 
     @staticmethod
     def top_n_intents(collection: Text, month: int = 1, top_n: int = 10):
@@ -1046,26 +1128,27 @@ class HistoryProcessor:
         :param top_n: The first n number of most occurring intents
         :return: list of intents and their counts
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(collection, MetricRollup.top_n_intents, month, top_n)
         client, message = HistoryProcessor.get_mongo_connection()
-        with client as client:
-            try:
-                db = client.get_database()
-                conversations = db.get_collection(collection)
-                values = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$project": {"intent": "$events.parse_data.intent.name", "_id": 0}},
-                        {"$group": {"_id": "$intent", "count": {"$sum": 1}}},
-                        {"$match": {"_id": {"$ne": None}}},
-                        {"$sort": {"count": -1}},
-                        {"$limit": top_n}
-                    ]))
-
-                return values, message
-            except Exception as e:
-                logger.error(e)
-                raise AppException(e)
+        try:
+            db = client.get_database()
+            conversations = ConversationArchive.get_collection(db, collection)
+            values = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$project": {"intent": "$events.parse_data.intent.name", "_id": 0}},
+                    {"$group": {"_id": "$intent", "count": {"$sum": 1}}},
+                    {"$match": {"_id": {"$ne": None}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": top_n}
+                ]))
+
+            return values, message
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
 
     @staticmethod
     def top_n_actions(collection: Text, month: int = 1, top_n: int = 10):
@@ -1078,27 +1161,28 @@ class HistoryProcessor:
         :param top_n: The first n number of most occurring actions
         :return: list of actions and their counts
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(collection, MetricRollup.top_n_actions, month, top_n)
         client, message = HistoryProcessor.get_mongo_connection()
-        with client as client:
-            try:
-                db = client.get_database()
-                conversations = db.get_collection(collection)
-                values = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$match": {"events.event": "action"}},
-                        {"$match": {"events.name": {"$nin": ['action_listen', 'action_session_start']}}},
-                        {"$project": {"action": "$events.name", "_id": 0}},
-                        {"$group": {"_id": "$action", "count": {"$sum": 1}}},
-                        {"$sort": {"count": -1}},
-                        {"$limit": top_n}
-                      ]))
-
-                return values, message
-            except Exception as e:
-                logger.error(e)
-                raise AppException(e)
+        try:
+            db = client.get_database()
+            conversations = ConversationArchive.get_collection(db, collection)
+            values = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$match": {"events.event": "action"}},
+                    {"$match": {"events.name": {"$nin": ['action_listen', 'action_session_start']}}},
+                    {"$project": {"action": "$events.name", "_id": 0}},
+                    {"$group": {"_id": "$action", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": top_n}
+                  ]))
+
+            return values, message
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
 
     @staticmethod
     def average_conversation_step_range(collection: Text, month: int = 6):
@@ -1110,63 +1194,67 @@ class HistoryProcessor:
         :param month: default is 6 months
         :return: dictionary of counts of average conversation step for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.average_conversation_step_range, month,
+                default={"average_conversation_steps": {}, "total_conversation_steps": {}}
+            )
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            steps = []
-            try:
-                steps = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                         {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                                     "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                         {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                                     "allevents": {"$push": "$events"}}},
-                                         {"$unwind": "$events"},
-                                         {"$project": {
-                                             "_id": 1,
-                                             "events": 1,
-                                             "following_events": {
-                                                 "$arrayElemAt": [
-                                                     "$allevents",
-                                                     {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                 ]
-                                             }
-                                         }},
-                                         {"$project": {
-                                             "timestamp": "$events.timestamp",
-                                             "user_event": "$events.event",
-                                             "bot_event": "$following_events.event",
-                                         }},
-                                         {"$match": {"user_event": "user", "bot_event": "bot"}},
-                                         {"$addFields": {
-                                             "month": {"$month": {"$toDate": {"$multiply": ["$timestamp", 1000]}}}}},
-                                         {"$group": {"_id": "$month", "event": {"$sum": 1}}}
-                                         ], allowDiskUse=True)
-                             )
-
-                total = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-
-                        {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
-                        {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
-                        {"$project": {"_id": 1, "count": 1}}
-                    ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            conv_steps = {d['_id']: d['event'] for d in steps}
-            user_count = {d['_id']: d['count'] for d in total}
-            conv_steps = {k: conv_steps.get(k, 0) for k in user_count.keys()}
-            avg_conv_steps = {k: conv_steps[k] / user_count[k] for k in user_count.keys()}
-            return (
-                {"average_conversation_steps": avg_conv_steps, "total_conversation_steps": conv_steps},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        steps = []
+        try:
+            steps = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                     {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                                 "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                     {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                                 "allevents": {"$push": "$events"}}},
+                                     {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                     {"$project": {
+                                         "_id": 1,
+                                         "events": 1,
+                                         "following_events": {
+                                             "$arrayElemAt": [
+                                                 "$allevents",
+                                                 {"$add": ["$index", 1]}
+                                             ]
+                                         }
+                                     }},
+                                     {"$project": {
+                                         "timestamp": "$events.timestamp",
+                                         "user_event": "$events.event",
+                                         "bot_event": "$following_events.event",
+                                     }},
+                                     {"$match": {"user_event": "user", "bot_event": "bot"}},
+                                     {"$addFields": {
+                                         "month": {"$month": {"$toDate": {"$multiply": ["$timestamp", 1000]}}}}},
+                                     {"$group": {"_id": "$month", "event": {"$sum": 1}}}
+                                     ], allowDiskUse=True)
+                         )
+
+            total = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+
+                    {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
+                    {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
+                    {"$project": {"_id": 1, "count": 1}}
+                ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        conv_steps = {d['_id']: d['event'] for d in steps}
+        user_count = {d['_id']: d['count'] for d in total}
+        conv_steps = {k: conv_steps.get(k, 0) for k in user_count.keys()}
+        avg_conv_steps = {k: conv_steps[k] / user_count[k] for k in user_count.keys()}
+        return (
+            {"average_conversation_steps": avg_conv_steps, "total_conversation_steps": conv_steps},
+            message
+        )
 
     @staticmethod
     def word_cloud(collection: Text, u_bound=1, l_bound=0, stopword_list=None, month=1):
@@ -1186,40 +1274,39 @@ class HistoryProcessor:
         if stopword_list is None:
             stopword_list = []
         client, message = HistoryProcessor.get_mongo_connection()
-        with client as client:
-            try:
-                db = client.get_database()
-                conversations = db.get_collection(collection)
-                word_list = list(conversations.aggregate(
-                    [{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                     {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                     {"$match": {"events.event": 'user'}},
-                     {"$project": {"user_input": "$events.text", "_id": 0}},
-                     {"$group": {"_id": None, "input": {"$push": "$user_input"}}},
-                     {"$project": {"input": 1, "_id": 0}}
-                     ], allowDiskUse=True))
-
-                if word_list:
-                    if u_bound < l_bound:
-                        raise AppException("Upper bound cannot be lesser than lower bound")
-                    unique_string = (" ").join(word_list[0]['input']).lower()
-                    unique_string = unique_string.replace('?', '')
-                    wordlist = unique_string.split()
-                    stops = set(stopwords.words('english'))
-                    stops.update(stopword_list)
-                    wordlist = [word for word in wordlist if word not in stops]
-                    freq_dict = Utility.word_list_to_frequency(wordlist)
-                    sorted_dict = Utility.sort_frequency_dict(freq_dict)
-                    upper_bound, lower_bound = round((1 - u_bound) * len(sorted_dict)), round((1 - l_bound) * len(sorted_dict))
-                    filtered_words = [word[1] for word in sorted_dict[upper_bound:lower_bound]]
-                    word_cloud_string = (" ").join([word for word in wordlist if word in filtered_words])
-                    return word_cloud_string, message
-                else:
-                    return "", message
+        try:
+            db = client.get_database()
+            conversations = ConversationArchive.get_collection(db, collection)
+            word_list = list(conversations.aggregate(
+                [{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                 {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                 {"$match": {"events.event": 'user'}},
+                 {"$project": {"user_input": "$events.text", "_id": 0}},
+                 {"$group": {"_id": None, "input": {"$push": "$user_input"}}},
+                 {"$project": {"input": 1, "_id": 0}}
+                 ], allowDiskUse=True))
+
+            if word_list:
+                if u_bound < l_bound:
+                    raise AppException("Upper bound cannot be lesser than lower bound")
+                unique_string = (" ").join(word_list[0]['input']).lower()
+                unique_string = unique_string.replace('?', '')
+                wordlist = unique_string.split()
+                stops = set(stopwords.words('english'))
+                stops.update(stopword_list)
+                wordlist = [word for word in wordlist if word not in stops]
+                freq_dict = Utility.word_list_to_frequency(wordlist)
+                sorted_dict = Utility.sort_frequency_dict(freq_dict)
+                upper_bound, lower_bound = round((1 - u_bound) * len(sorted_dict)), round((1 - l_bound) * len(sorted_dict))
+                filtered_words = [word[1] for word in sorted_dict[upper_bound:lower_bound]]
+                word_cloud_string = (" ").join([word for word in wordlist if word in filtered_words])
+                return word_cloud_string, message
+            else:
+                return "", message
 
-            except Exception as e:
-                logger.error(e)
-                raise AppException(e)
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
 
     @staticmethod
     def user_input_count(collection: Text, month: int = 6):
@@ -1234,25 +1321,24 @@ class HistoryProcessor:
 
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            user_input = []
-            try:
-                user_input = list(conversations.aggregate(
-                    [{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                     {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                     {"$match": {"events.event": 'user'}},
-                     {"$project": {"user_input": {"$toLower": "$events.text"}, "_id": 0}},
-                     {"$group": {"_id": "$user_input", "count": {"$sum": 1}}},
-                     {"$sort": {"count": -1}}
-                     ], allowDiskUse=True))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            return (
-                user_input, message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        user_input = []
+        try:
+            user_input = list(conversations.aggregate(
+                [{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                 {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                 {"$match": {"events.event": 'user'}},
+                 {"$project": {"user_input": {"$toLower": "$events.text"}, "_id": 0}},
+                 {"$group": {"_id": "$user_input", "count": {"$sum": 1}}},
+                 {"$sort": {"count": -1}}
+                 ], allowDiskUse=True))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        return (
+            user_input, message
+        )
 
     @staticmethod
     def average_conversation_time_range(collection: Text, month: int = 6):
@@ -1264,65 +1350,68 @@ class HistoryProcessor:
         :param month: default is 6 months
         :return: dictionary of counts of average conversation time for the previous months
         """
+        if MetricRollup.is_enabled():
+            return HistoryProcessor.__query_rollup(
+                collection, MetricRollup.average_conversation_time_range, month, default={"Conversation_time_range": {}}
+            )
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            total = []
-            time = []
-            try:
-                time = list(conversations.aggregate([{"$unwind": "$events"},
-                             {"$match": {"events.event": {"$in": ["user", "bot"]},
-                                         "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                             {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                         "allevents": {"$push": "$events"}}},
-                             {"$unwind": "$events"},
-                             {"$project": {
-                                 "_id": 1,
-                                 "events": 1,
-                                 "following_events": {
-                                     "$arrayElemAt": [
-                                         "$allevents",
-                                         {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                     ]
-                                 }
-                             }},
-                             {"$project": {
-                                 "timestamp": "$events.timestamp",
-                                 "user_event": "$events.event",
-                                 "bot_event": "$following_events.event",
-                                 "time_diff": {
-                                     "$subtract": ["$following_events.timestamp", "$events.timestamp"]
-                                 }
-                             }},
-                             {"$match": {"user_event": "user", "bot_event": "bot"}},
-                           {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$timestamp", 1000]}}}}},
-                            {"$group": {"_id": "$month", "time": {"$sum": "$time_diff"}}}
-                             ], allowDiskUse=True)
-                 )
-
-                total = list(
-                    conversations.aggregate([
-                        {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                        {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                        {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
-
-                        {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
-                        {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
-                        {"$project": {"_id": 1, "count": 1}}
-                    ]))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            conv_time = {d['_id']: d['time'] for d in time}
-            user_count = {d['_id']: d['count'] for d in total}
-            conv_time = {k: conv_time.get(k, 0) for k in user_count.keys()}
-            avg_conv_time = {k: conv_time[k] / user_count[k] for k in user_count.keys()}
-            return (
-                {"Conversation_time_range": avg_conv_time},
-                message
-            )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        total = []
+        time = []
+        try:
+            time = list(conversations.aggregate([{"$unwind": "$events"},
+                         {"$match": {"events.event": {"$in": ["user", "bot"]},
+                                     "events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                         {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                     "allevents": {"$push": "$events"}}},
+                         {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                         {"$project": {
+                             "_id": 1,
+                             "events": 1,
+                             "following_events": {
+                                 "$arrayElemAt": [
+                                     "$allevents",
+                                     {"$add": ["$index", 1]}
+                                 ]
+                             }
+                         }},
+                         {"$project": {
+                             "timestamp": "$events.timestamp",
+                             "user_event": "$events.event",
+                             "bot_event": "$following_events.event",
+                             "time_diff": {
+                                 "$subtract": ["$following_events.timestamp", "$events.timestamp"]
+                             }
+                         }},
+                         {"$match": {"user_event": "user", "bot_event": "bot"}},
+                       {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$timestamp", 1000]}}}}},
+                        {"$group": {"_id": "$month", "time": {"$sum": "$time_diff"}}}
+                         ], allowDiskUse=True)
+             )
+
+            total = list(
+                conversations.aggregate([
+                    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                    {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                    {"$addFields": {"month": {"$month": {"$toDate": {"$multiply": ["$events.timestamp", 1000]}}}}},
+
+                    {"$group": {"_id": {"month": "$month", "sender_id": "$sender_id"}}},
+                    {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}},
+                    {"$project": {"_id": 1, "count": 1}}
+                ]))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        conv_time = {d['_id']: d['time'] for d in time}
+        user_count = {d['_id']: d['count'] for d in total}
+        conv_time = {k: conv_time.get(k, 0) for k in user_count.keys()}
+        avg_conv_time = {k: conv_time[k] / user_count[k] for k in user_count.keys()}
+        return (
+            {"Conversation_time_range": avg_conv_time},
+            message
+        )
 
     @staticmethod
     def user_fallback_dropoff(collection: Text, month: int = 6,
@@ -1340,68 +1429,67 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            new_session, single_session = [], []
-            try:
-                new_session = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {"events.timestamp": {
-                                                 "$gte": Utility.get_timestamp_previous_month(month)},
-                                                         "events.name": {"$ne": "action_listen"},
-                                                         "events.event": {
-                                                             "$nin": ["session_started", "restart", "bot"]}}},
-                                             {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                                         "allevents": {"$push": "$events"}}},
-                                             {"$unwind": "$events"},
-                                             {"$project": {
-                                                 "_id": 1,
-                                                 "events": 1,
-                                                 "following_events": {
-                                                     "$arrayElemAt": [
-                                                         "$allevents",
-                                                         {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                     ]
-                                                 }
-                                             }},
-                                             {"$match": {'$or': [{"events.name": fallback_action},
-                                                                 {"events.name": nlu_fallback_action}],
-                                                         "following_events.name": "action_session_start"}},
-                                             {"$group": {"_id": "$_id", "count": {"$sum": 1}}},
-                                             {"$sort": {"count": -1}}
-                                             ], allowDiskUse=True)
-                )
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        new_session, single_session = [], []
+        try:
+            new_session = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {"events.timestamp": {
+                                             "$gte": Utility.get_timestamp_previous_month(month)},
+                                                     "events.name": {"$ne": "action_listen"},
+                                                     "events.event": {
+                                                         "$nin": ["session_started", "restart", "bot"]}}},
+                                         {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                                     "allevents": {"$push": "$events"}}},
+                                         {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                         {"$project": {
+                                             "_id": 1,
+                                             "events": 1,
+                                             "following_events": {
+                                                 "$arrayElemAt": [
+                                                     "$allevents",
+                                                     {"$add": ["$index", 1]}
+                                                 ]
+                                             }
+                                         }},
+                                         {"$match": {'$or': [{"events.name": fallback_action},
+                                                             {"events.name": nlu_fallback_action}],
+                                                     "following_events.name": "action_session_start"}},
+                                         {"$group": {"_id": "$_id", "count": {"$sum": 1}}},
+                                         {"$sort": {"count": -1}}
+                                         ], allowDiskUse=True)
+            )
 
-                single_session = list(
-                    conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                             {"$match": {"events.timestamp": {
-                                                 "$gte": Utility.get_timestamp_previous_month(month)},
-                                                         "events.name": {"$ne": "action_listen"},
-                                                         "events.event": {
-                                                             "$nin": ["session_started", "restart", "bot"]}}},
-                                             {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                                             {"$addFields": {"last_event": {"$last": "$events"}}},
-                                             {"$match": {'$or': [{"last_event.name": fallback_action},
-                                                                 {"last_event.name": nlu_fallback_action}]}},
-                                             {"$addFields": {"count": 1}},
-                                             {"$project": {"_id": 1, "count": 1}}
-                                             ], allowDiskUse=True)
-                )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            new_session = {d['_id']: d['count'] for d in new_session}
-            single_session = {d['_id']: d['count'] for d in single_session}
-            for record in single_session:
-                if record in new_session:
-                    new_session[record] = new_session[record] + 1
-                else:
-                    new_session[record] = single_session[record]
-            return (
-                {"Dropoff_list": new_session},
-                message
+            single_session = list(
+                conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                         {"$match": {"events.timestamp": {
+                                             "$gte": Utility.get_timestamp_previous_month(month)},
+                                                     "events.name": {"$ne": "action_listen"},
+                                                     "events.event": {
+                                                         "$nin": ["session_started", "restart", "bot"]}}},
+                                         {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                                         {"$addFields": {"last_event": {"$last": "$events"}}},
+                                         {"$match": {'$or': [{"last_event.name": fallback_action},
+                                                             {"last_event.name": nlu_fallback_action}]}},
+                                         {"$addFields": {"count": 1}},
+                                         {"$project": {"_id": 1, "count": 1}}
+                                         ], allowDiskUse=True)
             )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        new_session = {d['_id']: d['count'] for d in new_session}
+        single_session = {d['_id']: d['count'] for d in single_session}
+        for record in single_session:
+            if record in new_session:
+                new_session[record] = new_session[record] + 1
+            else:
+                new_session[record] = single_session[record]
+        return (
+            {"Dropoff_list": new_session},
+            message
+        )
 
     @staticmethod
     def intents_before_dropoff(collection: Text, month: int = 6):
@@ -1415,67 +1503,66 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            new_session_dict, single_session_dict = {}, {}
-            try:
-                new_session_list = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                   {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                   {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
-                                   {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                                      "allevents": {"$push": "$events"}}},
-                                   {"$unwind": "$events"},
-                                      {"$project": {
-                                          "_id": 1,
-                                          "events": 1,
-                                          "following_events": {
-                                              "$arrayElemAt": [
-                                                  "$allevents",
-                                                  {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                              ]
-                                          }
-                                      }},
-                                   {"$match": {"following_events.name": "action_session_start"}},
-                                   {"$project": {"_id": 1, "intent": "$events.parse_data.intent.name"}},
-                                {"$group": {"_id": {"sender_id": "$_id", "intent": "$intent"}, "count": {"$sum": 1}}},
-                                {"$project": {"_id": "$_id.sender_id", "intent": "$_id.intent", "count": 1}}
-                                          ], allowDiskUse=True))
-
-                for record in new_session_list:
-                    if not record["_id"] in new_session_dict:
-                        new_session_dict[record["_id"]] = {record["intent"]: record["count"]}
-                    else:
-                        new_session_dict[record["_id"]][record["intent"]] = record["count"]
-
-                single_session_list = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                           {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                           {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
-                                           {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                                           {"$addFields": {"last_event": {"$last": "$events"}}},
-                                           {"$match": {"last_event.event": "user"}},
-                                           {"$project": {"_id": 1, "intent": "$last_event.parse_data.intent.name"}},
-                                           {"$addFields": {"count": 1}}], allowDiskUse=True))
-
-                single_session_dict = {record["_id"]: {record["intent"]: record["count"]} for record in single_session_list}
-
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-
-            for record in single_session_dict:
-                if record in new_session_dict:
-                    if list(single_session_dict[record].keys())[0] in new_session_dict[record]:
-                        new_session_dict[record][list(single_session_dict[record].keys())[0]] = new_session_dict[record][list(single_session_dict[record].keys())[0]] + 1
-                    else:
-                        new_session_dict[record][list(single_session_dict[record].keys())[0]] = single_session_dict[record][list(single_session_dict[record].keys())[0]]
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        new_session_dict, single_session_dict = {}, {}
+        try:
+            new_session_list = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                               {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                               {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
+                               {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                                  "allevents": {"$push": "$events"}}},
+                               {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                  {"$project": {
+                                      "_id": 1,
+                                      "events": 1,
+                                      "following_events": {
+                                          "$arrayElemAt": [
+                                              "$allevents",
+                                              {"$add": ["$index", 1]}
+                                          ]
+                                      }
+                                  }},
+                               {"$match": {"following_events.name": "action_session_start"}},
+                               {"$project": {"_id": 1, "intent": "$events.parse_data.intent.name"}},
+                            {"$group": {"_id": {"sender_id": "$_id", "intent": "$intent"}, "count": {"$sum": 1}}},
+                            {"$project": {"_id": "$_id.sender_id", "intent": "$_id.intent", "count": 1}}
+                                      ], allowDiskUse=True))
+
+            for record in new_session_list:
+                if not record["_id"] in new_session_dict:
+                    new_session_dict[record["_id"]] = {record["intent"]: record["count"]}
                 else:
-                    new_session_dict[record] = single_session_dict[record]
+                    new_session_dict[record["_id"]][record["intent"]] = record["count"]
 
-            return (
-                new_session_dict,
-                message
-            )
+            single_session_list = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                       {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                       {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
+                                       {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                                       {"$addFields": {"last_event": {"$last": "$events"}}},
+                                       {"$match": {"last_event.event": "user"}},
+                                       {"$project": {"_id": 1, "intent": "$last_event.parse_data.intent.name"}},
+                                       {"$addFields": {"count": 1}}], allowDiskUse=True))
+
+            single_session_dict = {record["_id"]: {record["intent"]: record["count"]} for record in single_session_list}
+
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+
+        for record in single_session_dict:
+            if record in new_session_dict:
+                if list(single_session_dict[record].keys())[0] in new_session_dict[record]:
+                    new_session_dict[record][list(single_session_dict[record].keys())[0]] = new_session_dict[record][list(single_session_dict[record].keys())[0]] + 1
+                else:
+                    new_session_dict[record][list(single_session_dict[record].keys())[0]] = single_session_dict[record][list(single_session_dict[record].keys())[0]]
+            else:
+                new_session_dict[record] = single_session_dict[record]
+
+        return (
+            new_session_dict,
+            message
+        )
 
     @staticmethod
     def unsuccessful_session(collection: Text, month: int = 6,
@@ -1493,60 +1580,59 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
-            db = client.get_database()
-            conversations = db.get_collection(collection)
-            new_session, single_session = [], []
-            try:
-                new_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                           {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                           {"$match": {"events.name": {"$in": ["action_session_start", fallback_action, nlu_fallback_action]}}},
-                                           {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
-                                                         "allevents": {"$push": "$events"}}},
-                                             {"$unwind": "$events"},
-                                             {"$project": {
-                                                 "_id": 1,
-                                                 "events": 1,
-                                                 "following_events": {
-                                                     "$arrayElemAt": [
-                                                         "$allevents",
-                                                         {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}
-                                                     ]
-                                                 }
-                                             }},
-                                           {"$match": {'$or': [{"events.name": fallback_action},
-                                                                 {"events.name": nlu_fallback_action}],
-                                                         "following_events.name": "action_session_start"}},
-                                             {"$group": {"_id": "$_id", "count": {"$sum": 1}}},
-                                             {"$sort": {"count": -1}}
-
-                          ], allowDiskUse=True))
-
-                single_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                           {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                           {"$match": {"events.name": {"$in": ["action_session_start", fallback_action, nlu_fallback_action]}}},
-                           {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                           {"$addFields": {"last_event": {"$last": "$events"}}},
-                           {"$match": {'$or': [{"last_event.name": fallback_action},
-                                             {"last_event.name": nlu_fallback_action}]}},
-                           {"$addFields": {"count": 1}},
-                           {"$project": {"_id": 1, "count": 1}}
-                                             ], allowDiskUse=True)
-                )
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            new_session = {d['_id']: d['count'] for d in new_session}
-            single_session = {d['_id']: d['count'] for d in single_session}
-            for record in single_session:
-                if record in new_session:
-                    new_session[record] = new_session[record] + 1
-                else:
-                    new_session[record] = single_session[record]
-            return (
-                new_session,
-                message
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        new_session, single_session = [], []
+        try:
+            new_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                       {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                       {"$match": {"events.name": {"$in": ["action_session_start", fallback_action, nlu_fallback_action]}}},
+                                       {"$group": {"_id": "$sender_id", "events": {"$push": "$events"},
+                                                     "allevents": {"$push": "$events"}}},
+                                         {"$unwind": {"path": "$events", "includeArrayIndex": "index"}},
+                                         {"$project": {
+                                             "_id": 1,
+                                             "events": 1,
+                                             "following_events": {
+                                                 "$arrayElemAt": [
+                                                     "$allevents",
+                                                     {"$add": ["$index", 1]}
+                                                 ]
+                                             }
+                                         }},
+                                       {"$match": {'$or': [{"events.name": fallback_action},
+                                                             {"events.name": nlu_fallback_action}],
+                                                     "following_events.name": "action_session_start"}},
+                                         {"$group": {"_id": "$_id", "count": {"$sum": 1}}},
+                                         {"$sort": {"count": -1}}
+
+                      ], allowDiskUse=True))
+
+            single_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                       {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                       {"$match": {"events.name": {"$in": ["action_session_start", fallback_action, nlu_fallback_action]}}},
+                       {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                       {"$addFields": {"last_event": {"$last": "$events"}}},
+                       {"$match": {'$or': [{"last_event.name": fallback_action},
+                                         {"last_event.name": nlu_fallback_action}]}},
+                       {"$addFields": {"count": 1}},
+                       {"$project": {"_id": 1, "count": 1}}
+                                         ], allowDiskUse=True)
             )
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        new_session = {d['_id']: d['count'] for d in new_session}
+        single_session = {d['_id']: d['count'] for d in single_session}
+        for record in single_session:
+            if record in new_session:
+                new_session[record] = new_session[record] + 1
+            else:
+                new_session[record] = single_session[record]
+        return (
+            new_session,
+            message
+        )
 
     @staticmethod
     def session_count(collection: Text, month: int = 6):
@@ -1560,36 +1646,219 @@ class HistoryProcessor:
         """
         client, message = HistoryProcessor.get_mongo_connection()
         message = ' '.join([message, f', collection: {collection}'])
-        with client as client:
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        new_session, single_session = [], []
+        try:
+            new_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                               {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                               {"$match": {"events.name": "action_session_start"}},
+                               {"$group": {"_id": "$sender_id", "count": {"$sum": 1}}}
+                                      ], allowDiskUse=True))
+
+            single_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+                                       {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
+                                       {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
+                                       {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
+                                       {"$addFields": {"first_event": {"$first": "$events"}}},
+                                       {"$match": {"first_event.event": "user"}},
+                                       {"$project": {"_id": 1}},
+                                       {"$addFields": {"count": 1}}], allowDiskUse=True))
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+        new_session = {d['_id']: d['count'] for d in new_session}
+        single_session = {d['_id']: d['count'] for d in single_session}
+        for record in single_session:
+            if record in new_session:
+                new_session[record] = new_session[record] + 1
+            else:
+                new_session[record] = single_session[record]
+        return (
+            new_session,
+            message
+        )
+
+    @staticmethod
+    def dashboard(collection: Text,
+                  month: int = 1,
+                  conversation_limit: int = 10,
+                  fallback_action: str = 'action_default_fallback',
+                  nlu_fallback_action: str = 'nlu_fallback'):
+
+        """
+        Computes fallback, conversation steps and time, engaged and new users,
+        successful conversations and user retention in a single scan of the trackers.
+        Each metric has the same shape as returned by its individual method.
+        When rollups are enabled, fallback, engaged and new users are answered from rollups instead.
+
+        :param collection: collection to connect to
+        :param month: default is current month and max is last 6 months
+        :param conversation_limit: conversation step number to determine engaged users
+        :param fallback_action: fallback action configured for bot
+        :param nlu_fallback_action: nlu fallback configured for bot
+        :return: dictionary of metrics
+        """
+        client, message = HistoryProcessor.get_mongo_connection()
+        message = ' '.join([message, f', collection: {collection}'])
+        db = client.get_database()
+        conversations = ConversationArchive.get_collection(db, collection)
+        cutoff = Utility.get_timestamp_previous_month(month)
+        default_actions = set(Utility.load_default_actions())
+        fallback_actions = [fallback_action, nlu_fallback_action]
+        session_start = re.compile(".*session_start*.", re.IGNORECASE)
+        rollup = MetricRollup.is_enabled()
+        senders = {}
+        fallback_count, total_count, recent_trackers = 0, 0, 0
+        try:
+            trackers = conversations.aggregate([
+                {"$project": {"sender_id": 1, "latest_event_time": 1, "events.event": 1, "events.name": 1,
+                              "events.timestamp": 1}}
+            ], allowDiskUse=True)
+            for tracker in trackers:
+                latest_event_time = tracker.get('latest_event_time')
+                if latest_event_time is not None and latest_event_time >= cutoff:
+                    recent_trackers += 1
+                sender = senders.setdefault(tracker.get('sender_id'), {
+                    "last_event": None, "last_timestamp": None, "steps": 0, "time": 0, "active": False,
+                    "fallback": False, "sessions": 0, "first_session": None, "latest_event_time": None
+                })
+                for event in tracker.get('events') or []:
+                    timestamp = event.get('timestamp')
+                    name = event.get('name')
+                    if isinstance(name, str) and session_start.search(name):
+                        if not rollup and not sender['sessions']:
+                            sender['first_session'] = timestamp
+                        if latest_event_time is not None:
+                            sender['latest_event_time'] = max(sender['latest_event_time'] or latest_event_time,
+                                                              latest_event_time)
+                        sender['sessions'] += 1
+                    if timestamp is None or timestamp < cutoff:
+                        continue
+                    sender['active'] = True
+                    if name in fallback_actions:
+                        sender['fallback'] = True
+                    event_type = event.get('event')
+                    if event_type in ['user', 'bot']:
+                        if event_type == 'bot' and sender['last_event'] == 'user':
+                            sender['steps'] += 1
+                            sender['time'] += timestamp - sender['last_timestamp']
+                        sender['last_event'], sender['last_timestamp'] = event_type, timestamp
+                    elif event_type == 'action' and not rollup and name not in default_actions:
+                        total_count += 1
+                        if name in fallback_actions:
+                            fallback_count += 1
+        except Exception as e:
+            logger.error(e)
+            message = '\n'.join([message, str(e)])
+            senders, fallback_count, total_count, recent_trackers = {}, 0, 0, 0
+
+        stepped = [(sender_id, sender) for sender_id, sender in senders.items() if sender['steps']]
+        active = sum(1 for sender in senders.values() if sender['active'])
+        active_fallback = sum(1 for sender in senders.values() if sender['active'] and sender['fallback'])
+        repeating = sum(1 for sender in senders.values() if sender['sessions'] >= 2 and
+                        sender['latest_event_time'] is not None and sender['latest_event_time'] >= cutoff)
+        if rollup:
+            fallback, _ = HistoryProcessor.visitor_hit_fallback(collection, month, fallback_action, nlu_fallback_action)
+            engaged_users, _ = HistoryProcessor.engaged_users(collection, month, conversation_limit)
+            new_users, _ = HistoryProcessor.new_users(collection, month)
+        else:
+            fallback = {"fallback_count": fallback_count, "total_count": total_count if fallback_count else 0}
+            engaged_users = {"engaged_users": sum(1 for _, sender in stepped if sender['steps'] >= conversation_limit)}
+            new_users = {"new_users": sum(1 for sender in senders.values()
+                                          if sender['first_session'] is not None and sender['first_session'] >= cutoff)}
+        metrics = {
+            "fallback": fallback,
+            "conversation_steps": [{"event": sender['steps'], "sender_id": sender_id} for sender_id, sender in stepped],
+            "conversation_time": [{"time": sender['time'], "sender_id": sender_id} for sender_id, sender in stepped],
+            "engaged_users": engaged_users,
+            "new_users": new_users,
+            "successful_conversations": {"successful_conversations": active - active_fallback, "total": active},
+            "user_retention": {"user_retention": 100 * (repeating / (recent_trackers or 1))}
+        }
+        return metrics, message
+
+    @staticmethod
+    def archive_conversations(collection: Text):
+
+        """
+        Moves conversation events older than the configured horizon to the archive collection.
+
+        :param collection: collection to connect to
+        :return: number of senders and events archived
+        """
+        client, message = HistoryProcessor.get_mongo_connection()
+        message = ' '.join([message, f', collection: {collection}'])
+        try:
             db = client.get_database()
-            conversations = db.get_collection(collection)
-            new_session, single_session = [], []
+            return ConversationArchive.compact(db, collection), message
+        except ServerSelectionTimeoutError as e:
+            logger.error(e)
+            raise AppException(f'Could not connect to tracker: {e}')
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
+
+    @staticmethod
+    def refresh_rollup(collection: Text):
+
+        """
+        Rolls up conversation events that arrived since the last refresh.
+
+        :param collection: collection to connect to
+        :return: number of senders and events rolled up along with the new watermark
+        """
+        client, message = HistoryProcessor.get_mongo_connection()
+        message = ' '.join([message, f', collection: {collection}'])
+        try:
+            db = client.get_database()
+            return MetricRollup.refresh(db, collection), message
+        except ServerSelectionTimeoutError as e:
+            logger.error(e)
+            raise AppException(f'Could not connect to tracker: {e}')
+        except Exception as e:
+            logger.error(e)
+            raise AppException(e)
+
+    @staticmethod
+    def __refresh_rollup_in_background(collection: Text):
+        with HistoryProcessor.lock:
+            if collection in HistoryProcessor.refreshing:
+                return
+            HistoryProcessor.refreshing.add(collection)
+
+        def refresh():
             try:
-                new_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                   {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                   {"$match": {"events.name": "action_session_start"}},
-                                   {"$group": {"_id": "$sender_id", "count": {"$sum": 1}}}
-                                          ], allowDiskUse=True))
-
-                single_session = list(conversations.aggregate([{"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
-                                           {"$match": {"events.timestamp": {"$gte": Utility.get_timestamp_previous_month(month)}}},
-                                           {"$match": {"$or": [{"events.event": "user"}, {"events.name": "action_session_start"}]}},
-                                           {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}}},
-                                           {"$addFields": {"first_event": {"$first": "$events"}}},
-                                           {"$match": {"first_event.event": "user"}},
-                                           {"$project": {"_id": 1}},
-                                           {"$addFields": {"count": 1}}], allowDiskUse=True))
-            except Exception as e:
-                logger.error(e)
-                message = '\n'.join([message, str(e)])
-            new_session = {d['_id']: d['count'] for d in new_session}
-            single_session = {d['_id']: d['count'] for d in single_session}
-            for record in single_session:
-                if record in new_session:
-                    new_session[record] = new_session[record] + 1
-                else:
-                    new_session[record] = single_session[record]
-            return (
-                new_session,
-                message
-            )
+                HistoryProcessor.refresh_rollup(collection)
+            finally:
+                with HistoryProcessor.lock:
+                    HistoryProcessor.refreshing.discard(collection)
+
+        HistoryProcessor.get_executor().submit(refresh)
+
+    @staticmethod
+    def __query_rollup(collection: Text, method: Callable, *args, default: dict = None):
+        """
+        Answers metric from rollups. Stale rollups are refreshed on the history
+        thread pool, so the request is served from the last refresh.
+
+        :param collection: collection to connect to
+        :param method: MetricRollup method
+        :param args: method arguments
+        :param default: metric returned along with the error on failure, error is raised when not set
+        :return: metric and message
+        """
+        client, message = HistoryProcessor.get_mongo_connection()
+        message = ' '.join([message, f', collection: {collection}'])
+        try:
+            db = client.get_database()
+            if MetricRollup.is_stale(db, collection):
+                HistoryProcessor.__refresh_rollup_in_background(collection)
+            return method(db, collection, *args), message
+        except Exception as e:
+            logger.error(e)
+            if default is not None:
+                return default, '\n'.join([message, str(e)])
+            if isinstance(e, ServerSelectionTimeoutError):
+                raise AppException(f'Could not connect to tracker: {e}')
+            raise AppException(e)
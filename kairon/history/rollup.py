@@ -0,0 +1,396 @@
+import time
+from datetime import datetime
+from threading import RLock
+from typing import Text
+
+from pymongo import ReplaceOne, ASCENDING
+from pymongo.database import Database
+
+from kairon.shared.utils import Utility
+from .archive import ConversationArchive
+
+
+class MetricRollup:
+    """
+    Maintains per day, per sender aggregates of tracker events in a rollup collection,
+    so that trends and metrics are answered without unwinding tracker events.
+    Each refresh processes only events newer than the watermark of the tracker collection.
+    """
+
+    watermark_id = {"type": "watermark"}
+    excluded_actions = ['action_listen', 'action_session_start']
+    lock = RLock()
+
+    @staticmethod
+    def get_config() -> dict:
+        """
+        Reads rollup settings from tracker configuration.
+
+        :return: dict with enable, interval, lag, batch_size and lease_timeout
+        """
+        config = Utility.environment.get('tracker', {}).get('rollup') or {}
+        return {
+            "enable": config.get('enable', False),
+            "interval": float(config.get('interval', 300)),
+            "lag": float(config.get('lag', 60)),
+            "batch_size": int(config.get('batch_size', 500)),
+            "lease_timeout": float(config.get('lease_timeout', 3600))
+        }
+
+    @staticmethod
+    def is_enabled():
+        return MetricRollup.get_config()['enable']
+
+    @staticmethod
+    def get_rollup_name(collection: Text) -> Text:
+        return f"{collection}_rollup"
+
+    @staticmethod
+    def get_state_name(collection: Text) -> Text:
+        return f"{collection}_rollup_state"
+
+    @staticmethod
+    def get_watermark(db: Database, collection: Text) -> float:
+        """
+        Fetches timestamp up to which events are rolled up.
+
+        :param db: tracker database
+        :param collection: tracker collection
+        :return: timestamp
+        """
+        state = db.get_collection(MetricRollup.get_state_name(collection)).find_one(
+            {"_id": MetricRollup.watermark_id}
+        )
+        return state['timestamp'] if state else 0
+
+    @staticmethod
+    def is_stale(db: Database, collection: Text):
+        """
+        Checks whether last refresh is older than the configured interval.
+
+        :param db: tracker database
+        :param collection: tracker collection
+        :return: boolean
+        """
+        config = MetricRollup.get_config()
+        return time.time() - config['lag'] - MetricRollup.get_watermark(db, collection) >= config['interval']
+
+    @staticmethod
+    def refresh(db: Database, collection: Text):
+        """
+        Rolls up events that arrived after the watermark.
+        Events of the last lag seconds are left for the next refresh, as trackers may still be saving them.
+        Refresh holds a lease on the watermark, so that concurrent refreshes never count an event twice,
+        and moves the watermark only once all rollups are saved. A failed refresh releases the lease,
+        a crashed one loses it after lease_timeout seconds, and the next refresh retries the same window.
+        Senders saved before the failure are not counted again, as each sender state and each rollup
+        keeps the timestamp of the last event rolled up.
+
+        :param db: tracker database
+        :param collection: tracker collection
+        :return: number of senders and events rolled up along with the new watermark
+        """
+        config = MetricRollup.get_config()
+        states = db.get_collection(MetricRollup.get_state_name(collection))
+        rollups = db.get_collection(MetricRollup.get_rollup_name(collection))
+        with MetricRollup.lock:
+            rollups.create_index([("sender_id", ASCENDING), ("day", ASCENDING)], unique=True)
+            rollups.create_index("day")
+            states.update_one({"_id": MetricRollup.watermark_id}, {"$setOnInsert": {"timestamp": 0}}, upsert=True)
+            watermark = MetricRollup.get_watermark(db, collection)
+            new_watermark = time.time() - config['lag']
+            if new_watermark <= watermark:
+                return {"senders": 0, "events": 0, "watermark": watermark}
+            leased_at = time.time()
+            leased = states.update_one(
+                {"_id": MetricRollup.watermark_id, "timestamp": watermark,
+                 "$or": [{"leased_at": {"$exists": False}},
+                         {"leased_at": {"$lt": leased_at - config['lease_timeout']}}]},
+                {"$set": {"leased_at": leased_at}}
+            ).modified_count
+            if not leased:
+                return {"senders": 0, "events": 0, "watermark": watermark}
+
+        try:
+            senders, events = MetricRollup.__roll_up(db, collection, watermark, new_watermark, config['batch_size'])
+        except Exception:
+            states.update_one({"_id": MetricRollup.watermark_id, "leased_at": leased_at},
+                              {"$unset": {"leased_at": 1}})
+            raise
+        states.update_one({"_id": MetricRollup.watermark_id, "leased_at": leased_at},
+                          {"$set": {"timestamp": new_watermark}, "$unset": {"leased_at": 1}})
+        return {"senders": senders, "events": events, "watermark": new_watermark}
+
+    @staticmethod
+    def __roll_up(db: Database, collection: Text, watermark: float, new_watermark: float, batch_size: int):
+        conversations = ConversationArchive.get_collection(db, collection)
+        trackers = conversations.aggregate([
+            {"$match": {"events.timestamp": {"$gt": watermark, "$lte": new_watermark}}},
+            {"$project": {"sender_id": 1, "events": {"$filter": {
+                "input": "$events", "as": "event",
+                "cond": {"$and": [{"$gt": ["$$event.timestamp", watermark]},
+                                  {"$lte": ["$$event.timestamp", new_watermark]}]}
+            }}}}
+        ], allowDiskUse=True)
+        senders, events, batch = set(), 0, []
+        for tracker in trackers:
+            if not tracker.get('events'):
+                continue
+            batch.append(tracker)
+            if len(batch) >= batch_size:
+                events += MetricRollup.__save(db, collection, batch, senders)
+                batch = []
+        events += MetricRollup.__save(db, collection, batch, senders)
+        return len(senders), events
+
+    @staticmethod
+    def fold(events: list, state: dict):
+        """
+        Aggregates events of a sender per day.
+        User message followed by a bot message counts as a conversation step of the day of the
+        user message, also when the bot message arrives in a later refresh, hence the state.
+
+        :param events: tracker events in chronological order
+        :param state: sender state from previous refresh
+        :return: (aggregates keyed by day, updated sender state)
+        """
+        state = dict(state or {})
+        days = {}
+
+        def get_day(timestamp):
+            day = datetime.utcfromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+            if day not in days:
+                days[day] = {"events": 0, "user_messages": 0, "steps": 0, "conversation_time": 0,
+                             "actions": 0, "sessions": 0, "new_user": False, "intents": {}, "action_names": {}}
+            return days[day]
+
+        for event in events:
+            timestamp = event.get('timestamp')
+            if timestamp is None:
+                continue
+            aggregate = get_day(timestamp)
+            aggregate['events'] += 1
+            intent = ((event.get('parse_data') or {}).get('intent') or {}).get('name')
+            if intent is not None:
+                aggregate['intents'][intent] = aggregate['intents'].get(intent, 0) + 1
+            event_type = event.get('event')
+            if event_type in ['user', 'bot']:
+                if event_type == 'user':
+                    aggregate['user_messages'] += 1
+                elif state.get('last_event') == 'user':
+                    step = get_day(state['last_timestamp'])
+                    step['steps'] += 1
+                    step['conversation_time'] += timestamp - state['last_timestamp']
+                state['last_event'], state['last_timestamp'] = event_type, timestamp
+            elif event_type == 'action':
+                name = event.get('name')
+                aggregate['action_names'][name] = aggregate['action_names'].get(name, 0) + 1
+                if name not in MetricRollup.excluded_actions:
+                    aggregate['actions'] += 1
+                if name == 'action_session_start':
+                    aggregate['sessions'] += 1
+                    if not state.get('first_session'):
+                        state['first_session'] = timestamp
+                        aggregate['new_user'] = True
+        return days, state
+
+    @staticmethod
+    def merge(rollup: dict, aggregate: dict):
+        """
+        Adds aggregate of a day to the saved rollup of that day.
+
+        :param rollup: saved rollup document
+        :param aggregate: aggregate from fold
+        :return: merged rollup document
+        """
+        merged = dict(rollup)
+        for field in ["events", "user_messages", "steps", "conversation_time", "actions", "sessions"]:
+            merged[field] = rollup.get(field, 0) + aggregate[field]
+        merged['new_user'] = rollup.get('new_user', False) or aggregate['new_user']
+        for field in ["intents", "action_names"]:
+            counts = {item['name']: item['count'] for item in rollup.get(field, [])}
+            for name, count in aggregate[field].items():
+                counts[name] = counts.get(name, 0) + count
+            merged[field] = [{"name": name, "count": count} for name, count in counts.items()]
+        return merged
+
+    @staticmethod
+    def __save(db: Database, collection: Text, trackers: list, senders: set):
+        """
+        Merges aggregates of the trackers into the rollups, then saves the sender states.
+        Each rollup keeps the timestamp of the last event of its sender merged into it. When a
+        refresh failed after saving rollups and before saving sender states, the retry merges
+        into those rollups only the events after that timestamp, so no event is counted twice.
+        """
+        if not trackers:
+            return 0
+        states = db.get_collection(MetricRollup.get_state_name(collection))
+        rollups = db.get_collection(MetricRollup.get_rollup_name(collection))
+        events = {}
+        for tracker in trackers:
+            events.setdefault(tracker['sender_id'], []).extend(tracker['events'])
+        sender_ids = list(events.keys())
+        saved_states = {state['_id']: state for state in states.find({"_id": {"$in": sender_ids}})}
+        aggregates, folded, new_states, rolled_up = {}, {}, [], 0
+        for sender_id in sender_ids:
+            previous = saved_states.get(sender_id) or {}
+            sender_events = [event for event in events[sender_id]
+                             if event.get('timestamp') is not None and event['timestamp'] > previous.get('rolled_up', 0)]
+            if not sender_events:
+                continue
+            senders.add(sender_id)
+            rolled_up += len(sender_events)
+            days, state = MetricRollup.fold(sender_events, previous)
+            state['rolled_up'] = max(event['timestamp'] for event in sender_events)
+            state['_id'] = sender_id
+            new_states.append(ReplaceOne({"_id": sender_id}, state, upsert=True))
+            folded[sender_id] = (sender_events, previous, state['rolled_up'])
+            for day, aggregate in days.items():
+                aggregates[(sender_id, day)] = aggregate
+
+        saved = rollups.find({"sender_id": {"$in": sender_ids},
+                              "day": {"$in": list({day for _, day in aggregates.keys()})}})
+        saved = {(rollup['sender_id'], rollup['day']): rollup for rollup in saved}
+        requests = []
+        for (sender_id, day), aggregate in aggregates.items():
+            rollup = saved.get((sender_id, day)) or {"sender_id": sender_id, "day": day}
+            sender_events, previous, last_timestamp = folded[sender_id]
+            merged_until = rollup.get('rolled_up', 0)
+            if merged_until > previous.get('rolled_up', 0):
+                if merged_until >= last_timestamp:
+                    continue
+                _, state = MetricRollup.fold(
+                    [event for event in sender_events if event['timestamp'] <= merged_until], previous
+                )
+                days, _ = MetricRollup.fold(
+                    [event for event in sender_events if event['timestamp'] > merged_until], state
+                )
+                if day not in days:
+                    continue
+                aggregate = days[day]
+            rollup = MetricRollup.merge(rollup, aggregate)
+            rollup['rolled_up'] = last_timestamp
+            rollup.pop('_id', None)
+            requests.append(ReplaceOne({"sender_id": sender_id, "day": day}, rollup, upsert=True))
+        if requests:
+            rollups.bulk_write(requests, ordered=False)
+        if new_states:
+            states.bulk_write(new_states, ordered=False)
+        return rolled_up
+
+    @staticmethod
+    def __aggregate(db: Database, collection: Text, month: int, pipeline: list):
+        cutoff = datetime.utcfromtimestamp(Utility.get_timestamp_previous_month(month)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        rollups = db.get_collection(MetricRollup.get_rollup_name(collection))
+        return list(rollups.aggregate([{"$match": {"day": {"$gte": cutoff}}}] + pipeline, allowDiskUse=True))
+
+    @staticmethod
+    def __count_by_month(db: Database, collection: Text, month: int, match: dict = None):
+        pipeline = [{"$match": match}] if match else []
+        pipeline.extend([
+            {"$group": {"_id": {"month": {"$month": "$day"}, "sender_id": "$sender_id"}}},
+            {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}}
+        ])
+        return {d['_id']: d['count'] for d in MetricRollup.__aggregate(db, collection, month, pipeline)}
+
+    @staticmethod
+    def __sum_by_month(db: Database, collection: Text, month: int, field: Text):
+        values = MetricRollup.__aggregate(db, collection, month, [
+            {"$group": {"_id": {"$month": "$day"}, "total": {"$sum": f"${field}"}}}
+        ])
+        return {d['_id']: d['total'] for d in values}
+
+    @staticmethod
+    def __count_names(db: Database, collection: Text, month: int, field: Text, match: dict = None):
+        pipeline = [{"$unwind": f"${field}"}]
+        if match:
+            pipeline.append({"$match": match})
+        pipeline.append({"$group": {"_id": f"${field}.name", "count": {"$sum": f"${field}.count"}}})
+        return MetricRollup.__aggregate(db, collection, month, pipeline)
+
+    @staticmethod
+    def visitor_hit_fallback(db: Database, collection: Text, month: int = 1,
+                             fallback_action: str = 'action_default_fallback', nlu_fallback_action: str = None):
+        default_actions = Utility.load_default_actions()
+        counts = MetricRollup.__count_names(db, collection, month, "action_names",
+                                            {"action_names.name": {"$nin": default_actions}})
+        fallback_count = sum(d['count'] for d in counts if d['_id'] in [fallback_action, nlu_fallback_action])
+        total_count = sum(d['count'] for d in counts) if fallback_count else 0
+        return {"fallback_count": fallback_count, "total_count": total_count}
+
+    @staticmethod
+    def engaged_users(db: Database, collection: Text, month: int = 1, conversation_limit: int = 10):
+        values = MetricRollup.__aggregate(db, collection, month, [
+            {"$group": {"_id": "$sender_id", "steps": {"$sum": "$steps"}}},
+            {"$match": {"steps": {"$gte": conversation_limit}}},
+            {"$group": {"_id": None, "count": {"$sum": 1}}}
+        ])
+        return {"engaged_users": values[0]['count'] if values else 0}
+
+    @staticmethod
+    def new_users(db: Database, collection: Text, month: int = 1):
+        values = MetricRollup.__aggregate(db, collection, month, [
+            {"$match": {"new_user": True}},
+            {"$group": {"_id": None, "count": {"$sum": 1}}}
+        ])
+        return {"new_users": values[0]['count'] if values else 0}
+
+    @staticmethod
+    def top_n_intents(db: Database, collection: Text, month: int = 1, top_n: int = 10):
+        counts = MetricRollup.__count_names(db, collection, month, "intents")
+        return sorted(counts, key=lambda d: d['count'], reverse=True)[:top_n]
+
+    @staticmethod
+    def top_n_actions(db: Database, collection: Text, month: int = 1, top_n: int = 10):
+        counts = MetricRollup.__count_names(db, collection, month, "action_names",
+                                            {"action_names.name": {"$nin": MetricRollup.excluded_actions}})
+        return sorted(counts, key=lambda d: d['count'], reverse=True)[:top_n]
+
+    @staticmethod
+    def engaged_users_range(db: Database, collection: Text, month: int = 6, conversation_limit: int = 10):
+        values = MetricRollup.__aggregate(db, collection, month, [
+            {"$group": {"_id": {"month": {"$month": "$day"}, "sender_id": "$sender_id"}, "steps": {"$sum": "$steps"}}},
+            {"$match": {"steps": {"$gte": conversation_limit}}},
+            {"$group": {"_id": "$_id.month", "count": {"$sum": 1}}}
+        ])
+        return {"engaged_user_range": {d['_id']: d['count'] for d in values}}
+
+    @staticmethod
+    def new_users_range(db: Database, collection: Text, month: int = 6):
+        return {"new_user_range": MetricRollup.__count_by_month(db, collection, month, {"new_user": True})}
+
+    @staticmethod
+    def fallback_count_range(db: Database, collection: Text, month: int = 6,
+                             fallback_action: str = 'action_default_fallback',
+                             nlu_fallback_action: str = 'nlu_fallback'):
+        fallbacks = MetricRollup.__aggregate(db, collection, month, [
+            {"$unwind": "$action_names"},
+            {"$match": {"action_names.name": {"$in": [fallback_action, nlu_fallback_action]}}},
+            {"$group": {"_id": {"$month": "$day"}, "count": {"$sum": "$action_names.count"}}}
+        ])
+        fallback_count = {d['_id']: d['count'] for d in fallbacks}
+        action_count = MetricRollup.__sum_by_month(db, collection, month, "actions")
+        final_trend = {k: 100 * (fallback_count.get(k) / action_count.get(k)) for k in list(fallback_count.keys())}
+        return {"fallback_count_rate": final_trend, "total_fallback_count": fallback_count}
+
+    @staticmethod
+    def total_conversation_range(db: Database, collection: Text, month: int = 6):
+        return {"total_conversation_range": MetricRollup.__count_by_month(db, collection, month)}
+
+    @staticmethod
+    def average_conversation_step_range(db: Database, collection: Text, month: int = 6):
+        steps = MetricRollup.__sum_by_month(db, collection, month, "steps")
+        user_count = MetricRollup.__count_by_month(db, collection, month)
+        conv_steps = {k: steps.get(k, 0) for k in user_count.keys()}
+        avg_conv_steps = {k: conv_steps[k] / user_count[k] for k in user_count.keys()}
+        return {"average_conversation_steps": avg_conv_steps, "total_conversation_steps": conv_steps}
+
+    @staticmethod
+    def average_conversation_time_range(db: Database, collection: Text, month: int = 6):
+        conv_time = MetricRollup.__sum_by_month(db, collection, month, "conversation_time")
+        user_count = MetricRollup.__count_by_month(db, collection, month)
+        conv_time = {k: conv_time.get(k, 0) for k in user_count.keys()}
+        avg_conv_time = {k: conv_time[k] / user_count[k] for k in user_count.keys()}
+        return {"Conversation_time_range": avg_conv_time}
@@ -17,8 +17,8 @@ router = APIRouter()
 async def flat_conversations(request: HistoryQuery = HistoryQuery(),
                              collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the flattened conversation data of the bot for previous months."""
-    flat_data, message = HistoryProcessor.flatten_conversations(
-        collection, request.month, request.sort_by_date
+    flat_data, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.flatten_conversations, collection, request.month, request.sort_by_date
     )
     return {"data": flat_data, "message": message}
 
@@ -30,7 +30,9 @@ async def download_conversations(
         collection: str = Depends(Authentication.authenticate_and_get_collection),
 ):
     """Downloads conversation history of the bot, for the specified months."""
-    conversation_data, message = HistoryProcessor.flatten_conversations(collection, request.month, request.sort_by_date)
+    conversation_data, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.flatten_conversations, collection, request.month, request.sort_by_date
+    )
     file, temp_path = Utility.download_csv(conversation_data, message)
     response = FileResponse(
         file, filename=os.path.basename(file), background=background_tasks
@@ -46,7 +48,9 @@ async def download_conversations(
 async def chat_history_users(request: HistoryQuery = HistoryQuery(),
                              collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the list of user who has conversation with the agent."""
-    users, message = HistoryProcessor.fetch_chat_users(collection, request.month)
+    users, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.fetch_chat_users, collection, request.month
+    )
     return {"data": {"users": users}, "message": message}
 
 
@@ -55,7 +59,9 @@ async def chat_history(sender: Text,
                        request: HistoryQuery = HistoryQuery(),
                        collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the list of conversation with the agent by particular user."""
-    history, message = HistoryProcessor.fetch_chat_history(collection, sender, request.month)
+    history, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.fetch_chat_history, collection, sender, request.month
+    )
     return {"data": {"history": list(history)}, "message": message}
 
 
@@ -63,7 +69,14 @@ async def chat_history(sender: Text,
 async def word_cloud(request: HistoryQuery = HistoryQuery(),
                              collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the string required for word cloud formation."""
-    sentence, message = HistoryProcessor.word_cloud(collection, request.u_bound, request.l_bound,
-                                                    request.stopword_list, request.month)
+    sentence, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.word_cloud, collection, request.u_bound, request.l_bound, request.stopword_list, request.month
+    )
     return {"data": sentence, "message": message}
 
+
+@router.post("/archive", response_model=Response)
+async def archive_conversations(collection: str = Depends(Authentication.authenticate_and_get_collection)):
+    """Moves conversation events older than the configured horizon to the archive."""
+    archived, message = await HistoryProcessor.run_in_executor(HistoryProcessor.archive_conversations, collection)
+    return {"data": archived, "message": message}
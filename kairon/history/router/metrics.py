@@ -14,8 +14,8 @@ async def user_with_metrics(
         request: HistoryQuery = HistoryQuery(),
         collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the list of user who has conversation with the agent with steps and time."""
-    users, message = HistoryProcessor.user_with_metrics(
-        collection, request.month
+    users, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.user_with_metrics, collection, request.month
     )
     return {"data": {"users": users}, "message": message}
 
@@ -24,8 +24,8 @@ async def user_with_metrics(
 async def visitor_hit_fallback_count(request: HistoryQuery = HistoryQuery(),
                                      collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the number of times the agent hit a fallback (ie. not able to answer) to user queries."""
-    visitor_hit_fallback, message = HistoryProcessor.visitor_hit_fallback(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    visitor_hit_fallback, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.visitor_hit_fallback, collection, request.month, request.action_fallback, request.nlu_fallback
     )
     return {"data": visitor_hit_fallback, "message": message}
 
@@ -34,7 +34,9 @@ async def visitor_hit_fallback_count(request: HistoryQuery = HistoryQuery(),
 async def conversation_steps(request: HistoryQuery = HistoryQuery(),
                              collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the number of conversation steps that took place in the chat between the users and the agent."""
-    conversation_steps, message = HistoryProcessor.conversation_steps(collection, request.month)
+    conversation_steps, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.conversation_steps, collection, request.month
+    )
     return {"data": conversation_steps, "message": message}
 
 
@@ -42,7 +44,9 @@ async def conversation_steps(request: HistoryQuery = HistoryQuery(),
 async def conversation_time(request: HistoryQuery = HistoryQuery(),
                             collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the duration of the chat that took place between the users and the agent."""
-    conversation_time, message = HistoryProcessor.conversation_time(collection, request.month)
+    conversation_time, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.conversation_time, collection, request.month
+    )
     return {"data": conversation_time, "message": message}
 
 
@@ -50,8 +54,8 @@ async def conversation_time(request: HistoryQuery = HistoryQuery(),
 async def count_engaged_users(request: HistoryQuery = HistoryQuery(),
                               collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the number of engaged users of the bot."""
-    engaged_user_count, message = HistoryProcessor.engaged_users(
-        collection, request.month, request.conversation_step_threshold
+    engaged_user_count, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.engaged_users, collection, request.month, request.conversation_step_threshold
     )
     return {"data": engaged_user_count, "message": message}
 
@@ -60,8 +64,8 @@ async def count_engaged_users(request: HistoryQuery = HistoryQuery(),
 async def count_new_users(request: HistoryQuery = HistoryQuery(),
                           collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the number of new users of the bot."""
-    user_count, message = HistoryProcessor.new_users(
-        collection, request.month
+    user_count, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.new_users, collection, request.month
     )
     return {"data": user_count, "message": message}
 
@@ -70,8 +74,9 @@ async def count_new_users(request: HistoryQuery = HistoryQuery(),
 async def complete_conversations(request: HistoryQuery = HistoryQuery(),
                                  collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the number of successful conversations of the bot, which had no fallback."""
-    conversation_count, message = HistoryProcessor.successful_conversations(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    conversation_count, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.successful_conversations, collection, request.month, request.action_fallback,
+        request.nlu_fallback
     )
     return {"data": conversation_count, "message": message}
 
@@ -80,18 +85,30 @@ async def complete_conversations(request: HistoryQuery = HistoryQuery(),
 async def calculate_retention(request: HistoryQuery = HistoryQuery(),
                               collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the user retention percentage of the bot."""
-    retention_count, message = HistoryProcessor.user_retention(
-        collection, request.month
+    retention_count, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.user_retention, collection, request.month
     )
     return {"data": retention_count, "message": message}
 
 
+@router.get("/dashboard", response_model=Response)
+async def dashboard(request: HistoryQuery = HistoryQuery(),
+                    collection: str = Depends(Authentication.authenticate_and_get_collection)):
+    """Fetches fallback, conversation steps and time, engaged and new users, successful conversations
+    and user retention of the bot in a single scan."""
+    metrics, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.dashboard, collection, request.month, request.conversation_step_threshold,
+        request.action_fallback, request.nlu_fallback
+    )
+    return {"data": metrics, "message": message}
+
+
 @router.get("/intents/topmost", response_model=Response)
 async def top_intents(request: HistoryQuery = HistoryQuery(),
                       collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the top n identified intents of the bot."""
-    top_intent, message = HistoryProcessor.top_n_intents(
-        collection, request.month, request.top_n
+    top_intent, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.top_n_intents, collection, request.month, request.top_n
     )
     return {"data": top_intent, "message": message}
 
@@ -100,8 +117,8 @@ async def top_intents(request: HistoryQuery = HistoryQuery(),
 async def top_actions(request: HistoryQuery = HistoryQuery(),
                       collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the top n identified actions of the bot."""
-    top_action, message = HistoryProcessor.top_n_actions(
-        collection, request.month, request.top_n
+    top_action, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.top_n_actions, collection, request.month, request.top_n
     )
     return {"data": top_action, "message": message}
 
@@ -110,8 +127,8 @@ async def top_actions(request: HistoryQuery = HistoryQuery(),
 async def user_input_count(request: HistoryQuery = HistoryQuery(),
                            collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the user inputs along with their frequencies."""
-    user_inputs, message = HistoryProcessor.user_input_count(
-        collection, request.month
+    user_inputs, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.user_input_count, collection, request.month
     )
     return {"data": user_inputs, "message": message}
 
@@ -120,8 +137,9 @@ async def user_input_count(request: HistoryQuery = HistoryQuery(),
 async def fallback_dropoff(request: HistoryQuery = HistoryQuery(),
                            collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the list of users that dropped off after encountering fallback."""
-    user_list, message = HistoryProcessor.user_fallback_dropoff(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    user_list, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.user_fallback_dropoff, collection, request.month, request.action_fallback,
+        request.nlu_fallback
     )
     return {"data": user_list, "message": message}
 
@@ -130,8 +148,8 @@ async def fallback_dropoff(request: HistoryQuery = HistoryQuery(),
 async def intents_dropoff(request: HistoryQuery = HistoryQuery(),
                           collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the identified intents and their counts for users before dropping off from the conversations."""
-    dropoff_intents, message = HistoryProcessor.intents_before_dropoff(
-        collection, request.month
+    dropoff_intents, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.intents_before_dropoff, collection, request.month
     )
     return {"data": dropoff_intents, "message": message}
 
@@ -140,8 +158,8 @@ async def intents_dropoff(request: HistoryQuery = HistoryQuery(),
 async def unsuccessful_sessions(request: HistoryQuery = HistoryQuery(),
                            collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the count of sessions that encountered a fallback for a particular user."""
-    user_list, message = HistoryProcessor.unsuccessful_session(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    user_list, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.unsuccessful_session, collection, request.month, request.action_fallback, request.nlu_fallback
     )
     return Response(data=user_list, message=message)
 
@@ -150,7 +168,14 @@ async def unsuccessful_sessions(request: HistoryQuery = HistoryQuery(),
 async def total_sessions(request: HistoryQuery = HistoryQuery(),
                           collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the total session count for users for the past months."""
-    user_list, message = HistoryProcessor.session_count(
-        collection, request.month
+    user_list, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.session_count, collection, request.month
     )
     return Response(data=user_list, message=message)
+
+
+@router.post("/rollup", response_model=Response)
+async def refresh_rollup(collection: str = Depends(Authentication.authenticate_and_get_collection)):
+    """Rolls up conversation events that arrived since the last refresh into daily metrics."""
+    refreshed, message = await HistoryProcessor.run_in_executor(HistoryProcessor.refresh_rollup, collection)
+    return {"data": refreshed, "message": message}
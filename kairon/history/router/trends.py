@@ -13,8 +13,8 @@ router = APIRouter()
 async def engaged_users(request: HistoryQuery = HistoryQuery(month=6),
                         collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the counts of engaged users of the bot for previous months."""
-    range_value, message = HistoryProcessor.engaged_users_range(
-        collection, request.month, request.conversation_step_threshold
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.engaged_users_range, collection, request.month, request.conversation_step_threshold
     )
     return {"data": range_value, "message": message}
 
@@ -23,8 +23,8 @@ async def engaged_users(request: HistoryQuery = HistoryQuery(month=6),
 async def new_users(request: HistoryQuery = HistoryQuery(month=6),
                     collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the counts of new users of the bot for previous months."""
-    range_value, message = HistoryProcessor.new_users_range(
-        collection, request.month
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.new_users_range, collection, request.month
     )
     return {"data": range_value, "message": message}
 
@@ -33,8 +33,9 @@ async def new_users(request: HistoryQuery = HistoryQuery(month=6),
 async def complete_conversation(request: HistoryQuery = HistoryQuery(month=6),
                                 collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the counts of successful conversations of the bot for previous months."""
-    range_value, message = HistoryProcessor.successful_conversation_range(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.successful_conversation_range, collection, request.month, request.action_fallback,
+        request.nlu_fallback
     )
     return {"data": range_value, "message": message}
 
@@ -43,8 +44,8 @@ async def complete_conversation(request: HistoryQuery = HistoryQuery(month=6),
 async def user_retention(request: HistoryQuery = HistoryQuery(month=6),
                          collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the counts of user retention percentages of the bot for previous months."""
-    range_value, message = HistoryProcessor.user_retention_range(
-        collection, request.month
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.user_retention_range, collection, request.month
     )
     return {"data": range_value, "message": message}
 
@@ -53,8 +54,8 @@ async def user_retention(request: HistoryQuery = HistoryQuery(month=6),
 async def fallback(request: HistoryQuery = HistoryQuery(month=6),
                    collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the fallback count of the bot for previous months."""
-    range_value, message = HistoryProcessor.fallback_count_range(
-        collection, request.month, request.action_fallback, request.nlu_fallback
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.fallback_count_range, collection, request.month, request.action_fallback, request.nlu_fallback
     )
     return {"data": range_value, "message": message}
 
@@ -63,8 +64,8 @@ async def fallback(request: HistoryQuery = HistoryQuery(month=6),
 async def total_conversations(request: HistoryQuery = HistoryQuery(month=6),
                               collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the counts of conversations of the bot for previous months."""
-    range_value, message = HistoryProcessor.total_conversation_range(
-        collection, request.month
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.total_conversation_range, collection, request.month
     )
     return {"data": range_value, "message": message}
 
@@ -73,8 +74,8 @@ async def total_conversations(request: HistoryQuery = HistoryQuery(month=6),
 async def conversation_steps(request: HistoryQuery = HistoryQuery(month=6),
                              collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the average conversation steps of the bot for previous months."""
-    range_value, message = HistoryProcessor.average_conversation_step_range(
-        collection, request.month
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.average_conversation_step_range, collection, request.month
     )
     return {"data": range_value, "message": message}
 
@@ -83,7 +84,7 @@ async def conversation_steps(request: HistoryQuery = HistoryQuery(month=6),
 async def conversation_time(request: HistoryQuery = HistoryQuery(month=6),
                             collection: str = Depends(Authentication.authenticate_and_get_collection)):
     """Fetches the average conversation time of the bot for previous months."""
-    range_value, message = HistoryProcessor.average_conversation_time_range(
-        collection, request.month
+    range_value, message = await HistoryProcessor.run_in_executor(
+        HistoryProcessor.average_conversation_time_range, collection, request.month
     )
     return {"data": range_value, "message": message}
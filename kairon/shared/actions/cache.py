@@ -0,0 +1,150 @@
+from copy import deepcopy
+from datetime import datetime
+from threading import RLock
+from typing import Text, Callable
+
+from cachetools import TTLCache
+
+from kairon.shared.actions.data_objects import ActionConfigVersion
+from kairon.shared.utils import Utility
+
+
+class ActionConfigCache:
+    """
+    In-process TTL cache of resolved (and decrypted) action configurations.
+    Entries are grouped per bot and tagged with the bot's config version kept
+    in ActionConfigVersion. Every change to an action configuration, whichever
+    process makes it, bumps that version and each hit compares it against the
+    cached one with a single indexed lookup, so stale entries are never served
+    once the change is committed. The ttl only bounds how long unused entries
+    are held in memory.
+    """
+
+    cache = None
+    lock = RLock()
+    hits = 0
+    misses = 0
+    generation = 0
+
+    @staticmethod
+    def get_config():
+        """
+        Reads action config cache settings from system.yaml.
+
+        :return: dict with enable, ttl and size
+        """
+        config = Utility.environment['action'].get('cache', {})
+        return {
+            "enable": config.get('enable', True),
+            "ttl": float(config.get('ttl', 60)),
+            "size": int(config.get('size', 1000))
+        }
+
+    @staticmethod
+    def get_cache():
+        """
+        Returns cache store, initializing it lazily from system.yaml.
+
+        :return: TTLCache keyed by bot
+        """
+        if ActionConfigCache.cache is None:
+            config = ActionConfigCache.get_config()
+            ActionConfigCache.cache = TTLCache(maxsize=config['size'], ttl=config['ttl'])
+        return ActionConfigCache.cache
+
+    @staticmethod
+    def get_version(bot: Text):
+        """
+        Fetches current config version of the bot.
+
+        :param bot: bot id
+        :return: version, 0 if configuration of the bot was never changed
+        """
+        config_version = ActionConfigVersion.objects(bot=bot).only("version").as_pymongo().first()
+        return config_version.get("version", 0) if config_version else 0
+
+    @staticmethod
+    def get_or_load(bot: Text, name: Text, loader: Callable):
+        """
+        Returns cached configuration for action, loading it through loader on a miss.
+        Cached configurations are served only while the bot's config version is unchanged.
+        Failures raised by the loader are not cached, neither are configurations
+        loaded while an invalidation happened in this process.
+
+        :param bot: bot id
+        :param name: action name
+        :param loader: callable returning (config, action_type)
+        :return: (config, action_type)
+        """
+        if not ActionConfigCache.get_config()['enable']:
+            return loader()
+
+        version = ActionConfigCache.get_version(bot)
+        with ActionConfigCache.lock:
+            cache = ActionConfigCache.get_cache()
+            entry = cache.get(bot)
+            if entry and entry['version'] == version and name in entry['actions']:
+                ActionConfigCache.hits += 1
+                return ActionConfigCache.__copy(entry['actions'][name])
+            ActionConfigCache.misses += 1
+            generation = ActionConfigCache.generation
+
+        value = loader()
+        with ActionConfigCache.lock:
+            if generation == ActionConfigCache.generation:
+                cache = ActionConfigCache.get_cache()
+                entry = cache.get(bot)
+                if not entry or entry['version'] != version:
+                    entry = {"version": version, "actions": {}}
+                entry['actions'][name] = value
+                cache[bot] = entry
+        return ActionConfigCache.__copy(value)
+
+    @staticmethod
+    def __copy(value):
+        config, action_type = value
+        if isinstance(config, dict):
+            config = deepcopy(config)
+        elif isinstance(config, list):
+            config = list(config)
+        return config, action_type
+
+    @staticmethod
+    def invalidate(bot: Text):
+        """
+        Bumps config version of the bot, so that every process drops its cached
+        action configurations of the bot on the next hit, and drops them here.
+
+        :param bot: bot id
+        :return: None
+        """
+        ActionConfigVersion.objects(bot=bot).update_one(
+            inc__version=1, set__timestamp=datetime.utcnow(), upsert=True
+        )
+        with ActionConfigCache.lock:
+            ActionConfigCache.generation += 1
+            if ActionConfigCache.cache is not None:
+                ActionConfigCache.cache.pop(bot, None)
+
+    @staticmethod
+    def clear():
+        """
+        Drops all action configurations cached in this process.
+
+        :return: None
+        """
+        with ActionConfigCache.lock:
+            ActionConfigCache.generation += 1
+            if ActionConfigCache.cache is not None:
+                ActionConfigCache.cache.clear()
+
+    @staticmethod
+    def stats():
+        """
+        Fetches cache statistics.
+
+        :return: dict with bots, hits and misses
+        """
+        with ActionConfigCache.lock:
+            bots = len(ActionConfigCache.cache) if ActionConfigCache.cache is not None else 0
+        return {"bots": bots, "hits": ActionConfigCache.hits, "misses": ActionConfigCache.misses}
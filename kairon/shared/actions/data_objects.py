@@ -13,9 +13,9 @@ from datetime import datetime
 
 from validators import ValidationFailure, url
 
-from kairon.shared.actions.models import ActionType, ActionParameterType
+from kairon.shared.actions.models import ActionType, ActionParameterType, MAIN_HTTP_REQUEST, CHAT_LOG_SESSION_WINDOW
 from kairon.shared.constants import SLOT_SET_TYPE
-from kairon.shared.data.signals import push_notification
+from kairon.shared.data.signals import push_notification, invalidate_action_config
 from kairon.shared.utils import Utility
 from validators import email
 
@@ -42,9 +42,48 @@ class HttpActionRequestBody(EmbeddedDocument):
             raise ValidationError("key in http action parameters cannot be empty")
         if self.parameter_type == "slot" and ActionUtility.is_empty(self.value):
             raise ValidationError("Provide name of the slot as value")
+        if self.parameter_type == ActionParameterType.chat_log.value and not ActionUtility.is_empty(self.value) \
+                and self.value != CHAT_LOG_SESSION_WINDOW and not (self.value.isdigit() and int(self.value) > 0):
+            raise ValidationError(f"chat_log value must be empty, '{CHAT_LOG_SESSION_WINDOW}' or number of turns")
+
+
+class HttpActionSubRequest(EmbeddedDocument):
+    name = StringField(required=True)
+    http_url = StringField(required=True)
+    request_method = StringField(required=True)
+    params_list = ListField(EmbeddedDocumentField(HttpActionRequestBody), required=False)
+    headers = ListField(EmbeddedDocumentField(HttpActionRequestBody), required=False)
+
+    def clean(self):
+        if self.name:
+            self.name = self.name.strip().lower()
+
+    def validate(self, clean=True):
+        from .utils import ActionUtility
+
+        if clean:
+            self.clean()
+
+        if ActionUtility.is_empty(self.name):
+            raise ValidationError("Request name cannot be empty")
+        if "." in self.name or self.name == MAIN_HTTP_REQUEST:
+            raise ValidationError(f"Request name cannot contain '.' or be '{MAIN_HTTP_REQUEST}'")
+        if ActionUtility.is_empty(self.http_url):
+            raise ValidationError("URL cannot be empty")
+        if isinstance(url(self.http_url), ValidationFailure):
+            raise ValidationError("URL is malformed")
+        if ActionUtility.is_empty(self.request_method) or self.request_method.upper() not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValidationError("Invalid HTTP method")
+
+        for param in self.params_list:
+            param.validate()
+
+        for param in self.headers:
+            param.validate()
 
 
 @push_notification.apply
+@invalidate_action_config.apply
 class HttpActionConfig(Document):
     action_name = StringField(required=True)
     response = StringField(required=True)
@@ -52,6 +91,8 @@ class HttpActionConfig(Document):
     request_method = StringField(required=True)
     params_list = ListField(EmbeddedDocumentField(HttpActionRequestBody), required=False)
     headers = ListField(EmbeddedDocumentField(HttpActionRequestBody), required=False)
+    cache_ttl = IntField(min_value=0)
+    requests = ListField(EmbeddedDocumentField(HttpActionSubRequest), required=False)
     bot = StringField(required=True)
     user = StringField(required=True)
     timestamp = DateTimeField(default=datetime.utcnow)
@@ -76,6 +117,13 @@ class HttpActionConfig(Document):
         for param in self.headers:
             param.validate()
 
+        names = set()
+        for request in self.requests:
+            request.validate()
+            if request.name in names:
+                raise ValidationError(f"Duplicate request name: {request.name}")
+            names.add(request.name)
+
     def clean(self):
         self.action_name = self.action_name.strip().lower()
 
@@ -98,6 +146,7 @@ class ActionServerLogs(Document):
 
 
 @push_notification.apply
+@invalidate_action_config.apply
 class Actions(Document):
     name = StringField(required=True)
     type = StringField(choices=[type.value for type in ActionType], default=None)
@@ -123,6 +172,7 @@ class Actions(Document):
 
 
 @push_notification.apply
+@invalidate_action_config.apply
 class SlotSetAction(Document):
     name = StringField(required=True)
     slot = StringField(required=True)
@@ -143,6 +193,7 @@ class SlotSetAction(Document):
 
 
 @push_notification.apply
+@invalidate_action_config.apply
 class FormValidationAction(Document):
     name = StringField(required=True)
     slot = StringField(required=True)
@@ -164,6 +215,7 @@ class FormValidationAction(Document):
 
 
 @push_notification.apply
+@invalidate_action_config.apply
 class EmailActionConfig(Document):
     action_name = StringField(required=True)
     smtp_url = StringField(required=True)
@@ -205,7 +257,25 @@ class EmailActionConfig(Document):
         document.from_email = Utility.encrypt_message(document.from_email)
 
 
+class EmailActionOutbox(Document):
+    bot = StringField(required=True)
+    action_name = StringField(required=True)
+    sender = StringField()
+    to_email = StringField(required=True)
+    subject = StringField(required=True)
+    body = StringField(required=True)
+    status = StringField(default="pending", choices=["pending", "sending", "sent", "failed"])
+    attempts = IntField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    locked_at = DateTimeField()
+    exception = StringField()
+    timestamp = DateTimeField(default=datetime.utcnow)
+
+    meta = {"indexes": [{"fields": ["status", "next_attempt_at"]}]}
+
+
 @push_notification.apply
+@invalidate_action_config.apply
 class GoogleSearchAction(Document):
     name = StringField(required=True)
     api_key = StringField(required=True)
@@ -227,3 +297,9 @@ class GoogleSearchAction(Document):
     @classmethod
     def pre_save_post_validation(cls, sender, document, **kwargs):
         document.api_key = Utility.encrypt_message(document.api_key)
+
+
+class ActionConfigVersion(Document):
+    bot = StringField(required=True, unique=True)
+    version = IntField(default=0)
+    timestamp = DateTimeField(default=datetime.utcnow)
@@ -0,0 +1,269 @@
+import atexit
+import time
+from datetime import datetime, timedelta
+from smtplib import SMTP
+from threading import Thread, Event, RLock
+from typing import Text
+
+from loguru import logger
+
+from kairon.shared.actions.data_objects import EmailActionOutbox
+from kairon.shared.utils import Utility
+
+
+class SmtpSessionPool:
+    """
+    Pool of authenticated SMTP sessions keyed by server and login.
+    Idle sessions are reused after a NOOP health check and closed
+    once they have been idle longer than idle_timeout seconds.
+    """
+
+    sessions = {}
+    lock = RLock()
+
+    @staticmethod
+    def get_config():
+        config = Utility.environment['action'].get('email', {}).get('smtp_pool', {})
+        return {"max_idle": int(config.get('max_idle', 4)), "idle_timeout": float(config.get('idle_timeout', 60))}
+
+    @staticmethod
+    def get_key(smtp_url: Text, smtp_port: int, login: Text, tls: bool):
+        return smtp_url, smtp_port, login, tls
+
+    @staticmethod
+    def acquire(smtp_url: Text, smtp_port: int, sender_email: Text, smtp_password: Text,
+                smtp_userid: Text = None, tls: bool = False):
+        """
+        Returns an idle healthy session for the server, or opens and logs in a new one.
+
+        :param smtp_url: smtp server
+        :param smtp_port: smtp port
+        :param sender_email: sender mail id, used as login if userid is not set
+        :param smtp_password: smtp password
+        :param smtp_userid: smtp login
+        :param tls: whether to start tls
+        :return: (key, SMTP session)
+        """
+        login = smtp_userid if smtp_userid else sender_email
+        key = SmtpSessionPool.get_key(smtp_url, smtp_port, login, tls)
+        idle_timeout = SmtpSessionPool.get_config()['idle_timeout']
+        while True:
+            with SmtpSessionPool.lock:
+                idle = SmtpSessionPool.sessions.get(key)
+                session, released_at = idle.pop() if idle else (None, None)
+            if not session:
+                break
+            if time.monotonic() - released_at < idle_timeout and SmtpSessionPool.__is_alive(session):
+                return key, session
+            SmtpSessionPool.close(session)
+
+        session = SMTP(smtp_url, port=smtp_port)
+        session.connect(smtp_url, smtp_port)
+        if tls:
+            session.starttls()
+        session.login(login, smtp_password)
+        return key, session
+
+    @staticmethod
+    def release(key: tuple, session: SMTP):
+        """
+        Returns session to the pool, closing it if pool for the server is full.
+
+        :param key: pool key returned by acquire
+        :param session: SMTP session
+        :return: None
+        """
+        with SmtpSessionPool.lock:
+            idle = SmtpSessionPool.sessions.setdefault(key, [])
+            if len(idle) < SmtpSessionPool.get_config()['max_idle']:
+                idle.append((session, time.monotonic()))
+                return
+        SmtpSessionPool.close(session)
+
+    @staticmethod
+    def close(session: SMTP):
+        try:
+            session.quit()
+        except Exception as e:
+            logger.debug(e)
+
+    @staticmethod
+    def close_all():
+        """
+        Closes all idle sessions.
+
+        :return: None
+        """
+        with SmtpSessionPool.lock:
+            sessions = [session for idle in SmtpSessionPool.sessions.values() for session, _ in idle]
+            SmtpSessionPool.sessions = {}
+        for session in sessions:
+            SmtpSessionPool.close(session)
+
+    @staticmethod
+    def __is_alive(session: SMTP):
+        try:
+            return session.noop()[0] == 250
+        except Exception:
+            return False
+
+
+class EmailOutbox:
+    """
+    Persistent outbox for email actions.
+    Emails are saved as EmailActionOutbox documents and delivered by background
+    workers over pooled SMTP sessions. Failed deliveries are retried with
+    exponential backoff until max_retries attempts are exhausted.
+    """
+
+    workers = []
+    lock = RLock()
+    wake_up = Event()
+    stop_event = Event()
+    registered = False
+
+    @staticmethod
+    def get_config():
+        """
+        Reads email outbox settings from system.yaml.
+
+        :return: dict
+        """
+        config = Utility.environment['action'].get('email', {}).get('outbox', {})
+        return {
+            "enable": config.get('enable', True),
+            "workers": int(config.get('workers', 2)),
+            "poll_interval": float(config.get('poll_interval', 5)),
+            "max_retries": int(config.get('max_retries', 3)),
+            "retry_backoff": float(config.get('retry_backoff', 30)),
+            "lease_timeout": float(config.get('lease_timeout', 300))
+        }
+
+    @staticmethod
+    def is_enabled():
+        return EmailOutbox.get_config()['enable']
+
+    @staticmethod
+    def enqueue(bot: Text, action_name: Text, sender: Text, to_email: Text, subject: Text, body: Text):
+        """
+        Saves email to outbox and wakes up workers.
+
+        :param bot: bot id
+        :param action_name: email action name, used to resolve smtp configuration on delivery
+        :param sender: conversation sender id
+        :param to_email: the mail id of the recipient
+        :param subject: the subject of the mail
+        :param body: the body of the mail
+        :return: outbox id
+        """
+        outbox_id = EmailActionOutbox(bot=bot, action_name=action_name, sender=sender, to_email=to_email,
+                                      subject=subject, body=body).save().id.__str__()
+        EmailOutbox.start()
+        EmailOutbox.wake_up.set()
+        return outbox_id
+
+    @staticmethod
+    def start():
+        """
+        Starts delivery workers, if not already running.
+
+        :return: None
+        """
+        with EmailOutbox.lock:
+            EmailOutbox.workers = [worker for worker in EmailOutbox.workers if worker.is_alive()]
+            if EmailOutbox.workers:
+                return
+            if not EmailOutbox.registered:
+                atexit.register(EmailOutbox.stop)
+                EmailOutbox.registered = True
+            EmailOutbox.stop_event.clear()
+            for i in range(EmailOutbox.get_config()['workers']):
+                worker = Thread(target=EmailOutbox.__run, name=f"email-outbox-{i}", daemon=True)
+                worker.start()
+                EmailOutbox.workers.append(worker)
+
+    @staticmethod
+    def stop():
+        """
+        Stops delivery workers and closes pooled SMTP sessions.
+        Emails still pending are delivered once workers are started again.
+
+        :return: None
+        """
+        with EmailOutbox.lock:
+            EmailOutbox.stop_event.set()
+            EmailOutbox.wake_up.set()
+            for worker in EmailOutbox.workers:
+                worker.join()
+            EmailOutbox.workers = []
+        SmtpSessionPool.close_all()
+
+    @staticmethod
+    def claim():
+        """
+        Atomically claims the next email due for delivery.
+        Emails left in sending state beyond lease timeout, e.g. by a crashed worker, are claimed again.
+
+        :return: EmailActionOutbox or None
+        """
+        config = EmailOutbox.get_config()
+        now = datetime.utcnow()
+        for query in [{"status": "pending", "next_attempt_at__lte": now},
+                      {"status": "sending", "locked_at__lte": now - timedelta(seconds=config['lease_timeout'])}]:
+            email = EmailActionOutbox.objects(**query).order_by("next_attempt_at").modify(
+                set__status="sending", set__locked_at=now, new=True
+            )
+            if email:
+                return email
+        return None
+
+    @staticmethod
+    def deliver(email: EmailActionOutbox):
+        """
+        Delivers email using smtp configuration of its email action.
+        Failed deliveries are scheduled for retry or marked failed.
+
+        :param email: EmailActionOutbox document
+        :return: None
+        """
+        from kairon.shared.actions.utils import ActionUtility
+
+        config = EmailOutbox.get_config()
+        try:
+            action_config = ActionUtility.get_email_action_config(email.bot, email.action_name)
+            key, session = SmtpSessionPool.acquire(action_config['smtp_url'], action_config['smtp_port'],
+                                                   action_config['from_email'], action_config['smtp_password'],
+                                                   action_config.get('smtp_userid'), action_config.get('tls'))
+            try:
+                msg = Utility.prepare_email_message(email.to_email, email.subject, email.body,
+                                                    action_config['from_email'])
+                session.sendmail(action_config['from_email'], email.to_email, msg)
+            except Exception:
+                SmtpSessionPool.close(session)
+                raise
+            SmtpSessionPool.release(key, session)
+            email.update(set__status="sent", inc__attempts=1, unset__exception=True)
+        except Exception as e:
+            logger.exception(e)
+            attempts = email.attempts + 1
+            if attempts < config['max_retries']:
+                next_attempt_at = datetime.utcnow() + timedelta(seconds=config['retry_backoff'] * 2 ** (attempts - 1))
+                email.update(set__status="pending", set__attempts=attempts, set__next_attempt_at=next_attempt_at,
+                             set__exception=str(e))
+            else:
+                email.update(set__status="failed", set__attempts=attempts, set__exception=str(e))
+
+    @staticmethod
+    def __run():
+        poll_interval = EmailOutbox.get_config()['poll_interval']
+        while not EmailOutbox.stop_event.is_set():
+            try:
+                email = EmailOutbox.claim()
+            except Exception as e:
+                logger.exception(e)
+                email = None
+            if email:
+                EmailOutbox.deliver(email)
+                continue
+            EmailOutbox.wake_up.wait(poll_interval)
+            EmailOutbox.wake_up.clear()
@@ -3,3 +3,10 @@ class ActionFailure(Exception):
     Sub class for all exception that are raised for HTTP action
     """
     pass
+
+
+class ActionHttpFailure(ActionFailure):
+    """
+    Raised when the http service of an action failed: connection errors, timeouts and 5xx responses
+    """
+    pass
@@ -0,0 +1,168 @@
+import atexit
+import time
+from queue import Queue, Empty, Full
+from threading import Thread, RLock
+
+from loguru import logger
+
+from kairon.shared.actions.data_objects import ActionServerLogs
+from kairon.shared.utils import Utility
+
+
+class ActionLogWriter:
+    """
+    Background sink for ActionServerLogs.
+    Logs are buffered in a bounded queue and bulk inserted by a writer thread,
+    either when batch_size logs are pending or flush_interval_ms has elapsed.
+    When the queue is full, writes wait for block_ms and are dropped afterwards.
+    """
+
+    queue = None
+    thread = None
+    lock = RLock()
+    written = 0
+    dropped = 0
+    failed = 0
+    __flush = object()
+    __stop = object()
+
+    @staticmethod
+    def get_config():
+        """
+        Reads action log writer settings from system.yaml.
+
+        :return: dict with async, batch_size, flush_interval_ms, queue_size and block_ms
+        """
+        config = Utility.environment['action'].get('logs', {})
+        return {
+            "async": config.get('async', True),
+            "batch_size": int(config.get('batch_size', 100)),
+            "flush_interval_ms": float(config.get('flush_interval_ms', 500)),
+            "queue_size": int(config.get('queue_size', 10000)),
+            "block_ms": float(config.get('block_ms', 0))
+        }
+
+    @staticmethod
+    def write(log: ActionServerLogs):
+        """
+        Queues log for bulk insertion.
+        Log is saved inline when async writes are disabled.
+
+        :param log: ActionServerLogs document
+        :return: None
+        """
+        config = ActionLogWriter.get_config()
+        if not config['async']:
+            log.save()
+            return
+
+        log.validate()
+        ActionLogWriter.start()
+        try:
+            if config['block_ms'] > 0:
+                ActionLogWriter.queue.put(log, timeout=config['block_ms'] / 1000)
+            else:
+                ActionLogWriter.queue.put_nowait(log)
+        except Full:
+            ActionLogWriter.dropped += 1
+            logger.warning(f"Action log queue is full, dropped {ActionLogWriter.dropped} logs so far")
+
+    @staticmethod
+    def start():
+        """
+        Starts writer thread, if not already running.
+
+        :return: None
+        """
+        with ActionLogWriter.lock:
+            if ActionLogWriter.thread and ActionLogWriter.thread.is_alive():
+                return
+            if ActionLogWriter.queue is None:
+                ActionLogWriter.queue = Queue(maxsize=ActionLogWriter.get_config()['queue_size'])
+                atexit.register(ActionLogWriter.stop)
+            ActionLogWriter.thread = Thread(target=ActionLogWriter.__run, name="action-log-writer", daemon=True)
+            ActionLogWriter.thread.start()
+
+    @staticmethod
+    def flush():
+        """
+        Blocks until all queued logs are written.
+
+        :return: None
+        """
+        if ActionLogWriter.thread and ActionLogWriter.thread.is_alive():
+            ActionLogWriter.queue.put(ActionLogWriter.__flush)
+            ActionLogWriter.queue.join()
+
+    @staticmethod
+    def stop():
+        """
+        Writes all queued logs and stops writer thread.
+
+        :return: None
+        """
+        with ActionLogWriter.lock:
+            thread = ActionLogWriter.thread
+            if thread and thread.is_alive():
+                ActionLogWriter.queue.put(ActionLogWriter.__stop)
+                thread.join()
+            ActionLogWriter.thread = None
+
+    @staticmethod
+    def stats():
+        """
+        Fetches writer statistics.
+
+        :return: dict with pending, written, dropped and failed logs
+        """
+        return {
+            "pending": ActionLogWriter.queue.qsize() if ActionLogWriter.queue else 0,
+            "written": ActionLogWriter.written,
+            "dropped": ActionLogWriter.dropped,
+            "failed": ActionLogWriter.failed
+        }
+
+    @staticmethod
+    def __run():
+        config = ActionLogWriter.get_config()
+        interval = config['flush_interval_ms'] / 1000
+        queue = ActionLogWriter.queue
+        stop = False
+        while not stop:
+            batch = []
+            markers = 0
+            try:
+                item = queue.get(timeout=interval)
+            except Empty:
+                continue
+            deadline = time.monotonic() + interval
+            while True:
+                if item is ActionLogWriter.__stop:
+                    markers += 1
+                    stop = True
+                    break
+                elif item is ActionLogWriter.__flush:
+                    markers += 1
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= config['batch_size'] or remaining <= 0:
+                    break
+                try:
+                    item = queue.get(timeout=remaining)
+                except Empty:
+                    break
+            ActionLogWriter.__write(batch)
+            for _ in range(len(batch) + markers):
+                queue.task_done()
+
+    @staticmethod
+    def __write(batch: list):
+        if not batch:
+            return
+        try:
+            ActionServerLogs._get_collection().insert_many([log.to_mongo() for log in batch], ordered=False)
+            ActionLogWriter.written += len(batch)
+        except Exception as e:
+            ActionLogWriter.failed += len(batch)
+            logger.exception(e)
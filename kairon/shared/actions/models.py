@@ -1,6 +1,8 @@
 from enum import Enum
 
 KAIRON_ACTION_RESPONSE_SLOT = "KAIRON_ACTION_RESPONSE"
+MAIN_HTTP_REQUEST = "main"
+CHAT_LOG_SESSION_WINDOW = "session"
 
 
 class ParameterType(str, Enum):
@@ -55,3 +57,9 @@ class SlotValidationOperators(str, Enum):
     is_false = "is_false"
     is_null_or_empty = "is_null_or_empty"
     is_not_null_or_empty = "is_not_null_or_empty"
+
+
+class CircuitBreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import time
+from threading import RLock
+from typing import Text, Any
+
+from cachetools import LRUCache
+
+from kairon.shared.actions.models import CircuitBreakerState
+from kairon.shared.utils import Utility
+
+
+class CircuitBreaker:
+    """
+    Per action circuit breaker for external http calls.
+    Breaker opens after failure_threshold consecutive failures and rejects calls
+    until recovery_timeout seconds have elapsed. It then lets half_open_max_calls
+    trial calls through: a success closes the breaker, a failure opens it again.
+    Only connection errors, timeouts and 5xx responses count as failures.
+    """
+
+    breakers = {}
+    lock = RLock()
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitBreakerState.closed
+        self.failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+        self.rejected = 0
+        self.trips = 0
+
+    @staticmethod
+    def get_config():
+        """
+        Reads circuit breaker settings from system.yaml.
+
+        :return: dict with enable, failure_threshold, recovery_timeout and half_open_max_calls
+        """
+        config = Utility.environment['action'].get('circuit_breaker', {})
+        return {
+            "enable": config.get('enable', True),
+            "failure_threshold": int(config.get('failure_threshold', 5)),
+            "recovery_timeout": float(config.get('recovery_timeout', 30)),
+            "half_open_max_calls": int(config.get('half_open_max_calls', 1))
+        }
+
+    @staticmethod
+    def get_instance(bot: Text, action_name: Text):
+        """
+        Returns circuit breaker of the action, creating it if required.
+
+        :param bot: bot id
+        :param action_name: action name
+        :return: CircuitBreaker or None when breakers are disabled
+        """
+        config = CircuitBreaker.get_config()
+        if not config['enable']:
+            return None
+        key = (bot, action_name)
+        with CircuitBreaker.lock:
+            if key not in CircuitBreaker.breakers:
+                CircuitBreaker.breakers[key] = CircuitBreaker(config['failure_threshold'],
+                                                              config['recovery_timeout'],
+                                                              config['half_open_max_calls'])
+            return CircuitBreaker.breakers[key]
+
+    def allow_request(self):
+        """
+        Checks whether a call may go through, moving an open breaker
+        to half open once recovery timeout has elapsed.
+
+        :return: boolean
+        """
+        with CircuitBreaker.lock:
+            if self.state == CircuitBreakerState.open:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = CircuitBreakerState.half_open
+                self.half_open_calls = 0
+            if self.state == CircuitBreakerState.half_open:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self.half_open_calls += 1
+            return True
+
+    def record_success(self):
+        """
+        Closes breaker and resets failure count.
+        """
+        with CircuitBreaker.lock:
+            self.state = CircuitBreakerState.closed
+            self.failures = 0
+            self.half_open_calls = 0
+
+    def record_failure(self):
+        """
+        Counts failure, opening the breaker when threshold is reached
+        or when a half open trial call fails.
+        """
+        with CircuitBreaker.lock:
+            self.failures += 1
+            if self.state == CircuitBreakerState.half_open or self.failures >= self.failure_threshold:
+                self.state = CircuitBreakerState.open
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+    def release(self):
+        """
+        Frees half open trial slot of a call that ended without a verdict on
+        the health of the service, such as a cancelled call or a 4xx response.
+        """
+        with CircuitBreaker.lock:
+            if self.state == CircuitBreakerState.half_open and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def stats(self):
+        """
+        Fetches breaker state.
+
+        :return: dict
+        """
+        return {"state": self.state.value, "failures": self.failures, "rejected": self.rejected, "trips": self.trips}
+
+    @staticmethod
+    def all_stats():
+        """
+        Fetches state of all breakers grouped by bot.
+
+        :return: dict
+        """
+        response = {}
+        with CircuitBreaker.lock:
+            for (bot, action_name), breaker in CircuitBreaker.breakers.items():
+                response.setdefault(bot, {})[action_name] = breaker.stats()
+        return response
+
+
+class HttpResponseCache:
+    """
+    Opt-in cache for responses of idempotent GET http actions.
+    Entries are keyed by bot, action, prepared url and headers and
+    expire after the cache_ttl configured on the action.
+    """
+
+    cache = None
+    lock = RLock()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def get_cache():
+        """
+        Returns cache store, initializing it lazily from system.yaml.
+
+        :return: LRUCache
+        """
+        if HttpResponseCache.cache is None:
+            size = Utility.environment['action'].get('response_cache', {}).get('size', 10000)
+            HttpResponseCache.cache = LRUCache(maxsize=int(size))
+        return HttpResponseCache.cache
+
+    @staticmethod
+    def get_key(bot: Text, action_name: Text, http_url: Text, headers: dict = None):
+        headers = json.dumps(headers or {}, sort_keys=True, default=str)
+        return bot, action_name, http_url, hashlib.md5(headers.encode()).hexdigest()
+
+    @staticmethod
+    def get(bot: Text, action_name: Text, http_url: Text, headers: dict = None):
+        """
+        Fetches cached response.
+
+        :param bot: bot id
+        :param action_name: action name
+        :param http_url: url prepared by ActionUtility.prepare_url
+        :param headers: request headers
+        :return: cached response or None
+        """
+        key = HttpResponseCache.get_key(bot, action_name, http_url, headers)
+        with HttpResponseCache.lock:
+            entry = HttpResponseCache.get_cache().get(key)
+            if entry and entry[0] > time.monotonic():
+                HttpResponseCache.hits += 1
+                return entry[1]
+            if entry:
+                HttpResponseCache.get_cache().pop(key, None)
+            HttpResponseCache.misses += 1
+        return None
+
+    @staticmethod
+    def set(bot: Text, action_name: Text, http_url: Text, headers: dict, response: Any, ttl: float):
+        """
+        Caches response for ttl seconds.
+
+        :param bot: bot id
+        :param action_name: action name
+        :param http_url: url prepared by ActionUtility.prepare_url
+        :param headers: request headers
+        :param response: http response
+        :param ttl: time to live in seconds
+        :return: None
+        """
+        key = HttpResponseCache.get_key(bot, action_name, http_url, headers)
+        with HttpResponseCache.lock:
+            HttpResponseCache.get_cache()[key] = (time.monotonic() + ttl, response)
+
+    @staticmethod
+    def stats():
+        """
+        Fetches cache statistics.
+
+        :return: dict with entries, hits and misses
+        """
+        with HttpResponseCache.lock:
+            entries = len(HttpResponseCache.cache) if HttpResponseCache.cache is not None else 0
+        return {"entries": entries, "hits": HttpResponseCache.hits, "misses": HttpResponseCache.misses}
@@ -1,11 +1,15 @@
+import asyncio
 import json
 import logging
 import re
 from datetime import datetime
-from typing import Any, List
+from threading import RLock
+from typing import Any, List, Text
 from urllib.parse import urlencode, quote_plus, unquote_plus
 
 import requests
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, ClientConnectionError, ClientPayloadError
+from cachetools import LRUCache, TTLCache
 from loguru import logger
 from mongoengine import DoesNotExist
 from pymongo.common import _CaseInsensitiveDictionary
@@ -22,8 +26,10 @@ from rasa_sdk import Tracker
 
 from .data_objects import HttpActionConfig, HttpActionRequestBody, Actions, SlotSetAction, FormValidationAction, \
     EmailActionConfig, GoogleSearchAction
-from .exception import ActionFailure
-from .models import ActionType, SlotValidationOperators, LogicalOperators, ActionParameterType
+from .cache import ActionConfigCache
+from .exception import ActionFailure, ActionHttpFailure
+from .models import ActionType, SlotValidationOperators, LogicalOperators, ActionParameterType, \
+    CHAT_LOG_SESSION_WINDOW
 from ..data.constant import SLOT_TYPE
 from ..data.data_objects import Slots
 from json2html import *
@@ -37,6 +43,12 @@ class ActionUtility:
     Utility class to assist executing actions
     """
 
+    http_sessions = {}
+    google_search_clients = LRUCache(maxsize=100)
+    google_search_results = None
+    google_search_lock = RLock()
+    response_placeholder_regex = re.compile(r'\${(.+?)}')
+
     @staticmethod
     def execute_http_request(http_url: str, request_method: str, request_body=None, headers=None):
         """Executes http urls provided.
@@ -79,7 +91,92 @@ class ActionUtility:
         return http_response_as_json
 
     @staticmethod
-    def prepare_request(tracker: Tracker, http_action_config_params: List[HttpActionRequestBody]):
+    def get_http_session():
+        """
+        Returns aiohttp session shared by all http actions running on the current event loop.
+        Session is created lazily with a pooled connector so that connections (and TLS handshakes)
+        are reused across requests. Sessions bound to closed loops are discarded.
+
+        :return: aiohttp ClientSession
+        """
+        loop = asyncio.get_event_loop()
+        for session_loop in [key for key in ActionUtility.http_sessions.keys() if key.is_closed()]:
+            ActionUtility.http_sessions.pop(session_loop, None)
+        session = ActionUtility.http_sessions.get(loop)
+        if not session or session.closed:
+            config = Utility.environment['action'].get('http', {})
+            connector = TCPConnector(limit=int(config.get('pool_size', 100)),
+                                     limit_per_host=int(config.get('pool_size_per_host', 20)),
+                                     keepalive_timeout=float(config.get('keepalive', 30)))
+            timeout = ClientTimeout(total=float(config.get('timeout', 30)),
+                                    connect=float(config.get('connect_timeout', 5)))
+            session = ClientSession(connector=connector, timeout=timeout)
+            ActionUtility.http_sessions[loop] = session
+        return session
+
+    @staticmethod
+    async def close_http_session():
+        """
+        Closes http session bound to the current event loop, if any.
+        """
+        session = ActionUtility.http_sessions.pop(asyncio.get_event_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+    @staticmethod
+    async def execute_http_request_async(http_url: str, request_method: str, request_body=None, headers=None):
+        """Executes http urls provided without blocking the event loop.
+        Connection errors, timeouts and 5xx responses raise ActionHttpFailure.
+
+        :param http_url: HTTP url to be executed
+        :param request_method: One of GET, PUT, POST, DELETE
+        :param request_body: Request body to be sent with the request
+        :param headers: header for the HTTP request
+        :return: JSON/string response
+        """
+        if not headers:
+            headers = {}
+        headers.update({"User-Agent": "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"})
+
+        if request_body is None:
+            request_body = {}
+
+        try:
+            if request_method.lower() == 'get':
+                kwargs = {}
+            elif request_method.lower() in ['post', 'put', 'delete']:
+                kwargs = {"json": request_body}
+            else:
+                raise ActionFailure("Invalid request method!")
+            session = ActionUtility.get_http_session()
+            async with session.request(request_method.upper(), http_url, headers=headers, **kwargs) as response:
+                status_code = response.status
+                response_text = await response.text()
+            logger.debug("raw response: " + str(response_text))
+            logger.debug("status " + str(status_code))
+
+            if status_code >= 500:
+                raise ActionHttpFailure("Got non-200 status code")
+            if status_code not in [200, 202, 201, 204]:
+                raise ActionFailure("Got non-200 status code")
+        except Exception as e:
+            logger.error(str(e))
+            failure = ActionFailure
+            if isinstance(e, (ActionHttpFailure, ClientConnectionError, ClientPayloadError, asyncio.TimeoutError)):
+                failure = ActionHttpFailure
+            raise failure("Failed to execute the url: " + str(e))
+
+        try:
+            http_response_as_json = json.loads(response_text)
+        except ValueError as e:
+            logging.error(str(e))
+            http_response_as_json = response_text
+
+        return http_response_as_json
+
+    @staticmethod
+    def prepare_request(tracker: Tracker, http_action_config_params: List[HttpActionRequestBody],
+                        chat_log: dict = None):
         """
         Prepares request body:
         1. Fetches value of parameter from slot(Tracker) if parameter_type is slot and adds to request body
@@ -88,9 +185,11 @@ class ActionUtility:
         4. Adds value of parameter as user_message.
         :param tracker: Tracker for the Http Action
         :param http_action_config_params: User defined request body parameters <key, value, parameter_type>
+        :param chat_log: dict in which chat log is memoized per window, pass the same dict to share it across requests
         :return: Request body for the HTTP request
         """
         request_body = {}
+        chat_log = {} if chat_log is None else chat_log
 
         for param in http_action_config_params or []:
             if param['parameter_type'] == ActionParameterType.sender_id.value:
@@ -102,12 +201,15 @@ class ActionUtility:
             elif param['parameter_type'] == ActionParameterType.intent.value:
                 value = tracker.get_intent_of_latest_message()
             elif param['parameter_type'] == ActionParameterType.chat_log.value:
-                iat, msg_trail = ActionUtility.prepare_message_trail(tracker.events)
-                value = {
-                    'sender_id': tracker.sender_id,
-                    'session_started': iat,
-                    'conversation': msg_trail
-                }
+                window = (param['value'] or None) if 'value' in param else None
+                if window not in chat_log:
+                    iat, msg_trail = ActionUtility.prepare_message_trail(tracker.events, window)
+                    chat_log[window] = {
+                        'sender_id': tracker.sender_id,
+                        'session_started': iat,
+                        'conversation': msg_trail
+                    }
+                value = chat_log[window]
             else:
                 value = param['value']
             request_body[param['key']] = value
@@ -116,15 +218,35 @@ class ActionUtility:
         return request_body
 
     @staticmethod
-    def prepare_message_trail(tracker_events):
+    def prepare_message_trail(tracker_events, window: Text = None):
+        """
+        Prepares conversation trail from tracker events.
+        Events are scanned from the latest one, so that scanning stops once
+        the window is covered and the latest session start is found.
+
+        :param tracker_events: tracker events
+        :param window: 'session' for current session, number of latest turns or None for complete conversation
+        :return: (latest session start time, message trail)
+        """
+        turns = int(window) if window and str(window).isdigit() else None
         message_trail = []
         initiated_at = None
-        for event in tracker_events:
-            if event.get('event') == 'session_started' and event.get('timestamp'):
-                initiated_at = datetime.utcfromtimestamp(event['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        user_messages = 0
+        for event in reversed(tracker_events or []):
+            if event.get('event') == 'session_started':
+                if event.get('timestamp') and not initiated_at:
+                    initiated_at = datetime.utcfromtimestamp(event['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+                if window == CHAT_LOG_SESSION_WINDOW:
+                    break
             elif event.get('event') == 'user' or event.get('event') == 'bot':
-                message_trail.append({event['event']: event.get('text')})
+                if turns is None or user_messages < turns:
+                    message_trail.append({event['event']: event.get('text')})
+                    if event['event'] == 'user':
+                        user_messages += 1
+            if turns is not None and user_messages >= turns and initiated_at:
+                break
 
+        message_trail.reverse()
         return initiated_at, message_trail
 
     @staticmethod
@@ -235,18 +357,38 @@ class ActionUtility:
 
     @staticmethod
     def get_action_config(bot: str, name: str):
+        """
+        Fetches resolved configuration for the action.
+        Configurations are served from ActionConfigCache and loaded from database on a miss.
+
+        :param bot: bot id
+        :param name: action name
+        :return: (config, action type)
+        """
         if ActionUtility.is_empty(bot) or ActionUtility.is_empty(name):
             raise ActionFailure("Bot and action name are required for fetching configuration")
 
+        return ActionConfigCache.get_or_load(bot, name, lambda: ActionUtility.load_action_config(bot, name))
+
+    @staticmethod
+    def load_action_config(bot: str, name: str):
+        """
+        Loads action configuration from database.
+
+        :param bot: bot id
+        :param name: action name
+        :return: (config, action type)
+        """
         try:
             action = Actions.objects(bot=bot, name=name, status=True).get().to_mongo().to_dict()
             logger.debug("action_config: " + str(action))
             if action.get('type') == ActionType.http_action.value:
                 config = ActionUtility.get_http_action_config(bot, name)
+                config['response_renderer'] = ActionUtility.compile_response_template(config.get('response'))
             elif action.get('type') == ActionType.slot_set_action.value:
                 config = ActionUtility.get_slot_set_config(bot, name)
             elif action.get('type') == ActionType.form_validation_action.value:
-                config = ActionUtility.get_form_validation_config(bot, name)
+                config = list(ActionUtility.get_form_validation_config(bot, name))
             elif action.get('type') == ActionType.email_action.value:
                 config = ActionUtility.get_email_action_config(bot, name)
             elif action.get('type') == ActionType.google_search_action.value:
@@ -295,7 +437,7 @@ class ActionUtility:
     @staticmethod
     def get_form_validation_config(bot: str, name: str):
         action = FormValidationAction.objects(bot=bot, name=name, status=True)
-        logger.debug("form_validation_config: " + str(action.to_json()))
+        logger.opt(lazy=True).debug("form_validation_config: {}", lambda: action.to_json())
         return action
 
     @staticmethod
@@ -331,19 +473,76 @@ class ActionUtility:
 
     @staticmethod
     def perform_google_search(api_key: str, search_engine_id: str, search_term: str, **kwargs):
-        from googleapiclient.discovery import build
+        """
+        Performs google custom search.
+        Results are cached by search engine and normalized search term.
+
+        :param api_key: google api key
+        :param search_engine_id: custom search engine id
+        :param search_term: search term
+        :param kwargs: additional search parameters
+        :return: list of results
+        """
+        import httplib2
+
+        config = Utility.environment['action'].get('google_search', {})
+        key = (search_engine_id, ActionUtility.normalize_search_term(search_term), tuple(sorted(kwargs.items())))
+        if config.get('cache_enable', True):
+            with ActionUtility.google_search_lock:
+                if ActionUtility.google_search_results is None:
+                    ActionUtility.google_search_results = TTLCache(maxsize=int(config.get('cache_size', 1000)),
+                                                                   ttl=float(config.get('cache_ttl', 3600)))
+                results = ActionUtility.google_search_results.get(key)
+            if results is not None:
+                return list(results)
 
         results = []
         try:
-            service = build("customsearch", "v1", developerKey=api_key)
-            search_results = service.cse().list(q=search_term, cx=search_engine_id, **kwargs).execute()
+            service = ActionUtility.get_google_search_client(api_key)
+            search_results = service.cse().list(q=search_term, cx=search_engine_id, **kwargs).execute(
+                http=httplib2.Http()
+            )
             for item in search_results.get('items') or []:
                 results.append({'title': item['title'], 'text': item['snippet'], 'link': item['link']})
         except Exception as e:
             logger.exception(e)
             raise ActionFailure(e)
+
+        if config.get('cache_enable', True):
+            with ActionUtility.google_search_lock:
+                ActionUtility.google_search_results[key] = list(results)
         return results
 
+    @staticmethod
+    def get_google_search_client(api_key: str):
+        """
+        Returns custom search client for the api key, building it from
+        discovery document only once. Client is shared across threads,
+        hence requests should be executed with their own http object.
+
+        :param api_key: google api key
+        :return: custom search resource
+        """
+        from googleapiclient.discovery import build
+
+        with ActionUtility.google_search_lock:
+            service = ActionUtility.google_search_clients.get(api_key)
+            if not service:
+                service = build("customsearch", "v1", developerKey=api_key)
+                ActionUtility.google_search_clients[api_key] = service
+        return service
+
+    @staticmethod
+    def normalize_search_term(search_term: str):
+        """
+        Normalizes search term for caching by lower casing it, collapsing
+        whitespaces and removing trailing punctuation.
+
+        :param search_term: search term
+        :return: normalized search term
+        """
+        return " ".join(search_term.lower().split()).rstrip("?.! ")
+
     @staticmethod
     def format_search_result(results: list):
         link = f'<a href = "{results[0]["link"]}" target="_blank" >{results[0]["title"]}</a>'
@@ -394,6 +593,75 @@ class ActionUtility:
         :param http_response: Response received after executing Http URL.
         :return: Returns a response curated from user defined template and Http response.
         """
+        return ActionUtility.compile_response_template(response_template)(http_response)
+
+    @staticmethod
+    def compile_response_template(response_template: str):
+        """
+        Parses response template once into literal segments and placeholder key paths.
+        The returned renderer substitutes all placeholders in a single pass and produces the
+        same output as substituting them one after another. Responses whose values would form
+        new placeholders in the output are rendered sequentially to preserve that behaviour.
+
+        :param response_template: A string that may contain placeholders. It is basically the user expected output.
+        :return: callable accepting Http response and returning the curated response
+        """
+        if not isinstance(response_template, str):
+            return lambda http_response: ActionUtility.__render_response_sequentially(response_template, http_response)
+
+        segments = ActionUtility.response_placeholder_regex.split(response_template)
+        literals = segments[0::2]
+        keys = segments[1::2]
+        if any('${' in key for key in keys):
+            return lambda http_response: ActionUtility.__render_response_sequentially(response_template, http_response)
+
+        paths = {key: key.split(".") for key in keys if key != 'RESPONSE'}
+        has_response = 'RESPONSE' in keys
+        is_empty = ActionUtility.is_empty(response_template)
+        after_dollar = {key for literal, key in zip(literals, keys) if literal.endswith('$')}
+
+        def is_safe(key, text):
+            return '${' not in text and not text.endswith('$') and not (key in after_dollar and text.startswith('{'))
+
+        def render(http_response):
+            if not paths and not has_response:
+                return http_response if is_empty else response_template
+
+            values = {}
+            if has_response:
+                values['RESPONSE'] = str(http_response)
+                if not is_safe('RESPONSE', values['RESPONSE']):
+                    return ActionUtility.__render_response_sequentially(response_template, http_response)
+            if paths and type(http_response) not in [dict, list]:
+                raise ActionFailure("Could not find value for keys in response")
+
+            try:
+                for key, path in paths.items():
+                    json_search_region = http_response
+                    for step in path:
+                        if isinstance(json_search_region, dict):
+                            json_search_region = json_search_region[step]
+                        else:
+                            json_search_region = json_search_region[int(step)]
+                    if isinstance(json_search_region, dict):
+                        values[key] = json.dumps(json_search_region)
+                    else:
+                        values[key] = str(json_search_region)
+            except Exception as e:
+                raise ActionFailure("Unable to retrieve value for key from HTTP response: " + str(e))
+
+            if not all(is_safe(key, text) for key, text in values.items()):
+                return ActionUtility.__render_response_sequentially(response_template, http_response)
+            parts = [literals[0]]
+            for key, literal in zip(keys, literals[1:]):
+                parts.append(values[key])
+                parts.append(literal)
+            return "".join(parts)
+
+        return render
+
+    @staticmethod
+    def __render_response_sequentially(response_template: str, http_response: Any):
         value_mapping = {}
         parsed_output = ActionUtility.attach_response(response_template, http_response)
         keys_with_placeholders = re.findall(r'\${(.+?)}', parsed_output)
@@ -424,197 +692,220 @@ class ActionUtility:
 
 class ExpressionEvaluator:
 
+    email_regex = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+    compiled_validations = LRUCache(maxsize=1000)
+    lock = RLock()
+
     @staticmethod
     def is_valid_slot_value(slot_type: str, slot_value: Any, semantic_expression: dict):
-        expression_evaluated_as_str = []
-        final_expr = None
-        is_slot_data_valid = True
-
-        if slot_value is None:
-            is_slot_data_valid = False
-
-        if semantic_expression:
-            result = []
-            for parent_operator, expressions in semantic_expression.items():
-                for sub_expression in expressions:
-                    if sub_expression.get(LogicalOperators.and_operator.value):
-                        all_sub_expressions = list(ExpressionEvaluator.__evaluate_expression_list(
-                            sub_expression[LogicalOperators.and_operator.value], slot_type, slot_value
-                        ))
-                        is_valid = all(ex[1] for ex in all_sub_expressions)
-                        expr_str = ExpressionEvaluator.expr_as_str(all_sub_expressions, LogicalOperators.and_operator.value)
-                        expression_evaluated_as_str.append(expr_str)
-                    elif sub_expression.get(LogicalOperators.or_operator.value):
-                        all_sub_expressions = list(ExpressionEvaluator.__evaluate_expression_list(
-                            sub_expression[LogicalOperators.or_operator.value], slot_type, slot_value
-                        ))
-                        is_valid = any(ex[1] for ex in all_sub_expressions)
-                        expr_str = ExpressionEvaluator.expr_as_str(all_sub_expressions, LogicalOperators.or_operator.value)
-                        expression_evaluated_as_str.append(expr_str)
-                    else:
-                        expr_str, is_valid = next(ExpressionEvaluator.__evaluate_expression_list([sub_expression], slot_type, slot_value))
-                        expression_evaluated_as_str.append(expr_str)
-                    result.append(is_valid)
-                if parent_operator == LogicalOperators.and_operator.value:
-                    is_slot_data_valid = all(result)
-                else:
-                    is_slot_data_valid = any(result)
-                final_expr = ExpressionEvaluator.expr_as_str(expression_evaluated_as_str, parent_operator)
-                break
-        return final_expr, is_slot_data_valid
+        is_valid, render = ExpressionEvaluator.compile_slot_validation(slot_type, semantic_expression)(slot_value)
+        return render(), is_valid
 
     @staticmethod
-    def __evaluate_expression_list(expressions: list, slot_type: str, slot_value: Any):
-        for expression in expressions:
-            operator = expression.get('operator')
-            operand = expression.get('value')
-            yield ExpressionEvaluator.__evaluate_expression(slot_type, slot_value, operator, operand)
+    def get_slot_validation(validation: FormValidationAction, slot_type: str):
+        """
+        Returns compiled validation semantic of the FormValidationAction document.
+        Compiled validation is cached per document and slot type, and is recompiled
+        whenever the document is reloaded.
+
+        :param validation: FormValidationAction document
+        :param slot_type: slot type
+        :return: callable accepting slot value and returning (is_valid, render)
+        """
+        semantic = validation.validation_semantic
+        key = (str(validation.pk), slot_type)
+        with ExpressionEvaluator.lock:
+            entry = ExpressionEvaluator.compiled_validations.get(key)
+            if entry and entry[0] is semantic:
+                return entry[1]
+        evaluate = ExpressionEvaluator.compile_slot_validation(slot_type, semantic)
+        with ExpressionEvaluator.lock:
+            ExpressionEvaluator.compiled_validations[key] = (semantic, evaluate)
+        return evaluate
 
     @staticmethod
-    def __evaluate_expression(slot_type: str, slot_value: Any, operator: str, operand: Any):
+    def compile_slot_validation(slot_type: str, semantic_expression: dict):
+        """
+        Compiles validation semantic into a closure.
+        Closure returns whether the slot value is valid along with a callable
+        that renders the evaluated expression as string, so that the expression
+        is only built when it is logged.
+
+        :param slot_type: slot type
+        :param semantic_expression: validation semantic
+        :return: callable accepting slot value and returning (is_valid, render)
+        """
+        if not semantic_expression:
+            return lambda slot_value: (slot_value is not None, lambda: None)
+
+        parent_operator, expressions = next(iter(semantic_expression.items()))
+        sub_expressions = [ExpressionEvaluator.__compile_sub_expression(slot_type, sub_expression)
+                           for sub_expression in expressions]
+        combine = all if parent_operator == LogicalOperators.and_operator.value else any
+
+        def evaluate(slot_value: Any):
+            result = [check(slot_value) for check, _ in sub_expressions]
+            return combine(result), lambda: ExpressionEvaluator.expr_as_str(
+                [describe(slot_value) for _, describe in sub_expressions], parent_operator
+            )
+
+        return evaluate
+
+    @staticmethod
+    def __compile_sub_expression(slot_type: str, sub_expression: dict):
+        for operator, combine in [(LogicalOperators.and_operator.value, all), (LogicalOperators.or_operator.value, any)]:
+            if sub_expression.get(operator):
+                expressions = [ExpressionEvaluator.__compile_expression(slot_type, expression)
+                               for expression in sub_expression[operator]]
+
+                def check_all(slot_value: Any, expressions=expressions, combine=combine):
+                    return combine([check(slot_value) for check, _ in expressions])
+
+                def describe_all(slot_value: Any, expressions=expressions, operator=operator):
+                    return ExpressionEvaluator.expr_as_str(
+                        [describe(slot_value) for _, describe in expressions], operator
+                    )
+
+                return check_all, describe_all
+        return ExpressionEvaluator.__compile_expression(slot_type, sub_expression)
+
+    @staticmethod
+    def __compile_expression(slot_type: str, expression: dict):
+        operator = expression.get('operator')
+        operand = expression.get('value')
         if slot_type in {SLOT_TYPE.TEXT.value, SLOT_TYPE.CATEGORICAL.value, SLOT_TYPE.ANY.value}:
-            expression, is_valid = ExpressionEvaluator.__evaluate_text_type(slot_value, operator, operand)
+            return ExpressionEvaluator.__compile_text_type(operator, operand)
         elif slot_type == SLOT_TYPE.FLOAT.value:
-            expression, is_valid = ExpressionEvaluator.__evaluate_float_type(slot_value, operator, operand)
+            return ExpressionEvaluator.__compile_float_type(operator, operand)
         elif slot_type == SLOT_TYPE.BOOLEAN.value:
-            expression, is_valid = ExpressionEvaluator.__evaluate_boolean_type(slot_value, operator)
+            return ExpressionEvaluator.__compile_boolean_type(operator)
         elif slot_type == SLOT_TYPE.LIST.value:
-            expression, is_valid = ExpressionEvaluator.__evaluate_list_type(slot_value, operator, operand)
-        else:
-            raise ActionFailure(f'Unsupported slot type: {slot_type}')
-        return expression, is_valid
+            return ExpressionEvaluator.__compile_list_type(operator, operand)
+        return ExpressionEvaluator.__failure(f'Unsupported slot type: {slot_type}')
 
     @staticmethod
-    def __evaluate_float_type(slot_value: Any, operator: str, operand: Any):
-        is_valid = False
-        try:
-            slot_value = float(slot_value)
-        except ValueError:
-            return is_valid
-        expression = f'({slot_value} {operator} {operand})'
-        if operator == SlotValidationOperators.equal_to.value:
-            is_valid = slot_value == operand
-        elif operator == SlotValidationOperators.is_greater_than.value:
-            is_valid = slot_value > operand
-        elif operator == SlotValidationOperators.is_less_than.value:
-            is_valid = slot_value < operand
-        elif operator == SlotValidationOperators.is_in.value:
-            is_valid = slot_value in operand
-        elif operator == SlotValidationOperators.is_not_in.value:
-            is_valid = slot_value not in operand
-        else:
-            raise ActionFailure(f'Cannot evaluate invalid operator "{operator}" for slot type "float"')
-        return expression, is_valid
+    def __failure(message: str):
+        def raise_failure(slot_value: Any):
+            raise ActionFailure(message)
+
+        return raise_failure, raise_failure
+
+    @staticmethod
+    def __compile_float_type(operator: str, operand: Any):
+        checks = {
+            SlotValidationOperators.equal_to.value: lambda value: value == operand,
+            SlotValidationOperators.is_greater_than.value: lambda value: value > operand,
+            SlotValidationOperators.is_less_than.value: lambda value: value < operand,
+            SlotValidationOperators.is_in.value: lambda value: value in operand,
+            SlotValidationOperators.is_not_in.value: lambda value: value not in operand,
+        }
+        check = checks.get(operator)
+        if not check:
+            check, _ = ExpressionEvaluator.__failure(
+                f'Cannot evaluate invalid operator "{operator}" for slot type "float"'
+            )
+
+        def to_float(slot_value: Any):
+            try:
+                return float(slot_value)
+            except ValueError:
+                raise TypeError(f'Cannot evaluate non numeric value "{slot_value}" for slot type "float"')
+
+        return lambda slot_value: check(to_float(slot_value)), \
+            lambda slot_value: f'({to_float(slot_value)} {operator} {operand})'
 
     @staticmethod
-    def __evaluate_text_type(slot_value: Any, operator: str, operand: Any):
+    def __compile_text_type(operator: str, operand: Any):
         if operator == SlotValidationOperators.equal_to.value:
-            expression = f'("{slot_value}" {operator} "{operand}")'
-            is_valid = slot_value == operand
+            return lambda value: value == operand, lambda value: f'("{value}" {operator} "{operand}")'
         elif operator == SlotValidationOperators.not_equal_to.value:
-            expression = f'("{slot_value}" {operator} "{operand}")'
-            is_valid = slot_value != operand
+            return lambda value: value != operand, lambda value: f'("{value}" {operator} "{operand}")'
         elif operator == SlotValidationOperators.case_insensitive_equals.value:
-            slot_value = slot_value.lower() if slot_value else slot_value
-            expression = f'("{slot_value}" == "{operand.lower()}")'
-            is_valid = slot_value == operand.lower()
+            return lambda value: (value.lower() if value else value) == operand.lower(), \
+                lambda value: f'("{value.lower() if value else value}" == "{operand.lower()}")'
         elif operator == SlotValidationOperators.contains.value:
-            expression = f'("{operand}" in "{slot_value}")'
-            is_valid = operand in slot_value if slot_value else False
+            return lambda value: operand in value if value else False, \
+                lambda value: f'("{operand}" in "{value}")'
         elif operator == SlotValidationOperators.starts_with.value:
-            expression = f'("{slot_value}".startswith("{operand}"))'
-            is_valid = slot_value.startswith(operand) if slot_value else False
+            return lambda value: value.startswith(operand) if value else False, \
+                lambda value: f'("{value}".startswith("{operand}"))'
         elif operator == SlotValidationOperators.ends_with.value:
-            expression = f'("{slot_value}".endswith("{operand}"))'
-            is_valid = slot_value.endswith(operand) if slot_value else False
+            return lambda value: value.endswith(operand) if value else False, \
+                lambda value: f'("{value}".endswith("{operand}"))'
         elif operator == SlotValidationOperators.has_length.value:
-            expression = f'(len("{slot_value}") == {operand})'
-            is_valid = len(slot_value) == operand if slot_value else False
+            return lambda value: len(value) == operand if value else False, \
+                lambda value: f'(len("{value}") == {operand})'
         elif operator == SlotValidationOperators.has_length_greater_than.value:
-            expression = f'(len("{slot_value}") > {operand})'
-            is_valid = len(slot_value) > operand if slot_value else False
+            return lambda value: len(value) > operand if value else False, \
+                lambda value: f'(len("{value}") > {operand})'
         elif operator == SlotValidationOperators.has_length_less_than.value:
-            expression = f'(len("{slot_value}") < {operand})'
-            is_valid = len(slot_value) < operand if slot_value else False
+            return lambda value: len(value) < operand if value else False, \
+                lambda value: f'(len("{value}") < {operand})'
         elif operator == SlotValidationOperators.has_no_whitespace.value:
-            expression = f'(" " not in "{slot_value}")'
-            is_valid = " " not in slot_value if slot_value else False
+            return lambda value: " " not in value if value else False, \
+                lambda value: f'(" " not in "{value}")'
         elif operator == SlotValidationOperators.is_in.value:
-            expression = f'("{slot_value}" in {operand})'
-            is_valid = slot_value in operand
+            return lambda value: value in operand, lambda value: f'("{value}" in {operand})'
         elif operator == SlotValidationOperators.is_not_in.value:
-            expression = f'("{slot_value}" not in {operand})'
-            is_valid = slot_value not in operand
+            return lambda value: value not in operand, lambda value: f'("{value}" not in {operand})'
         elif operator == SlotValidationOperators.is_not_null_or_empty.value:
-            expression = f'(is_empty({slot_value}))'
-            is_valid = not ActionUtility.is_empty(slot_value)
+            return lambda value: not ActionUtility.is_empty(value), lambda value: f'(is_empty({value}))'
         elif operator == SlotValidationOperators.is_null_or_empty.value:
-            expression = f'(is_empty({slot_value}))'
-            is_valid = ActionUtility.is_empty(slot_value)
+            return lambda value: ActionUtility.is_empty(value), lambda value: f'(is_empty({value}))'
         elif operator == SlotValidationOperators.is_an_email_address.value:
-            expression = f'(is_an_email_address({slot_value}))'
-            regex = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            is_valid = True if slot_value and re.fullmatch(regex, slot_value) else False
+            regex = ExpressionEvaluator.email_regex
+            return lambda value: True if value and regex.fullmatch(value) else False, \
+                lambda value: f'(is_an_email_address({value}))'
         elif operator == SlotValidationOperators.matches_regex.value:
-            expression = f'({slot_value}.matches_regex({operand}))'
-            is_valid = True if slot_value and re.fullmatch(operand, slot_value) else False
-        else:
-            raise ActionFailure(f'Cannot evaluate invalid operator "{operator}" for current slot type')
-
-        return expression, is_valid
+            try:
+                fullmatch = re.compile(operand).fullmatch
+            except (TypeError, re.error):
+                def fullmatch(value: Any):
+                    return re.fullmatch(operand, value)
+            return lambda value: True if value and fullmatch(value) else False, \
+                lambda value: f'({value}.matches_regex({operand}))'
+        return ExpressionEvaluator.__failure(f'Cannot evaluate invalid operator "{operator}" for current slot type')
 
     @staticmethod
-    def __evaluate_boolean_type(slot_value: Any, operator: str):
+    def __compile_boolean_type(operator: str):
         if operator == SlotValidationOperators.is_true.value:
-            expression = f'({slot_value} is true)'
-            is_valid = slot_value and str(slot_value) == "true"
+            return lambda value: value and str(value) == "true", lambda value: f'({value} is true)'
         elif operator == SlotValidationOperators.is_false.value:
-            expression = f'({slot_value} is False)'
-            is_valid = slot_value and str(slot_value) == "false"
+            return lambda value: value and str(value) == "false", lambda value: f'({value} is False)'
         elif operator == SlotValidationOperators.is_null_or_empty.value:
-            expression = f'(is_empty({slot_value}))'
-            is_valid = not slot_value
+            return lambda value: not value, lambda value: f'(is_empty({value}))'
         elif operator == SlotValidationOperators.is_not_null_or_empty.value:
-            expression = f'(is_not_empty({slot_value}))'
-            is_valid = slot_value and bool(slot_value)
-        else:
-            raise ActionFailure(f'Cannot evaluate invalid operator: "{operator}" for slot type "boolean"')
-
-        return expression, is_valid
+            return lambda value: value and bool(value), lambda value: f'(is_not_empty({value}))'
+        return ExpressionEvaluator.__failure(f'Cannot evaluate invalid operator: "{operator}" for slot type "boolean"')
 
     @staticmethod
-    def __evaluate_list_type(slot_value: Any, operator: str, operand: Any):
+    def __compile_list_type(operator: str, operand: Any):
         if operator == SlotValidationOperators.equal_to.value:
-            expression = f'({slot_value} == {operand})'
-            is_valid = slot_value == operand if slot_value else False
+            return lambda value: value == operand if value else False, lambda value: f'({value} == {operand})'
         elif operator == SlotValidationOperators.contains.value:
-            expression = f'({operand} in {slot_value})'
-            is_valid = operand in slot_value if slot_value else False
+            return lambda value: operand in value if value else False, lambda value: f'({operand} in {value})'
         elif operator == SlotValidationOperators.has_length.value:
-            expression = f'(len({slot_value}) == {operand})'
-            is_valid = len(slot_value) == operand if slot_value else False
+            return lambda value: len(value) == operand if value else False, \
+                lambda value: f'(len({value}) == {operand})'
         elif operator == SlotValidationOperators.has_length_greater_than.value:
-            expression = f'(len({slot_value}) > {operand})'
-            is_valid = len(slot_value) > operand if slot_value else False
+            return lambda value: len(value) > operand if value else False, \
+                lambda value: f'(len({value}) > {operand})'
         elif operator == SlotValidationOperators.has_length_less_than.value:
-            expression = f'(len({slot_value}) < {operand})'
-            is_valid = len(slot_value) < operand if slot_value else False
+            return lambda value: len(value) < operand if value else False, \
+                lambda value: f'(len({value}) < {operand})'
         elif operator == SlotValidationOperators.is_in.value:
-            expression = f'({slot_value} in {operand})'
-            is_valid = False if slot_value and set(slot_value).difference(set(operand)) else True
+            return lambda value: False if value and set(value).difference(set(operand)) else True, \
+                lambda value: f'({value} in {operand})'
         elif operator == SlotValidationOperators.is_not_in.value:
-            expression = f'({slot_value} not in {operand})'
-            is_valid = True if slot_value and set(slot_value).difference(set(operand)) else False
+            return lambda value: True if value and set(value).difference(set(operand)) else False, \
+                lambda value: f'({value} not in {operand})'
         elif operator == SlotValidationOperators.is_null_or_empty.value:
-            expression = f'(is_null_or_empty({operand}))'
-            is_valid = False if (slot_value and list(slot_value)) else True
+            return lambda value: False if (value and list(value)) else True, \
+                lambda value: f'(is_null_or_empty({operand}))'
         elif operator == SlotValidationOperators.is_not_null_or_empty.value:
-            expression = f'(is_not_null_or_empty({operand}))'
-            is_valid = True if (slot_value and list(slot_value)) else False
-        else:
-            raise ActionFailure(f'Cannot evaluate invalid operator: "{operator}" for slot type "list"')
-
-        return expression, is_valid
+            return lambda value: True if (value and list(value)) else False, \
+                lambda value: f'(is_not_null_or_empty({operand}))'
+        return ExpressionEvaluator.__failure(f'Cannot evaluate invalid operator: "{operator}" for slot type "list"')
 
     @staticmethod
     def expr_as_str(sub_expressions: list, operator: str):
@@ -621,6 +621,7 @@ class TrainingDataGenerator(Document):
 class BotSettings(Document):
     ignore_utterances = BooleanField(default=False)
     force_import = BooleanField(default=False)
+    micro_batching = BooleanField(default=False)
     bot = StringField(required=True)
     user = StringField(required=True)
     timestamp = DateTimeField(default=datetime.utcnow)
@@ -38,7 +38,7 @@ from kairon.exceptions import AppException
 from kairon.shared.importer.processor import DataImporterLogProcessor
 from kairon.importer.validator.file_validator import TrainingDataValidator
 from kairon.shared.actions.data_objects import HttpActionConfig, HttpActionRequestBody, ActionServerLogs, Actions, \
-    SlotSetAction, FormValidationAction, EmailActionConfig, GoogleSearchAction
+    SlotSetAction, FormValidationAction, EmailActionConfig, GoogleSearchAction, HttpActionSubRequest
 from kairon.shared.actions.models import KAIRON_ACTION_RESPONSE_SLOT, ActionType
 from kairon.shared.models import StoryEventType, TemplateType
 from kairon.shared.utils import Utility
@@ -2503,6 +2503,10 @@ class MongoProcessor:
         http_action.headers = headers
         http_action.http_url = request_data.http_url
         http_action.response = request_data.response
+        http_action.cache_ttl = request_data.cache_ttl
+        http_action.requests = MongoProcessor.__prepare_http_sub_requests(
+            [request.dict() for request in request_data.requests or []]
+        )
         http_action.user = user
         http_action.status = True
         http_action.bot = bot
@@ -2541,6 +2545,8 @@ class MongoProcessor:
             request_method=http_action_config['request_method'],
             params_list=http_action_params,
             headers=headers,
+            cache_ttl=http_action_config.get('cache_ttl'),
+            requests=MongoProcessor.__prepare_http_sub_requests(http_action_config.get("requests")),
             bot=bot,
             user=user
         ).save().to_mongo().to_dict()["_id"].__str__()
@@ -2551,6 +2557,27 @@ class MongoProcessor:
                       raise_exception_if_exists=False)
         return doc_id
 
+    @staticmethod
+    def __prepare_http_sub_requests(requests: List[Dict]):
+        """
+        Creates sub requests that are executed concurrently with the main request of an Http action.
+
+        :param requests: list of dict with name, http_url, request_method, params_list and headers
+        :return: list of HttpActionSubRequest
+        """
+        return [
+            HttpActionSubRequest(
+                name=request['name'],
+                http_url=request['http_url'],
+                request_method=request['request_method'],
+                params_list=[HttpActionRequestBody(key=param['key'], value=param.get('value'),
+                                                   parameter_type=param['parameter_type'])
+                             for param in request.get('params_list') or []],
+                headers=[HttpActionRequestBody(key=param['key'], value=param.get('value'),
+                                               parameter_type=param['parameter_type'])
+                         for param in request.get('headers') or []])
+            for request in requests or []]
+
     def delete_http_action_config(self, action: str, user: str, bot: str):
         """
         Soft deletes configuration for Http action.
@@ -2897,6 +2924,8 @@ class MongoProcessor:
                 http_obj.http_url = actions['http_url']
                 http_obj.response = actions['response']
                 http_obj.request_method = actions['request_method']
+                http_obj.cache_ttl = actions.get('cache_ttl')
+                http_obj.requests = MongoProcessor.__prepare_http_sub_requests(actions.get('requests'))
                 if actions.get('params_list'):
                     request_body_list = []
                     for parameters in actions['params_list']:
@@ -2933,6 +2962,8 @@ class MongoProcessor:
                 http_dict['headers'] = item['headers']
             if item.get('params_list'):
                 http_dict['params_list'] = item['params_list']
+            if item.get('requests'):
+                http_dict['requests'] = item['requests']
             action_list.append(http_dict)
         http_action = {"http_actions": action_list} if action_list else {}
         return http_action
@@ -51,6 +51,24 @@ def push_notification(sender, document, **kwargs):
             logger.exception(e)
 
 
+@handler(signals.post_save)
+def invalidate_action_config(sender, document, **kwargs):
+    from kairon.shared.actions.cache import ActionConfigCache
+
+    ActionConfigCache.invalidate(document.bot)
+
+
+def invalidate_bulk_action_config(sender, bot):
+    """
+    Invalidates action configurations of the bot after queryset updates and deletes,
+    which do not raise post_save, if sender is an action configuration.
+    """
+    from kairon.shared.actions.cache import ActionConfigCache
+
+    if invalidate_action_config in signals.post_save.receivers_for(sender):
+        ActionConfigCache.invalidate(bot)
+
+
 def push_bulk_update_notification(sender, documents, **kwargs):
     from kairon import Utility
 
@@ -0,0 +1,228 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Text, Optional, List
+
+from cachetools import LRUCache
+from loguru import logger
+from pymongo import MongoClient
+from pymongo.database import Database
+from rasa.core.tracker_store import MongoTrackerStore
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.trackers import DialogueStateTracker, EventVerbosity
+
+from kairon.exceptions import AppException
+from kairon.shared.utils import Utility
+
+
+class KaironMongoTrackerStore(MongoTrackerStore):
+    """
+    Mongo tracker store sharing a single connection pool across all bots in the process.
+    Writes are done in background writer threads so that saving a tracker does not block
+    the event loop. Only events not stored yet are appended with $push, guarded by the
+    version of the tracker document, which counts its stored events. A retrieve waits only
+    for the pending write of its own sender, and fails if that write failed. Trackers are
+    never served from memory, as the sender may also be served by another process.
+    """
+
+    client = None
+    writers = []
+    pending = {}
+    versions = None
+    lock = Lock()
+
+    def __init__(self, domain: Domain, bot: Text, event_broker=None):
+        config = Utility.get_local_db()
+        super(MongoTrackerStore, self).__init__(domain, event_broker)
+        self.db = Database(KaironMongoTrackerStore.get_client(), config['db'])
+        self.collection = bot
+        self._ensure_indices()
+
+    @staticmethod
+    def get_client() -> MongoClient:
+        """
+        fetches connection pool shared by tracker stores of all bots
+
+        :return: MongoClient
+        """
+        with KaironMongoTrackerStore.lock:
+            if KaironMongoTrackerStore.client is None:
+                config = Utility.get_local_db()
+                KaironMongoTrackerStore.client = MongoClient(
+                    config['host'],
+                    username=config.get('username'),
+                    password=config.get('password'),
+                    authSource=config['options'].get("authSource") if config['options'].get("authSource") else "admin",
+                    maxPoolSize=int((Utility.environment.get('tracker_store') or {}).get('pool_size') or 100),
+                    connect=False
+                )
+            return KaironMongoTrackerStore.client
+
+    @staticmethod
+    def get_writer(sender_id: Text) -> ThreadPoolExecutor:
+        """
+        fetches writer thread for the sender. Writes of a sender always go
+        to the same single threaded writer, hence are applied in order.
+
+        :param sender_id: sender id
+        :return: ThreadPoolExecutor
+        """
+        with KaironMongoTrackerStore.lock:
+            if not KaironMongoTrackerStore.writers:
+                num_writers = int((Utility.environment.get('tracker_store') or {}).get('writers') or 4)
+                KaironMongoTrackerStore.writers = [
+                    ThreadPoolExecutor(1, thread_name_prefix=f"tracker_writer_{i}") for i in range(num_writers)
+                ]
+        writers = KaironMongoTrackerStore.writers
+        return writers[hash(sender_id) % len(writers)]
+
+    @staticmethod
+    def get_versions() -> LRUCache:
+        """
+        fetches version of the tracker document and number of events of the tracker
+        stored, as of the last retrieve or write of each sender in this process
+
+        :return: LRUCache keyed by collection and sender id
+        """
+        with KaironMongoTrackerStore.lock:
+            if KaironMongoTrackerStore.versions is None:
+                size = int((Utility.environment.get('tracker_store') or {}).get('versions_cache_size') or 10000)
+                KaironMongoTrackerStore.versions = LRUCache(maxsize=size)
+            return KaironMongoTrackerStore.versions
+
+    def save(self, tracker: DialogueStateTracker, timeout: Optional[float] = None) -> None:
+        """
+        appends new events of the tracker in background
+
+        :param tracker: conversation tracker
+        :param timeout: not used
+        :return: None
+        """
+        if self.event_broker:
+            self.stream_events(tracker)
+        state = self._current_tracker_state_without_events(tracker)
+        events = [event.as_dict() for event in tracker.events]
+        key = (self.collection, tracker.sender_id)
+        future = KaironMongoTrackerStore.get_writer(tracker.sender_id).submit(
+            self.__write, tracker.sender_id, state, events
+        )
+        with KaironMongoTrackerStore.lock:
+            KaironMongoTrackerStore.pending[key] = future
+        future.add_done_callback(lambda f: KaironMongoTrackerStore.__complete(key, f))
+
+    def __write(self, sender_id: Text, state: dict, events: List[dict]):
+        """
+        appends events of the tracker not stored yet. The push is conditional on the version
+        of the tracker document, which is read again and retried when another process
+        appended in between. The events appended are never recomputed from the stored
+        events, so events of this tracker are neither dropped nor duplicated on conflict.
+        A failed write leaves the version unchanged, hence the next save retries its events.
+        """
+        key = (self.collection, sender_id)
+        versions = KaironMongoTrackerStore.get_versions()
+        with KaironMongoTrackerStore.lock:
+            stored = versions.get(key)
+        version, stored_count = stored if stored else self.__read_version(sender_id)
+        additional_events = events[stored_count:]
+        retries = int((Utility.environment.get('tracker_store') or {}).get('write_retries') or 3)
+        for _ in range(retries):
+            update = {"$set": dict(state), "$inc": {"version": len(additional_events)}}
+            if additional_events:
+                update["$push"] = {"events": {"$each": additional_events}}
+            session_starts = [i for i, event in enumerate(additional_events) if event.get("event") == "session_started"]
+            if session_starts:
+                update["$set"]["session_start"] = version + session_starts[-1]
+            result = self.conversations.update_one(
+                {"sender_id": sender_id, "version": version}, update, upsert=not version
+            )
+            if result.matched_count or result.upserted_id is not None:
+                with KaironMongoTrackerStore.lock:
+                    versions[key] = (version + len(additional_events), len(events))
+                return
+            version, _ = self.__read_version(sender_id)
+        raise AppException(f"Tracker of {sender_id} was modified concurrently, {retries} writes failed")
+
+    def __read_version(self, sender_id: Text):
+        """
+        reads version of the tracker document and number of events stored since the
+        last session start, without reading the events. Documents stored before
+        versioning are versioned first.
+        """
+        stored = self.conversations.find_one({"sender_id": sender_id}, {"version": 1, "session_start": 1})
+        if stored is None:
+            return 0, 0
+        if stored.get("version") is None:
+            stored = self.__add_version(stored["_id"])
+        return stored["version"], stored["version"] - stored.get("session_start", 0)
+
+    def __add_version(self, _id):
+        stored = self.conversations.find_one({"_id": _id}, {"events.event": 1})
+        events = stored.get("events") or []
+        version = len(events)
+        session_start = version - KaironMongoTrackerStore.count_events_since_session_start(events)
+        self.conversations.update_one(
+            {"_id": _id, "version": {"$exists": False}, "events": {"$size": version}},
+            {"$set": {"version": version, "session_start": session_start}}
+        )
+        return self.conversations.find_one({"_id": _id}, {"version": 1, "session_start": 1})
+
+    @staticmethod
+    def count_events_since_session_start(events: List[dict]) -> int:
+        """
+        counts stored events since the last session start, which are the events retrieved trackers begin with
+
+        :param events: stored events
+        :return: number of events
+        """
+        for i in range(len(events) - 1, -1, -1):
+            if events[i].get("event") == "session_started":
+                return len(events) - i
+        return len(events)
+
+    @staticmethod
+    def __complete(key: tuple, future):
+        """
+        drops the pending write once done. A failed write is kept,
+        so that the next retrieve of the sender raises it.
+        """
+        if future.exception():
+            logger.error(f"Failed to save tracker of {key[1]}: {future.exception()}")
+            return
+        with KaironMongoTrackerStore.lock:
+            if KaironMongoTrackerStore.pending.get(key) is future:
+                del KaironMongoTrackerStore.pending[key]
+
+    def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        """
+        retrieves tracker from mongo. Waits only for the pending write of the sender,
+        if any, and raises if that write failed rather than serving a tracker without it.
+
+        :param sender_id: sender id
+        :return: conversation tracker
+        """
+        key = (self.collection, sender_id)
+        with KaironMongoTrackerStore.lock:
+            future = KaironMongoTrackerStore.pending.get(key)
+        if future is not None:
+            try:
+                future.result()
+            except Exception as e:
+                with KaironMongoTrackerStore.lock:
+                    if KaironMongoTrackerStore.pending.get(key) is future:
+                        del KaironMongoTrackerStore.pending[key]
+                raise AppException(f"Failed to save tracker of {sender_id}: {e}")
+        stored = self.conversations.find_one({"sender_id": sender_id})
+        if stored is None:
+            return None
+        events = stored.get("events") or []
+        count = KaironMongoTrackerStore.count_events_since_session_start(events)
+        if stored.get("version") is not None:
+            versions = KaironMongoTrackerStore.get_versions()
+            with KaironMongoTrackerStore.lock:
+                versions[key] = (stored["version"], count)
+        return DialogueStateTracker.from_dict(sender_id, events[len(events) - count:], self.domain.slots)
+
+    @staticmethod
+    def _current_tracker_state_without_events(tracker: DialogueStateTracker) -> dict:
+        state = tracker.current_state(EventVerbosity.NONE)
+        state.pop("events", None)
+        return state
@@ -321,6 +321,22 @@ class Utility:
         logger.info(f"deleting data from path: {path}")
         shutil.rmtree(path)
 
+    @staticmethod
+    def get_directory_size(path: Text):
+        """
+        computes total size of the files in directory
+
+        :param path: directory path
+        :return: size in bytes
+        """
+        size = 0
+        for root, _, files in os.walk(path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                if not os.path.islink(file_path):
+                    size += os.path.getsize(file_path)
+        return size
+
     @staticmethod
     def load_file_in_memory(file: Text):
         """
@@ -346,7 +362,7 @@ class Utility:
         :param user: user id
         :return: NONE
         """
-        from kairon.shared.data.signals import push_bulk_update_notification
+        from kairon.shared.data.signals import push_bulk_update_notification, invalidate_bulk_action_config
 
         for document in documents:
             kwargs['bot'] = bot
@@ -358,6 +374,7 @@ class Utility:
             if fetched_documents.count() > 0:
                 list(fetched_documents)
                 fetched_documents.update(**update)
+                invalidate_bulk_action_config(document, bot)
                 kwargs['event_type'] = 'delete'
                 push_bulk_update_notification(document, fetched_documents, **kwargs)
 
@@ -371,11 +388,14 @@ class Utility:
         :param user: user id
         :return: NONE
         """
+        from kairon.shared.data.signals import invalidate_bulk_action_config
+
         for document in documents:
             kwargs['bot'] = bot
             fetched_documents = document.objects(**kwargs)
             if fetched_documents.count() > 0:
                 fetched_documents.delete()
+                invalidate_bulk_action_config(document, bot)
 
     def extract_db_config(uri: str):
         """
@@ -462,17 +482,9 @@ class Utility:
         :param domain: domain data
         :return: mongo tracker
         """
-        from rasa.core.tracker_store import MongoTrackerStore
-        config = Utility.get_local_db()
-        return MongoTrackerStore(
-            domain=domain,
-            host=config['host'],
-            db=config['db'],
-            collection=bot,
-            username=config.get('username'),
-            password=config.get('password'),
-            auth_source=config['options'].get("authSource") if config['options'].get("authSource") else "admin"
-        )
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        return KaironMongoTrackerStore(domain=domain, bot=bot)
 
     @staticmethod
     def special_match(strg, search=re.compile(r"[^a-zA-Z0-9_]").search):
@@ -691,15 +703,29 @@ class Utility:
                    smtp_userid else
                    sender_email,
                    smtp_password)
-        from_addr = sender_email
+        msg = Utility.prepare_email_message(email, subject, body, sender_email, content_type)
+        smtp.sendmail(sender_email, email, msg)
+        smtp.quit()
+
+    @staticmethod
+    def prepare_email_message(email: str, subject: str, body: str, sender_email: str, content_type='html'):
+        """
+        Builds email message to be sent over SMTP
+
+        :param email: the mail id of the recipient
+        :param subject: the subject of the mail
+        :param body: the body of the mail
+        :param sender_email: the mail id of the sender
+        :param content_type: "plain" or "html" content
+        :return: message as string
+        """
         body = MIMEText(body, content_type)
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
-        msg['From'] = from_addr
+        msg['From'] = sender_email
         msg['To'] = email
         msg.attach(body)
-        smtp.sendmail(from_addr, email, msg.as_string())
-        smtp.quit()
+        return msg.as_string()
 
     @staticmethod
     def initiate_apm_client_config():
@@ -0,0 +1,99 @@
+"""
+Benchmark for history metrics on large synthetic trackers.
+Compares conversation steps computed by the earlier $indexOfArray pairing, which is quadratic
+in events per sender, against HistoryProcessor and times the other paired metrics.
+Requires a running mongo, the collection is dropped and seeded on every run.
+
+python -m stress_test.history_metrics_benchmark --url mongodb://localhost:27017/benchmark --senders 20 --events 5000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from pymongo import MongoClient
+
+from kairon.history.processor import HistoryProcessor
+from kairon.shared.utils import Utility
+
+LEGACY_CONVERSATION_STEPS = [
+    {"$unwind": {"path": "$events", "includeArrayIndex": "arrayIndex"}},
+    {"$match": {"events.event": {"$in": ["user", "bot"]}}},
+    {"$group": {"_id": "$sender_id", "events": {"$push": "$events"}, "allevents": {"$push": "$events"}}},
+    {"$unwind": "$events"},
+    {"$project": {"_id": 1, "events": 1, "following_events": {
+        "$arrayElemAt": ["$allevents", {"$add": [{"$indexOfArray": ["$allevents", "$events"]}, 1]}]
+    }}},
+    {"$project": {"user_event": "$events.event", "bot_event": "$following_events.event"}},
+    {"$match": {"user_event": "user", "bot_event": "bot"}},
+    {"$group": {"_id": "$_id", "event": {"$sum": 1}}},
+    {"$project": {"sender_id": "$_id", "_id": 0, "event": 1}}
+]
+
+
+def generate_tracker(sender_id: str, events: int, start: float):
+    """
+    Generates tracker with sessions of user messages, actions and bot responses.
+    Some user messages go unanswered, so that pairing matters.
+    Timestamps are unique, hence no two events of the tracker are identical.
+    """
+    tracker_events = []
+    timestamp = start
+    while len(tracker_events) < events:
+        timestamp += 1
+        if not tracker_events or random.random() < 0.02:
+            tracker_events.append({"event": "action", "name": "action_session_start", "timestamp": timestamp})
+            continue
+        tracker_events.append({"event": "user", "text": "hi", "timestamp": timestamp,
+                               "parse_data": {"intent": {"name": "greet", "confidence": 0.9}}})
+        if random.random() < 0.8:
+            timestamp += 1
+            tracker_events.append({"event": "action", "name": "utter_greet", "timestamp": timestamp})
+            timestamp += 1
+            tracker_events.append({"event": "bot", "text": "hello", "timestamp": timestamp})
+    return {"sender_id": sender_id, "latest_event_time": timestamp, "events": tracker_events}
+
+
+def timed(method, *args):
+    start = time.perf_counter()
+    result = method(*args)
+    return result, time.perf_counter() - start
+
+
+def run(url: str, collection: str, senders: int, events: int):
+    os.environ["system_file"] = "./kairon/history/tracker.yaml"
+    Utility.load_environment()
+    Utility.environment["tracker"]["url"] = url
+
+    conversations = MongoClient(url).get_database().get_collection(collection)
+    conversations.drop()
+    start = time.time() - 7 * 24 * 60 * 60
+    conversations.insert_many([generate_tracker(f"user_{i}", events, start) for i in range(senders)])
+    print(f"seeded {senders} trackers with {events} events each")
+
+    legacy, legacy_time = timed(lambda: list(conversations.aggregate(LEGACY_CONVERSATION_STEPS, allowDiskUse=True)))
+    (steps, _), steps_time = timed(HistoryProcessor.conversation_steps, collection)
+    key = lambda value: value['sender_id']
+    assert sorted(legacy, key=key) == sorted(steps, key=key), "conversation steps differ"
+    print(f"conversation_steps: legacy {legacy_time:.2f}s, linear {steps_time:.2f}s")
+
+    for method in [HistoryProcessor.conversation_time, HistoryProcessor.user_with_metrics,
+                   HistoryProcessor.engaged_users, HistoryProcessor.engaged_users_range,
+                   HistoryProcessor.successful_conversation_range, HistoryProcessor.flatten_conversations,
+                   HistoryProcessor.average_conversation_step_range, HistoryProcessor.average_conversation_time_range,
+                   HistoryProcessor.user_fallback_dropoff, HistoryProcessor.intents_before_dropoff,
+                   HistoryProcessor.unsuccessful_session]:
+        _, elapsed = timed(method, collection)
+        print(f"{method.__name__}: {elapsed:.2f}s")
+    HistoryProcessor.close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history metrics on synthetic trackers")
+    parser.add_argument("--url", default="mongodb://localhost:27017/benchmark")
+    parser.add_argument("--collection", default="conversations")
+    parser.add_argument("--senders", type=int, default=20)
+    parser.add_argument("--events", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.url, args.collection, args.senders, args.events)
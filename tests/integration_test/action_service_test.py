@@ -1,7 +1,7 @@
 from tornado.test.testing_test import AsyncHTTPTestCase
 from kairon.actions.server import make_app
 from kairon.shared.actions.data_objects import HttpActionConfig, SlotSetAction, Actions, FormValidationAction, \
-    EmailActionConfig, ActionServerLogs, GoogleSearchAction
+    EmailActionConfig, ActionServerLogs, GoogleSearchAction, EmailActionOutbox, HttpActionSubRequest
 from kairon.shared.actions.exception import ActionFailure
 from kairon.shared.actions.models import ActionType
 from kairon.shared.data.data_objects import Slots
@@ -9,7 +9,7 @@ from kairon.shared.utils import Utility
 from kairon.shared.actions.utils import ActionUtility
 from mongoengine import connect
 import json
-import responses
+from aioresponses import aioresponses
 from mock import patch
 import os
 
@@ -29,6 +29,15 @@ class TestActionServer(AsyncHTTPTestCase):
         self.assertEqual(response.code, 200)
         self.assertEqual(response.body.decode("utf8"), 'Kairon Server Running')
 
+    def test_metrics(self):
+        response = self.fetch("/metrics")
+        response_json = json.loads(response.body.decode("utf8"))
+        self.assertEqual(response.code, 200)
+        self.assertTrue(response_json['success'])
+        self.assertEqual(set(response_json['data'].keys()),
+                         {"circuit_breakers", "response_cache", "config_cache", "logs"})
+        self.assertEqual(set(response_json['data']['response_cache'].keys()), {"entries", "hits", "misses"})
+
     def test_http_action_execution(self):
         action_name = "test_run_with_get"
         action = HttpActionConfig(
@@ -55,9 +64,10 @@ class TestActionServer(AsyncHTTPTestCase):
                 }
             }
         })
-        responses.start()
-        responses.add(
-            method=responses.GET,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="GET",
             url=http_url,
             body=resp_msg,
             status=200,
@@ -94,6 +104,7 @@ class TestActionServer(AsyncHTTPTestCase):
         with patch.object(ActionUtility, "get_action_config") as mocked:
             mocked.side_effect = _get_action
             response = self.fetch("/webhook", method="POST", body=json.dumps(request_object).encode('utf-8'))
+            aioresponse.stop()
             response_json = json.loads(response.body.decode("utf8"))
             self.assertEqual(response.code, 200)
             self.assertEqual(len(response_json['events']), 1)
@@ -104,6 +115,133 @@ class TestActionServer(AsyncHTTPTestCase):
             self.assertEqual(response_json['responses'][0]['text'],
                              "The value of 2 in red is ['red', 'buggy', 'bumpers']")
 
+    def test_http_action_execution_with_requests(self):
+        action_name = "test_run_with_requests"
+        action = HttpActionConfig(
+            action_name=action_name,
+            response="${main.name} ordered ${orders.count} items, weather is ${weather.forecast.0}",
+            http_url="http://localhost:8081/mock/user",
+            request_method="GET",
+            requests=[HttpActionSubRequest(name="orders", http_url="http://localhost:8081/mock/orders",
+                                           request_method="GET"),
+                      HttpActionSubRequest(name="weather", http_url="http://localhost:8081/mock/weather",
+                                           request_method="POST")],
+            bot="5f50fd0a56b698ca10d35d2e",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.http_action.value
+
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(method="GET", url="http://localhost:8081/mock/user", body=json.dumps({"name": "udit"}),
+                        status=200)
+        aioresponse.add(method="GET", url="http://localhost:8081/mock/orders", body=json.dumps({"count": 3}),
+                        status=200)
+        aioresponse.add(method="POST", url="http://localhost:8081/mock/weather",
+                        body=json.dumps({"forecast": ["sunny", "windy"]}), status=200)
+
+        request_object = {
+            "next_action": action_name,
+            "tracker": {
+                "sender_id": "default",
+                "conversation_id": "default",
+                "slots": {"bot": "5f50fd0a56b698ca10d35d2e"},
+                "latest_message": {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]},
+                "latest_event_time": 1537645578.314389,
+                "followup_action": "action_listen",
+                "paused": False,
+                "events": [{"event1": "hello"}, {"event2": "how are you"}],
+                "latest_input_channel": "rest",
+                "active_loop": {},
+                "latest_action": {},
+            },
+            "domain": {
+                "config": {},
+                "session_config": {},
+                "intents": [],
+                "entities": [],
+                "slots": {"bot": "5f50fd0a56b698ca10d35d2e"},
+                "responses": {},
+                "actions": [],
+                "forms": {},
+                "e2e_actions": []
+            },
+            "version": "version"
+        }
+        with patch.object(ActionUtility, "get_action_config") as mocked:
+            mocked.side_effect = _get_action
+            response = self.fetch("/webhook", method="POST", body=json.dumps(request_object).encode('utf-8'))
+            aioresponse.stop()
+            response_json = json.loads(response.body.decode("utf8"))
+            self.assertEqual(response.code, 200)
+            self.assertEqual(response_json['events'], [
+                {'event': 'slot', 'timestamp': None, 'name': 'KAIRON_ACTION_RESPONSE',
+                 'value': "udit ordered 3 items, weather is sunny"}])
+            self.assertEqual(response_json['responses'][0]['text'], "udit ordered 3 items, weather is sunny")
+
+    def test_http_action_execution_with_requests_failure(self):
+        action_name = "test_run_with_requests"
+        action = HttpActionConfig(
+            action_name=action_name,
+            response="${main.name} ordered ${orders.count} items",
+            http_url="http://localhost:8081/mock/user",
+            request_method="GET",
+            requests=[HttpActionSubRequest(name="orders", http_url="http://localhost:8081/mock/orders",
+                                           request_method="GET")],
+            bot="5f50fd0a56b698ca10d35d2e",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.http_action.value
+
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(method="GET", url="http://localhost:8081/mock/user", body=json.dumps({"name": "udit"}),
+                        status=200)
+        aioresponse.add(method="GET", url="http://localhost:8081/mock/orders", body="Internal Server Error",
+                        status=500)
+
+        request_object = {
+            "next_action": action_name,
+            "tracker": {
+                "sender_id": "default",
+                "conversation_id": "default",
+                "slots": {"bot": "5f50fd0a56b698ca10d35d2e"},
+                "latest_message": {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]},
+                "latest_event_time": 1537645578.314389,
+                "followup_action": "action_listen",
+                "paused": False,
+                "events": [{"event1": "hello"}, {"event2": "how are you"}],
+                "latest_input_channel": "rest",
+                "active_loop": {},
+                "latest_action": {},
+            },
+            "domain": {
+                "config": {},
+                "session_config": {},
+                "intents": [],
+                "entities": [],
+                "slots": {"bot": "5f50fd0a56b698ca10d35d2e"},
+                "responses": {},
+                "actions": [],
+                "forms": {},
+                "e2e_actions": []
+            },
+            "version": "version"
+        }
+        with patch.object(ActionUtility, "get_action_config") as mocked:
+            mocked.side_effect = _get_action
+            response = self.fetch("/webhook", method="POST", body=json.dumps(request_object).encode('utf-8'))
+            aioresponse.stop()
+            response_json = json.loads(response.body.decode("utf8"))
+            self.assertEqual(response.code, 200)
+            self.assertEqual(response_json['events'], [
+                {'event': 'slot', 'timestamp': None, 'name': 'KAIRON_ACTION_RESPONSE',
+                 'value': "I have failed to process your request"}])
+
     def test_http_action_failed_execution(self):
         action_name = "test_run_with_get"
         action = HttpActionConfig(
@@ -915,6 +1053,74 @@ class TestActionServer(AsyncHTTPTestCase):
         assert str(args[2]).__contains__("</table>")
         assert str(args[2]).__contains__("default")
 
+    @patch("kairon.shared.actions.utils.ActionUtility.get_action_config")
+    @patch("kairon.shared.actions.email_outbox.EmailOutbox.start")
+    def test_email_action_execution_with_outbox(self, mock_start, mock_action):
+        action_name = "test_run_email_action_outbox"
+        action = EmailActionConfig(
+            action_name=action_name,
+            smtp_url="test.localhost",
+            smtp_port=293,
+            smtp_password="test",
+            from_email="test@demo.com",
+            subject="test",
+            to_email="test@test.com",
+            response="Email Triggered",
+            bot="bot",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.email_action.value
+
+        request_object = {
+            "next_action": action_name,
+            "tracker": {
+                "sender_id": "outbox_sender",
+                "conversation_id": "outbox_sender",
+                "slots": {"bot": "bot", "requested_slot": "email"},
+                "latest_message": {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]},
+                "latest_event_time": 1537645578.314389,
+                "followup_action": "action_listen",
+                "paused": False,
+                "events": [{"event": "user", "timestamp": 1594907117.04194, "text": "hi"},
+                           {"event": "bot", "timestamp": 1594907117.04548, "text": "hello"}],
+                "latest_input_channel": "rest",
+                "active_loop": {},
+                "latest_action": {},
+            },
+            "domain": {
+                "config": {},
+                "session_config": {},
+                "intents": [],
+                "entities": [],
+                "slots": {"bot": "bot"},
+                "responses": {},
+                "actions": [],
+                "forms": {},
+                "e2e_actions": []
+            },
+            "version": "version"
+        }
+        mock_action.side_effect = _get_action
+        Utility.environment['action']['email']['outbox']['enable'] = True
+        try:
+            response = self.fetch("/webhook", method="POST", body=json.dumps(request_object).encode('utf-8'))
+        finally:
+            Utility.environment['action']['email']['outbox']['enable'] = False
+        response_json = json.loads(response.body.decode("utf8"))
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response_json['events'], [
+            {'event': 'slot', 'timestamp': None, 'name': 'KAIRON_ACTION_RESPONSE', 'value': "Email Triggered"}])
+        mock_start.assert_called_once()
+        email = EmailActionOutbox.objects(bot="bot", action_name=action_name).get()
+        assert email.status == "pending"
+        assert email.sender == "outbox_sender"
+        assert email.to_email == "test@test.com"
+        assert email.subject == "outbox_sender test"
+        assert "hello" in email.body
+        email.update(set__status="failed")
+
     @patch("kairon.shared.actions.utils.ActionUtility.get_action_config")
     def test_email_action_failed_execution(self, mock_action):
         action_name = "test_run_email_action"
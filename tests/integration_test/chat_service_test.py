@@ -73,6 +73,25 @@ class TestChatServer(AsyncHTTPTestCase):
             assert actual["data"]
             assert Utility.check_empty_string(actual["message"])
 
+    def test_chat_forward_to_unavailable_worker(self):
+        from kairon.chat.routing import BotAffinityRouter
+
+        with patch.object(BotAffinityRouter, "is_local", return_value=False), \
+                patch.object(BotAffinityRouter, "get_owner", return_value=1), \
+                patch.object(BotAffinityRouter, "get_worker_url", return_value="http://127.0.0.1:1/chat"):
+            response = self.fetch(
+                f"/api/bot/{bot}/chat",
+                method="POST",
+                body=json.dumps({"data": "Hi"}).encode('utf-8'),
+                headers={"Authorization": token_type + " " + token},
+            )
+        actual = json.loads(response.body.decode("utf8"))
+        self.assertEqual(response.code, 502)
+        self.assertEqual(response.headers["Content-Type"], "application/json")
+        assert not actual["success"]
+        assert actual["error_code"] == 502
+        assert actual["message"] == "Chat server worker of the bot is unavailable"
+
     def test_chat_with_user(self):
         with patch.object(Utility, "get_local_mongo_store") as mocked:
             mocked.side_effect = self.empty_store
@@ -109,6 +128,34 @@ class TestChatServer(AsyncHTTPTestCase):
             assert actual["data"]
             assert Utility.check_empty_string(actual["message"])
 
+    def test_chat_micro_batching(self):
+        from kairon.chat.batcher import MicroBatcher
+
+        settings = MongoProcessor.get_bot_settings(bot2, "test@chat.com")
+        settings.micro_batching = True
+        settings.save()
+        MicroBatcher.enabled.clear()
+        with patch.object(Utility, "get_local_mongo_store") as mocked:
+            mocked.side_effect = self.empty_store
+            response = self.fetch(
+                f"/api/bot/{bot2}/chat",
+                method="POST",
+                body=json.dumps({"data": "Hi"}).encode("utf8"),
+                headers={"Authorization": token_type + " " + token},
+            )
+            actual = json.loads(response.body.decode("utf8"))
+            self.assertEqual(response.code, 200)
+            assert actual["success"]
+            assert actual["data"]["response"]
+            assert MicroBatcher.stats()[bot2] == {1: 1}
+
+            response = self.fetch("/api/metrics")
+            actual = json.loads(response.body.decode("utf8"))
+            assert actual["data"]["batch_size_histogram"][bot2] == {"1": 1}
+        settings.micro_batching = False
+        settings.save()
+        MicroBatcher.enabled.clear()
+
     def test_chat_model_not_trained(self):
         response = self.fetch(
             f"/api/bot/{bot3}/chat",
@@ -222,5 +269,59 @@ class TestChatServer(AsyncHTTPTestCase):
         self.assertEqual(response.code, 200)
         assert actual["success"]
         assert actual["error_code"] == 0
-        assert actual["data"] is None
+        assert actual["data"]["load_time"] > 0
+        assert actual["data"]["warm_up_time"] >= 0
+        assert actual["data"]["swap_latency"] >= 0
         assert actual["message"] == "Reloading Model!"
+
+    def test_parse_batch(self):
+        with patch.object(Utility, "get_local_mongo_store") as mocked:
+            mocked.side_effect = self.empty_store
+            response = self.fetch(
+                f"/api/bot/{bot2}/parse/batch",
+                method="POST",
+                body=json.dumps({"data": ["Hi", "Bye"]}).encode("utf8"),
+                headers={"Authorization": token_type + " " + token},
+            )
+            actual = json.loads(response.body.decode("utf8"))
+            self.assertEqual(response.code, 200)
+            assert actual["success"]
+            assert actual["error_code"] == 0
+            assert len(actual["data"]) == 2
+            assert actual["data"][0]["text"] == "Hi"
+            assert actual["data"][0]["intent"]["name"]
+            assert actual["data"][1]["text"] == "Bye"
+            assert isinstance(actual["data"][1]["entities"], list)
+
+    def test_parse_batch_invalid_data(self):
+        response = self.fetch(
+            f"/api/bot/{bot2}/parse/batch",
+            method="POST",
+            body=json.dumps({"data": "Hi"}).encode("utf8"),
+            headers={"Authorization": token_type + " " + token},
+        )
+        actual = json.loads(response.body.decode("utf8"))
+        self.assertEqual(response.code, 200)
+        assert not actual["success"]
+        assert actual["error_code"] == 422
+        assert actual["message"] == "data must be a non empty list of messages"
+
+    def test_parse_batch_limit_exceeded(self):
+        response = self.fetch(
+            f"/api/bot/{bot2}/parse/batch",
+            method="POST",
+            body=json.dumps({"data": ["Hi"] * 101}).encode("utf8"),
+            headers={"Authorization": token_type + " " + token},
+        )
+        actual = json.loads(response.body.decode("utf8"))
+        assert not actual["success"]
+        assert actual["message"] == "Batch size exceeds limit of 100 messages"
+
+    def test_readiness(self):
+        response = self.fetch("/api/readiness")
+        actual = json.loads(response.body.decode("utf8"))
+        self.assertEqual(response.code, 200)
+        assert actual["success"]
+        assert actual["data"]["ready"]
+        assert actual["data"]["warm_up"]["state"] == "not_started"
+        assert actual["data"]["cache"]["agents"] >= 0
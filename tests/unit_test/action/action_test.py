@@ -1,6 +1,10 @@
 import json
 import os
+import re
+import time
 import urllib.parse
+from datetime import datetime, timedelta
+from queue import Queue
 
 from googleapiclient.http import HttpRequest
 
@@ -11,17 +15,22 @@ from typing import Dict, Text, Any, List
 
 import pytest
 import responses
-from mongoengine import connect, QuerySet
+from aioresponses import aioresponses
+from yarl import URL
+from mongoengine import connect, QuerySet, ValidationError
 from rasa_sdk import Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from kairon.shared.actions.models import ActionType
+from kairon.shared.actions.models import ActionType, CircuitBreakerState
 from kairon.shared.actions.data_objects import HttpActionRequestBody, HttpActionConfig, ActionServerLogs, SlotSetAction, \
-    Actions, FormValidationAction, EmailActionConfig, GoogleSearchAction
+    Actions, FormValidationAction, EmailActionConfig, GoogleSearchAction, EmailActionOutbox, ActionConfigVersion
 from kairon.actions.handlers.processor import ActionProcessor
 from kairon.shared.actions.utils import ActionUtility, ExpressionEvaluator
+from kairon.shared.actions.cache import ActionConfigCache
+from kairon.shared.actions.log_writer import ActionLogWriter
+from kairon.shared.actions.email_outbox import EmailOutbox, SmtpSessionPool
+from kairon.shared.actions.resilience import CircuitBreaker, HttpResponseCache
 from kairon.shared.actions.exception import ActionFailure
 from kairon.shared.utils import Utility
-import requests
 from unittest.mock import patch
 
 
@@ -292,6 +301,61 @@ class TestActions:
         assert response == resp_msg
         assert 'Authorization' not in responses.calls[0].request.headers
 
+    @pytest.mark.asyncio
+    async def test_execute_http_request_async_get(self):
+        http_url = 'http://localhost:8080/mock'
+        resp_msg = {"data": "test_data"}
+        with aioresponses() as aioresponse:
+            aioresponse.get(http_url, payload=resp_msg, status=200)
+            response = await ActionUtility.execute_http_request_async(headers={"Authorization": "Bearer abc"},
+                                                                      http_url=http_url, request_method="GET")
+            assert response == resp_msg
+            request = aioresponse.requests[("GET", URL(http_url))][0]
+            assert request.kwargs['headers']['Authorization'] == "Bearer abc"
+            assert 'json' not in request.kwargs
+
+    @pytest.mark.asyncio
+    async def test_execute_http_request_async_post(self):
+        http_url = 'http://localhost:8080/mock'
+        resp_msg = "Data added successfully"
+        request_params = {'data': 'test_data', 'test_class': [{'key': 'value'}, {'key2': 'value2'}]}
+        with aioresponses() as aioresponse:
+            aioresponse.post(http_url, body=resp_msg, status=201)
+            response = await ActionUtility.execute_http_request_async(http_url=http_url, request_method="POST",
+                                                                      request_body=request_params)
+            assert response == resp_msg
+            request = aioresponse.requests[("POST", URL(http_url))][0]
+            assert request.kwargs['json'] == request_params
+            assert 'Authorization' not in request.kwargs['headers']
+
+    @pytest.mark.asyncio
+    async def test_execute_http_request_async_failed_request(self):
+        http_url = 'http://localhost:8080/mock'
+        with aioresponses() as aioresponse:
+            aioresponse.put(http_url, body="Internal server error", status=500)
+            with pytest.raises(ActionFailure, match="Got non-200 status code"):
+                await ActionUtility.execute_http_request_async(http_url=http_url, request_method="PUT",
+                                                               request_body={"data": "test_data"})
+
+    @pytest.mark.asyncio
+    async def test_execute_http_request_async_invalid_method_type(self):
+        with pytest.raises(ActionFailure, match="Invalid request method!"):
+            await ActionUtility.execute_http_request_async(http_url='http://localhost:8080/mock',
+                                                           request_method="OPTIONS")
+
+    @pytest.mark.asyncio
+    async def test_get_http_session_is_shared(self):
+        session = ActionUtility.get_http_session()
+        assert session is ActionUtility.get_http_session()
+        assert session.connector.limit == 100
+        assert session.connector.limit_per_host == 20
+        assert session.timeout.total == 30
+        assert session.timeout.connect == 5
+        await ActionUtility.close_http_session()
+        assert session.closed
+        assert ActionUtility.get_http_session() is not session
+        await ActionUtility.close_http_session()
+
     def test_get_http_action_config(self):
         http_params = [HttpActionRequestBody(key="key1", value="value1", parameter_type="slot"),
                        HttpActionRequestBody(key="key2", value="value2")]
@@ -585,6 +649,78 @@ class TestActions:
                                                                                      {'bot': 'Great, carry on!'},
                                                                                      {'user': '/restart'}]}}
 
+    def test_prepare_message_trail_with_window(self):
+        events = [{'event': 'session_started', 'timestamp': 1640969000.0},
+                  {'event': 'user', 'timestamp': 1640969001.0, 'text': 'hi'},
+                  {'event': 'bot', 'timestamp': 1640969002.0, 'text': 'hello'},
+                  {'event': 'session_started', 'timestamp': 1640969978.0},
+                  {'event': 'bot', 'timestamp': 1640969979.0, 'text': 'welcome back'},
+                  {'event': 'user', 'timestamp': 1640969980.0, 'text': 'book a ticket'},
+                  {'event': 'bot', 'timestamp': 1640969981.0, 'text': 'where to?'},
+                  {'event': 'slot', 'timestamp': 1640969982.0, 'name': 'city', 'value': 'pune'},
+                  {'event': 'user', 'timestamp': 1640969983.0, 'text': 'pune'},
+                  {'event': 'bot', 'timestamp': 1640969984.0, 'text': 'booked'}]
+        assert ActionUtility.prepare_message_trail(events) == (
+            '2021-12-31 16:59:38',
+            [{'user': 'hi'}, {'bot': 'hello'}, {'bot': 'welcome back'}, {'user': 'book a ticket'},
+             {'bot': 'where to?'}, {'user': 'pune'}, {'bot': 'booked'}])
+        assert ActionUtility.prepare_message_trail(events, 'session') == (
+            '2021-12-31 16:59:38',
+            [{'bot': 'welcome back'}, {'user': 'book a ticket'}, {'bot': 'where to?'}, {'user': 'pune'},
+             {'bot': 'booked'}])
+        assert ActionUtility.prepare_message_trail(events, '1') == (
+            '2021-12-31 16:59:38', [{'user': 'pune'}, {'bot': 'booked'}])
+        assert ActionUtility.prepare_message_trail(events, '3') == (
+            '2021-12-31 16:59:38',
+            [{'user': 'hi'}, {'bot': 'hello'}, {'bot': 'welcome back'}, {'user': 'book a ticket'},
+             {'bot': 'where to?'}, {'user': 'pune'}, {'bot': 'booked'}])
+        assert ActionUtility.prepare_message_trail(None, 'session') == (None, [])
+
+    def test_prepare_request_chat_log_with_window(self):
+        events = [{'event': 'user', 'timestamp': 1640969980.0, 'text': 'book a ticket'},
+                  {'event': 'bot', 'timestamp': 1640969981.0, 'text': 'where to?'},
+                  {'event': 'user', 'timestamp': 1640969983.0, 'text': 'pune'},
+                  {'event': 'bot', 'timestamp': 1640969984.0, 'text': 'booked'}]
+        http_action_config_params = [HttpActionRequestBody(key="log", parameter_type="chat_log"),
+                                     HttpActionRequestBody(key="last_turn", value="1", parameter_type="chat_log")]
+        tracker = Tracker(sender_id="kairon_user@digite.com", slots=None, events=events, paused=False,
+                          latest_message=None, followup_action=None, active_loop=None, latest_action_name=None)
+        request_params = ActionUtility.prepare_request(tracker, http_action_config_params)
+        assert request_params['log']['conversation'] == [{'user': 'book a ticket'}, {'bot': 'where to?'},
+                                                         {'user': 'pune'}, {'bot': 'booked'}]
+        assert request_params['last_turn'] == {'sender_id': 'kairon_user@digite.com', 'session_started': None,
+                                               'conversation': [{'user': 'pune'}, {'bot': 'booked'}]}
+
+    def test_http_action_request_body_invalid_chat_log_window(self):
+        with pytest.raises(ValidationError, match="chat_log value must be empty, 'session' or number of turns"):
+            HttpActionRequestBody(key="log", value="0", parameter_type="chat_log").validate()
+        with pytest.raises(ValidationError, match="chat_log value must be empty, 'session' or number of turns"):
+            HttpActionRequestBody(key="log", value="yesterday", parameter_type="chat_log").validate()
+        HttpActionRequestBody(key="log", value="session", parameter_type="chat_log").validate()
+
+    def test_prepare_request_chat_log_computed_once(self, monkeypatch):
+        calls = []
+        original = ActionUtility.prepare_message_trail
+
+        def _prepare_message_trail(events):
+            calls.append(events)
+            return original(events)
+
+        monkeypatch.setattr(ActionUtility, "prepare_message_trail", _prepare_message_trail)
+        events = [{'event': 'user', 'timestamp': 1640969978.0159726, 'text': 'hi',
+                   'parse_data': {'intent': {'name': 'greet', 'confidence': 1.0}, 'entities': [], 'text': 'hi'}},
+                  {'event': 'bot', 'timestamp': 1640969978.0356295, 'text': 'are you ok?'}]
+        http_action_config_params = [HttpActionRequestBody(key="log", parameter_type="chat_log"),
+                                     HttpActionRequestBody(key="history", parameter_type="chat_log")]
+        tracker = Tracker(sender_id="kairon_user@digite.com", slots=None, events=events, paused=False,
+                          latest_message=None, followup_action=None, active_loop=None, latest_action_name=None)
+        chat_log = {}
+        request_params = ActionUtility.prepare_request(tracker, http_action_config_params, chat_log)
+        headers = ActionUtility.prepare_request(tracker, http_action_config_params, chat_log)
+        assert len(calls) == 1
+        assert request_params['log'] == request_params['history'] == headers['log']
+        assert request_params['log']['conversation'] == [{'user': 'hi'}, {'bot': 'are you ok?'}]
+
     def test_prepare_request_user_message(self):
         http_action_config_params = [HttpActionRequestBody(key="param1", value="value1"),
                                      HttpActionRequestBody(key="msg", parameter_type="user_message")]
@@ -734,6 +870,25 @@ class TestActions:
         response = ActionUtility.prepare_response("The value of 2 in red is []", None)
         assert response == 'The value of 2 in red is []'
 
+    def test_compile_response_template(self):
+        render = ActionUtility.compile_response_template("${a.b.0} and ${a.c} in ${RESPONSE}, again ${a.b.0}")
+        assert render({"a": {"b": ["red", "blue"], "c": {"d": 1}}}) == \
+               'red and {"d": 1} in {\'a\': {\'b\': [\'red\', \'blue\'], \'c\': {\'d\': 1}}}, again red'
+        assert render({"a": {"b": ["green"], "c": 2}}) == \
+               "green and 2 in {'a': {'b': ['green'], 'c': 2}}, again green"
+        with pytest.raises(ActionFailure, match="Unable to retrieve value for key from HTTP response: 'b'"):
+            render({"a": {}})
+        with pytest.raises(ActionFailure, match="Could not find value for keys in response"):
+            render("a string")
+
+    def test_compile_response_template_values_forming_placeholders(self):
+        template = "${a} and ${b}"
+        http_response = {"a": "${b}", "b": "blue"}
+        assert ActionUtility.compile_response_template(template)(http_response) == "blue and blue"
+        with pytest.raises(ActionFailure, match="Could not find value for keys in response"):
+            ActionUtility.compile_response_template("${RESPONSE}")("${a}")
+        assert ActionUtility.compile_response_template("")({"a": 1}) == {"a": 1}
+
     @pytest.mark.asyncio
     async def test_run_invalid_http_action(self, mock_get_http_action_exception):
         slots = {"bot": "5f50fd0a56b698ca10d35d2e",
@@ -807,9 +962,10 @@ class TestActions:
             return action.to_mongo().to_dict(), ActionType.http_action.value
 
         monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
-        responses.start()
-        responses.add(
-            method=responses.GET,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="GET",
             url=http_url,
             body=http_response,
             status=200,
@@ -827,6 +983,7 @@ class TestActions:
         domain: Dict[Text, Any] = None
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain, action_name)
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'This should be response'
@@ -860,10 +1017,11 @@ class TestActions:
             return action.to_mongo().to_dict(), ActionType.http_action.value
 
         monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
-        responses.start()
-        responses.add(
-            method=responses.GET,
-            url=http_url,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="GET",
+            url=http_url + "?" + urlencode({"key1": "value1", "key2": "value2"}, quote_via=quote_plus),
             body=http_response,
             status=200,
         )
@@ -880,6 +1038,7 @@ class TestActions:
         domain: Dict[Text, Any] = None
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain, action_name)
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'This should be response'
@@ -912,9 +1071,10 @@ class TestActions:
         monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
         http_url = 'http://localhost:8080/mock'
         resp_msg = "5000"
-        responses.start()
-        responses.add(
-            method=responses.POST,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="POST",
             url=http_url,
             body=resp_msg,
             status=200,
@@ -930,6 +1090,7 @@ class TestActions:
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain,
                                                                              "test_run_with_post")
+        aioresponse.stop()
         assert actual is not None
         assert actual[0]['name'] == 'KAIRON_ACTION_RESPONSE'
         assert actual[0]['value'] == 'Data added successfully, id:5000'
@@ -954,9 +1115,10 @@ class TestActions:
         monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
         http_url = 'http://localhost:8080/mock'
         resp_msg = "5000"
-        responses.start()
-        responses.add(
-            method=responses.POST,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="POST",
             url=http_url,
             body=resp_msg,
             status=200,
@@ -973,7 +1135,7 @@ class TestActions:
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain,
                                                                              "test_run_with_post")
-        responses.stop()
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'Data added successfully, id:5000'
@@ -1015,13 +1177,14 @@ class TestActions:
                 }
             }
         })
-        responses.add(
-            method=responses.GET,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="GET",
             url=http_url,
             body=resp_msg,
             status=200,
         )
-        responses.start()
         slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
         events = [{"event1": "hello"}, {"event2": "how are you"}]
         dispatcher: CollectingDispatcher = CollectingDispatcher()
@@ -1032,7 +1195,7 @@ class TestActions:
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain,
                                                                              "test_run_with_post")
-        responses.stop()
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'The value of 2 in red is [\'red\', \'buggy\', \'bumpers\']'
@@ -1086,9 +1249,10 @@ class TestActions:
         monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
         http_url = 'http://localhost:8082/mock'
         resp_msg = "This is string http response"
-        responses.start()
-        responses.add(
-            method=responses.GET,
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.add(
+            method="GET",
             url=http_url,
             body=resp_msg,
             status=200,
@@ -1103,7 +1267,7 @@ class TestActions:
         domain: Dict[Text, Any] = None
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain, action_name)
-        responses.stop()
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(
@@ -1193,23 +1357,9 @@ class TestActions:
             }
         }
 
-        class MockResponse(object):
-            def __init__(self, url, headers):
-                self.status_code = 200
-                self.url = url
-                self.headers = headers
-
-            def json(self):
-                return resp_msg
-
-            def text(self):
-                return json.dumps(resp_msg)
-
-        def mock_get(url, headers):
-            if headers and url == http_url + '?' + urllib.parse.urlencode({'key1': 'value1', 'key2': 'value2'}):
-                return MockResponse(url, headers)
-
-        monkeypatch.setattr(requests, "get", mock_get)
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.get(http_url + '?' + urllib.parse.urlencode({'key1': 'value1', 'key2': 'value2'}), payload=resp_msg, status=200)
         slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
         events = [{"event1": "hello"}, {"event2": "how are you"}]
         dispatcher: CollectingDispatcher = CollectingDispatcher()
@@ -1220,6 +1370,7 @@ class TestActions:
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain,
                                                                              "test_run_with_post")
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'The value of 2 in red is [\'red\', \'buggy\', \'bumpers\']'
@@ -1252,23 +1403,9 @@ class TestActions:
             }
         }
 
-        class MockResponse(object):
-            def __init__(self, url, headers):
-                self.status_code = 200
-                self.url = url
-                self.headers = headers
-
-            def json(self):
-                return resp_msg
-
-            def text(self):
-                return json.dumps(resp_msg)
-
-        def mock_get(url, headers):
-            if url == http_url:
-                return MockResponse(url, headers)
-
-        monkeypatch.setattr(requests, "get", mock_get)
+        aioresponse = aioresponses()
+        aioresponse.start()
+        aioresponse.get(http_url, payload=resp_msg, status=200)
         slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
         events = [{"event1": "hello"}, {"event2": "how are you"}]
         dispatcher: CollectingDispatcher = CollectingDispatcher()
@@ -1279,10 +1416,152 @@ class TestActions:
         action.save().to_mongo().to_dict()
         actual: List[Dict[Text, Any]] = await ActionProcessor.process_action(dispatcher, tracker, domain,
                                                                              "test_run_with_post")
+        aioresponse.stop()
         assert actual is not None
         assert str(actual[0]['name']) == 'KAIRON_ACTION_RESPONSE'
         assert str(actual[0]['value']) == 'The value of 2 in red is [\'red\', \'buggy\', \'bumpers\']'
 
+    @pytest.mark.asyncio
+    async def test_run_with_get_response_cache(self, monkeypatch):
+        action_name = "test_run_with_get_response_cache"
+        action = HttpActionConfig(
+            action_name=action_name,
+            response="The value of ${a}",
+            http_url="http://localhost:8081/cached",
+            request_method="GET",
+            cache_ttl=60,
+            bot="5f50fd0a56b698ca10d35d2e",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.http_action.value
+
+        monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
+        slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
+        latest_message = {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]}
+        tracker = Tracker(sender_id="sender1", slots=slots, events=[], paused=False, latest_message=latest_message,
+                          followup_action=None, active_loop=None, latest_action_name=None)
+        hits = HttpResponseCache.stats()['hits']
+        with aioresponses() as aioresponse:
+            aioresponse.get("http://localhost:8081/cached", payload={"a": "cached"}, status=200)
+            for _ in range(2):
+                actual = await ActionProcessor.process_action(CollectingDispatcher(), tracker, None, action_name)
+                assert str(actual[0]['value']) == 'The value of cached'
+            assert len(aioresponse.requests[("GET", URL("http://localhost:8081/cached"))]) == 1
+        assert HttpResponseCache.stats()['hits'] == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_run_with_circuit_breaker_open(self, monkeypatch):
+        action_name = "test_run_with_circuit_breaker"
+        action = HttpActionConfig(
+            action_name=action_name,
+            response="The value of ${a}",
+            http_url="http://localhost:8081/breaker",
+            request_method="GET",
+            bot="5f50fd0a56b698ca10d35d2e",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.http_action.value
+
+        monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
+        monkeypatch.setitem(Utility.environment['action'], 'circuit_breaker',
+                            {'enable': True, 'failure_threshold': 2, 'recovery_timeout': 60})
+        monkeypatch.setattr(CircuitBreaker, "breakers", {})
+        slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
+        latest_message = {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]}
+        tracker = Tracker(sender_id="sender_breaker", slots=slots, events=[], paused=False,
+                          latest_message=latest_message,
+                          followup_action=None, active_loop=None, latest_action_name=None)
+        with aioresponses() as aioresponse:
+            aioresponse.get("http://localhost:8081/breaker", status=500, repeat=True)
+            for _ in range(3):
+                actual = await ActionProcessor.process_action(CollectingDispatcher(), tracker, None, action_name)
+                assert str(actual[0]['value']) == 'I have failed to process your request'
+            assert len(aioresponse.requests[("GET", URL("http://localhost:8081/breaker"))]) == 2
+        assert CircuitBreaker.all_stats()["5f50fd0a56b698ca10d35d2e"][action_name] == {
+            "state": "open", "failures": 2, "rejected": 1, "trips": 1
+        }
+        log = ActionServerLogs.objects(sender="sender_breaker", action=action_name).order_by("-timestamp").first()
+        assert log['exception'] == f"Circuit breaker is open for action: {action_name}"
+
+    @pytest.mark.asyncio
+    async def test_run_with_circuit_breaker_client_errors(self, monkeypatch):
+        action_name = "test_run_with_circuit_breaker_client_errors"
+        action = HttpActionConfig(
+            action_name=action_name,
+            response="The value of ${a}",
+            http_url="http://localhost:8081/breaker/client",
+            request_method="GET",
+            bot="5f50fd0a56b698ca10d35d2e",
+            user="user"
+        )
+
+        def _get_action(*arge, **kwargs):
+            return action.to_mongo().to_dict(), ActionType.http_action.value
+
+        monkeypatch.setattr(ActionUtility, "get_action_config", _get_action)
+        monkeypatch.setitem(Utility.environment['action'], 'circuit_breaker',
+                            {'enable': True, 'failure_threshold': 2, 'recovery_timeout': 60})
+        monkeypatch.setattr(CircuitBreaker, "breakers", {})
+        slots = {"bot": "5f50fd0a56b698ca10d35d2e"}
+        latest_message = {'text': 'get intents', 'intent_ranking': [{'name': 'test_run'}]}
+        tracker = Tracker(sender_id="sender_breaker", slots=slots, events=[], paused=False,
+                          latest_message=latest_message,
+                          followup_action=None, active_loop=None, latest_action_name=None)
+        with aioresponses() as aioresponse:
+            aioresponse.get("http://localhost:8081/breaker/client", status=404, repeat=True)
+            for _ in range(3):
+                actual = await ActionProcessor.process_action(CollectingDispatcher(), tracker, None, action_name)
+                assert str(actual[0]['value']) == 'I have failed to process your request'
+            assert len(aioresponse.requests[("GET", URL("http://localhost:8081/breaker/client"))]) == 3
+        assert CircuitBreaker.all_stats()["5f50fd0a56b698ca10d35d2e"][action_name] == {
+            "state": "closed", "failures": 0, "rejected": 0, "trips": 0
+        }
+
+    def test_circuit_breaker_release_half_open_call(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+        breaker.opened_at -= 10
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.release()
+        assert breaker.state == CircuitBreakerState.half_open
+        assert breaker.allow_request()
+
+    def test_circuit_breaker_half_open(self, monkeypatch):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreakerState.open
+        assert not breaker.allow_request()
+
+        breaker.opened_at -= 10
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreakerState.half_open
+        assert not breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreakerState.open
+        assert breaker.trips == 2
+
+        breaker.opened_at -= 10
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreakerState.closed
+        assert breaker.stats() == {"state": "closed", "failures": 0, "rejected": 2, "trips": 2}
+
+    def test_http_response_cache_expiry(self, monkeypatch):
+        HttpResponseCache.set("test_bot", "action", "http://test.com?a=1", {"Authorization": "a"}, {"a": 1}, 10)
+        assert HttpResponseCache.get("test_bot", "action", "http://test.com?a=1", {"Authorization": "a"}) == {"a": 1}
+        assert not HttpResponseCache.get("test_bot", "action", "http://test.com?a=1", {"Authorization": "b"})
+        assert not HttpResponseCache.get("test_bot", "action", "http://test.com?a=2", {"Authorization": "a"})
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert not HttpResponseCache.get("test_bot", "action", "http://test.com?a=1", {"Authorization": "a"})
+
     @pytest.mark.asyncio
     async def test_slot_set_action_from_value(self, monkeypatch):
         action_name = "test_slot_set_action_from_value"
@@ -1389,6 +1668,7 @@ class TestActions:
         assert config['response'] == 'json'
         assert config['http_url'] == "http://test.com"
         assert config['request_method'] == 'GET'
+        assert config['response_renderer']({"a": 1}) == 'json'
         assert action_type == ActionType.http_action.value
 
     def test_get_action_config_action_does_not_exists(self):
@@ -1484,6 +1764,118 @@ class TestActions:
         assert not config
         assert action_type == ActionType.form_validation_action.value
 
+    def test_get_action_config_served_from_cache(self, monkeypatch):
+        bot = 'test_actions_cache'
+        user = 'test'
+        Actions(name='action_cached', type=ActionType.slot_set_action.value, bot=bot, user=user).save()
+        SlotSetAction(name='action_cached', slot='location', type='reset_slot', value='current_location',
+                      bot=bot, user=user).save()
+        config, action_type = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'location'
+        assert action_type == ActionType.slot_set_action.value
+
+        def _raise_excep(*args, **kwargs):
+            raise Exception("Should be served from cache")
+
+        with monkeypatch.context() as m:
+            m.setattr(ActionUtility, "load_action_config", _raise_excep)
+            cached_config, action_type = ActionUtility.get_action_config(bot, 'action_cached')
+            assert cached_config == config
+            assert action_type == ActionType.slot_set_action.value
+            cached_config['slot'] = 'modified'
+            cached_config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+            assert cached_config['slot'] == 'location'
+        assert ActionConfigCache.stats()['hits'] >= 2
+
+    def test_get_action_config_invalidated_on_save(self):
+        bot = 'test_actions_cache'
+        user = 'test'
+        config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'location'
+        action = SlotSetAction.objects(bot=bot, name='action_cached').get()
+        action.slot = 'name'
+        action.save()
+        config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'name'
+
+        Actions(name='action_http_cached', type=ActionType.http_action.value, bot=bot, user=user).save()
+        with pytest.raises(ActionFailure, match="No HTTP action found for bot"):
+            ActionUtility.get_action_config(bot, 'action_http_cached')
+        HttpActionConfig(action_name='action_http_cached', response="json", http_url="http://test.com",
+                         request_method="GET", bot=bot, user=user).save()
+        config, action_type = ActionUtility.get_action_config(bot, 'action_http_cached')
+        assert config['http_url'] == "http://test.com"
+        assert action_type == ActionType.http_action.value
+
+    def test_get_action_config_invalidated_by_other_process(self):
+        bot = 'test_actions_cache'
+        user = 'test'
+        config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'name'
+
+        SlotSetAction.objects(bot=bot, name='action_cached').update(set__slot='location')
+        config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'name'
+        ActionConfigVersion.objects(bot=bot).update_one(inc__version=1)
+        config, _ = ActionUtility.get_action_config(bot, 'action_cached')
+        assert config['slot'] == 'location'
+
+        Utility.delete_document([Actions], name__iexact='action_cached', bot=bot, user=user)
+        with pytest.raises(ActionFailure, match="No action found for bot"):
+            ActionUtility.get_action_config(bot, 'action_cached')
+
+    def test_get_action_config_cache_disabled(self, monkeypatch):
+        bot = 'test_actions_cache'
+        calls = []
+
+        def _load(*args, **kwargs):
+            calls.append(args)
+            return {"slot": "location"}, ActionType.slot_set_action.value
+
+        monkeypatch.setitem(Utility.environment['action'], 'cache', {'enable': False})
+        monkeypatch.setattr(ActionUtility, "load_action_config", _load)
+        ActionUtility.get_action_config(bot, 'action_cached')
+        ActionUtility.get_action_config(bot, 'action_cached')
+        assert len(calls) == 2
+
+    def test_action_log_writer_sync(self):
+        ActionLogWriter.write(ActionServerLogs(type="http_action", action="log_writer_sync", sender="log_writer",
+                                               bot="test_log_writer", status="SUCCESS"))
+        assert ActionServerLogs.objects(bot="test_log_writer", action="log_writer_sync").count() == 1
+        assert ActionLogWriter.thread is None
+
+    def test_action_log_writer_async(self, monkeypatch):
+        monkeypatch.setitem(Utility.environment['action'], 'logs', {'async': True, 'batch_size': 2,
+                                                                    'flush_interval_ms': 50})
+        written = ActionLogWriter.stats()['written']
+        for i in range(5):
+            ActionLogWriter.write(ActionServerLogs(type="http_action", action="log_writer_async",
+                                                   sender=f"log_writer_{i}", bot="test_log_writer"))
+        ActionLogWriter.flush()
+        assert ActionServerLogs.objects(bot="test_log_writer", action="log_writer_async").count() == 5
+        assert ActionLogWriter.stats()['written'] == written + 5
+        assert ActionLogWriter.stats()['pending'] == 0
+        log = ActionServerLogs.objects(bot="test_log_writer", sender="log_writer_3").get()
+        assert log.status == "SUCCESS"
+        assert log.timestamp
+
+        ActionLogWriter.write(ActionServerLogs(type="http_action", action="log_writer_async",
+                                               sender="log_writer_stop", bot="test_log_writer"))
+        ActionLogWriter.stop()
+        assert ActionLogWriter.thread is None
+        assert ActionServerLogs.objects(bot="test_log_writer", action="log_writer_async").count() == 6
+
+    def test_action_log_writer_drops_when_full(self, monkeypatch):
+        monkeypatch.setitem(Utility.environment['action'], 'logs', {'async': True})
+        monkeypatch.setattr(ActionLogWriter, "start", lambda: None)
+        monkeypatch.setattr(ActionLogWriter, "queue", Queue(maxsize=1))
+        dropped = ActionLogWriter.stats()['dropped']
+        for i in range(3):
+            ActionLogWriter.write(ActionServerLogs(type="http_action", action="log_writer_full",
+                                                   sender="log_writer", bot="test_log_writer"))
+        assert ActionLogWriter.stats()['dropped'] == dropped + 2
+        assert ActionLogWriter.stats()['pending'] == 1
+
     def test_get_slot_type(self):
         bot = 'test_actions'
         user = 'test'
@@ -1496,6 +1888,45 @@ class TestActions:
         with pytest.raises(ActionFailure, match='Slot not found in database: non_existant'):
             ActionUtility.get_slot_type(bot, 'non_existant')
 
+    def test_compile_slot_validation(self):
+        semantic_expression = {'and': [{'operator': 'is_an_email_address'},
+                                       {'operator': 'matches_regex', 'value': '^[a-z]+@.*$'}]}
+        evaluate = ExpressionEvaluator.compile_slot_validation('text', semantic_expression)
+        is_valid, render = evaluate('pandey.udit867@gmail.com')
+        assert not is_valid
+        is_valid, render = evaluate('udit@gmail.com')
+        assert is_valid
+        assert render() == '{(is_an_email_address(udit@gmail.com))and(udit@gmail.com.matches_regex(^[a-z]+@.*$))}'
+
+    def test_compile_slot_validation_invalid_regex(self):
+        evaluate = ExpressionEvaluator.compile_slot_validation('text', {'and': [{'operator': 'matches_regex',
+                                                                                  'value': '('}]})
+        is_valid, _ = evaluate(None)
+        assert not is_valid
+        with pytest.raises(re.error):
+            evaluate('abc')
+
+    def test_compile_slot_validation_invalid_operator(self):
+        evaluate = ExpressionEvaluator.compile_slot_validation('list', {'and': [{'operator': 'startswith',
+                                                                                  'value': 'a'}]})
+        with pytest.raises(ActionFailure, match='Cannot evaluate invalid operator: "startswith" for slot type "list"'):
+            evaluate(['a'])
+
+    def test_get_slot_validation(self):
+        validation = FormValidationAction(name='validate_form', slot='name', bot='test_actions', user='test',
+                                          validation_semantic={'or': [{'operator': '==', 'value': 'udit'}]}).save()
+        evaluate = ExpressionEvaluator.get_slot_validation(validation, 'text')
+        assert evaluate('udit')[0]
+        assert ExpressionEvaluator.get_slot_validation(validation, 'text') is evaluate
+        assert ExpressionEvaluator.get_slot_validation(validation, 'any') is not evaluate
+
+        validation.validation_semantic = {'or': [{'operator': '==', 'value': 'pandey'}]}
+        validation.save()
+        reloaded = FormValidationAction.objects(id=validation.id).get()
+        evaluate = ExpressionEvaluator.get_slot_validation(reloaded, 'text')
+        assert not evaluate('udit')[0]
+        assert evaluate('pandey')[0]
+
     def test_is_valid_slot_value_multiple_expressions_1(self):
         slot_type = 'text'
         slot_value = 'valid_slot_value'
@@ -2020,6 +2451,68 @@ class TestActions:
         with pytest.raises(ActionFailure, match='Google search action not found'):
             ActionUtility.get_action_config(bot, 'custom_search_action')
 
+    def test_email_outbox_enqueue_and_deliver(self, monkeypatch):
+        monkeypatch.setattr(EmailOutbox, "start", lambda: None)
+        with patch('kairon.shared.utils.SMTP', autospec=True):
+            EmailActionConfig(action_name="email_action_outbox", smtp_url="test.localhost", smtp_port=293,
+                              smtp_password="test", from_email="test@demo.com", subject="test",
+                              to_email="test@test.com", response="Email queued", bot="outbox_bot",
+                              user="user").save()
+        outbox_id = EmailOutbox.enqueue("outbox_bot", "email_action_outbox", "sender_outbox", "test@test.com",
+                                        "sender_outbox test", "<table></table>")
+        email = EmailOutbox.claim()
+        assert email.id.__str__() == outbox_id
+        assert email.status == "sending"
+        assert not EmailOutbox.claim()
+
+        with patch('kairon.shared.actions.email_outbox.SMTP', autospec=True) as mock_smtp:
+            mock_smtp.return_value.noop.return_value = (250, b'OK')
+            EmailOutbox.deliver(email)
+            email.reload()
+            assert email.status == "sent"
+            assert email.attempts == 1
+
+            EmailOutbox.enqueue("outbox_bot", "email_action_outbox", "sender_outbox", "test@test.com",
+                                "sender_outbox test", "<table></table>")
+            EmailOutbox.deliver(EmailOutbox.claim())
+            assert mock_smtp.call_count == 1
+            names = [name for name, args, kwargs in mock_smtp.method_calls]
+            assert names == ['().connect', '().login', '().sendmail', '().noop', '().sendmail']
+            name, args, kwargs = mock_smtp.method_calls[2]
+            assert args[0] == "test@demo.com"
+            assert args[1] == "test@test.com"
+            assert "sender_outbox test" in args[2]
+        SmtpSessionPool.close_all()
+
+    def test_email_outbox_retry(self, monkeypatch):
+        monkeypatch.setattr(EmailOutbox, "start", lambda: None)
+        monkeypatch.setitem(Utility.environment['action'], 'email', {'outbox': {'max_retries': 2,
+                                                                                'retry_backoff': 0}})
+        outbox_id = EmailOutbox.enqueue("outbox_bot", "email_action_not_exists", "sender_outbox", "test@test.com",
+                                        "sender_outbox test", "<table></table>")
+        EmailOutbox.deliver(EmailOutbox.claim())
+        email = EmailActionOutbox.objects(id=outbox_id).get()
+        assert email.status == "pending"
+        assert email.attempts == 1
+        assert email.exception
+
+        EmailOutbox.deliver(EmailOutbox.claim())
+        email.reload()
+        assert email.status == "failed"
+        assert email.attempts == 2
+        assert not EmailOutbox.claim()
+
+    def test_email_outbox_claim_expired_lease(self, monkeypatch):
+        monkeypatch.setitem(Utility.environment['action'], 'email', {'outbox': {'lease_timeout': 60}})
+        email = EmailActionOutbox(bot="outbox_bot", action_name="email_action_outbox", to_email="test@test.com",
+                                  subject="test", body="test", status="sending",
+                                  locked_at=datetime.utcnow() - timedelta(seconds=30)).save()
+        assert not EmailOutbox.claim()
+        email.update(set__locked_at=datetime.utcnow() - timedelta(seconds=120))
+        claimed = EmailOutbox.claim()
+        assert claimed.id == email.id
+        claimed.update(set__status="failed")
+
     def test_google_search_action(self, monkeypatch):
         def _run_action(*arge, **kwargs):
             return {
@@ -2145,3 +2638,31 @@ class TestActions:
     def test_google_search_action_error(self):
         with pytest.raises(ActionFailure):
             ActionUtility.perform_google_search('123459876', 'asdfg::567890', 'what is kanban')
+
+    def test_google_search_action_cached(self, monkeypatch):
+        calls = []
+
+        def _run_action(*args, **kwargs):
+            calls.append(kwargs)
+            return {"items": [{"title": "Kanban", "snippet": "Kanban visualizes work", "link": "https://kanban.com"}]}
+
+        monkeypatch.setitem(Utility.environment['action'], 'google_search', {'cache_enable': True})
+        monkeypatch.setattr(ActionUtility, "google_search_results", None)
+        monkeypatch.setattr(HttpRequest, 'execute', _run_action)
+        expected = [{'title': 'Kanban', 'text': 'Kanban visualizes work', 'link': 'https://kanban.com'}]
+        assert ActionUtility.perform_google_search('123459876', 'asdfg::567891', 'What is  Kanban?', num=1) == expected
+        assert ActionUtility.perform_google_search('123459876', 'asdfg::567891', 'what is kanban', num=1) == expected
+        assert len(calls) == 1
+        assert calls[0]['http']
+        ActionUtility.perform_google_search('123459876', 'asdfg::567891', 'what is kanban', num=2)
+        ActionUtility.perform_google_search('123459876', 'asdfg::567892', 'what is kanban', num=1)
+        assert len(calls) == 3
+
+    def test_get_google_search_client(self):
+        client = ActionUtility.get_google_search_client('123459876')
+        assert ActionUtility.get_google_search_client('123459876') is client
+        assert ActionUtility.get_google_search_client('123459877') is not client
+
+    def test_normalize_search_term(self):
+        assert ActionUtility.normalize_search_term('  What IS\tkanban ?? ') == 'what is kanban'
+        assert ActionUtility.normalize_search_term('what is kanban') == 'what is kanban'
@@ -5,6 +5,10 @@ import pytest
 
 from kairon import Utility
 from kairon.chat.agent_processor import AgentProcessor
+from kairon.chat.batcher import MicroBatcher
+from kairon.chat.cache import ModelArtifactCache
+from kairon.chat.routing import BotAffinityRouter
+from kairon.chat.warmup import WarmUpProcessor
 from kairon.shared.data.processor import MongoProcessor
 from kairon.exceptions import AppException
 
@@ -50,6 +54,20 @@ class TestAgentProcessor:
         AgentProcessor.reload(pytest.bot)
         assert AgentProcessor.cache_provider.get(pytest.bot)
 
+    def test_reload_hot_swap(self, mock_agent_properties, monkeypatch):
+        old_agent = AgentProcessor.cache_provider.get(pytest.bot)
+        load_agent = AgentProcessor.load_agent
+
+        def _load_agent(bot):
+            assert AgentProcessor.cache_provider.get(bot) == old_agent
+            return load_agent(bot)
+
+        monkeypatch.setattr(AgentProcessor, "load_agent", _load_agent)
+        new_agent = AgentProcessor.reload(pytest.bot)
+        assert new_agent != old_agent
+        assert AgentProcessor.cache_provider.get(pytest.bot) == new_agent
+        assert set(AgentProcessor.swap_stats[pytest.bot].keys()) == {"load_time", "warm_up_time", "swap_latency"}
+
     def test_reload_exception(self, mock_agent_properties):
         assert not AgentProcessor.cache_provider.get('test_user')
 
@@ -67,3 +85,487 @@ class TestAgentProcessor:
 
     def test_get_agent_not_cached(self, mock_agent_properties):
         assert AgentProcessor.get_agent(pytest.bot)
+
+    @pytest.mark.asyncio
+    async def test_get_agent_async(self):
+        assert await AgentProcessor.get_agent_async(pytest.bot)
+
+    @pytest.mark.asyncio
+    async def test_get_agent_async_not_exists(self):
+        with pytest.raises(AppException) as e:
+            await AgentProcessor.get_agent_async('test_user')
+        assert str(e).__contains__("Bot has not been trained yet!")
+        assert not AgentProcessor.loading.get('test_user')
+
+    @pytest.mark.asyncio
+    async def test_get_agent_async_single_flight(self, monkeypatch):
+        import asyncio
+        import time
+
+        loaded = []
+
+        def _reload(bot):
+            time.sleep(0.5)
+            loaded.append(bot)
+            return bot
+
+        monkeypatch.setattr(AgentProcessor, "reload", _reload)
+        agents = await asyncio.gather(*[AgentProcessor.get_agent_async('cold_bot') for _ in range(10)])
+        assert agents == ['cold_bot'] * 10
+        assert loaded == ['cold_bot']
+        assert not AgentProcessor.loading.get('cold_bot')
+
+    @pytest.mark.asyncio
+    async def test_reload_async_single_flight(self, monkeypatch):
+        import asyncio
+        import time
+
+        loaded = []
+
+        def _reload(bot):
+            time.sleep(0.2)
+            loaded.append(bot)
+            return f"{bot}_{len(loaded)}"
+
+        monkeypatch.setattr(AgentProcessor, "reload", _reload)
+        cold_load = asyncio.ensure_future(AgentProcessor.get_agent_async('cold_bot'))
+        await asyncio.sleep(0)
+        reload = asyncio.ensure_future(AgentProcessor.reload_async('cold_bot'))
+        assert await cold_load == 'cold_bot_1'
+        await asyncio.sleep(0)
+        assert AgentProcessor.loading.get('cold_bot')
+        agents = await asyncio.gather(AgentProcessor.get_agent_async('cold_bot'), reload)
+        assert agents == ['cold_bot_2', 'cold_bot_2']
+        assert loaded == ['cold_bot'] * 2
+        assert not AgentProcessor.loading.get('cold_bot')
+
+
+class TestMemoryBudgetedAgentCache:
+
+    @staticmethod
+    def create_agent(path, size: int):
+        from types import SimpleNamespace
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "weights"), "wb") as fp:
+            fp.write(b"0" * size)
+        return SimpleNamespace(model_directory=str(path))
+
+    def test_set_and_get(self, tmp_path):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        cache = MemoryBudgetedAgentCache(memory_budget=100)
+        agent = self.create_agent(tmp_path / "bot_1", 40)
+        cache.set("bot_1", agent)
+        assert cache.is_exists("bot_1")
+        assert not cache.is_exists("bot_2")
+        assert cache.get("bot_1") == agent
+        assert cache.stats() == {"agents": 1, "hits": 1, "misses": 1, "evictions": 0,
+                                 "resident_bytes": 40, "memory_budget": 100}
+
+    def test_evict_on_memory_budget(self, tmp_path):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        cache = MemoryBudgetedAgentCache(memory_budget=100)
+        cache.set("bot_1", self.create_agent(tmp_path / "bot_1", 40))
+        cache.set("bot_2", self.create_agent(tmp_path / "bot_2", 40))
+        cache.get("bot_1")
+        cache.set("bot_3", self.create_agent(tmp_path / "bot_3", 40))
+        assert cache.get("bot_1")
+        assert not cache.get("bot_2")
+        assert cache.get("bot_3")
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["resident_bytes"] == 80
+
+    def test_replace_agent(self, tmp_path):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        cache = MemoryBudgetedAgentCache(memory_budget=100)
+        cache.set("bot_1", self.create_agent(tmp_path / "bot_1", 60))
+        agent = self.create_agent(tmp_path / "bot_1_new", 70)
+        cache.set("bot_1", agent)
+        assert cache.get("bot_1") == agent
+        assert cache.stats()["evictions"] == 0
+        assert cache.stats()["resident_bytes"] == 70
+
+    def test_set_with_estimated_size(self, tmp_path):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        cache = MemoryBudgetedAgentCache(memory_budget=100)
+        agent = self.create_agent(tmp_path / "bot_1", 40)
+        size = cache.estimate_size(agent)
+        assert size == 40
+        cache.set("bot_1", agent, size)
+        assert cache.get("bot_1") == agent
+        assert cache.stats()["resident_bytes"] == 40
+
+    def test_agent_larger_than_budget(self, tmp_path):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        cache = MemoryBudgetedAgentCache(memory_budget=100)
+        cache.set("bot_1", self.create_agent(tmp_path / "bot_1", 40))
+        cache.set("bot_2", self.create_agent(tmp_path / "bot_2", 150))
+        assert not cache.get("bot_1")
+        assert cache.get("bot_2")
+        assert cache.stats()["resident_bytes"] == 150
+
+    def test_memory_budget_from_config(self):
+        from kairon.chat.cache import MemoryBudgetedAgentCache
+
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        assert MemoryBudgetedAgentCache().memory_budget == 2048 * 1024 * 1024
+
+
+class TestModelArtifactCache:
+
+    @pytest.fixture(autouse=True)
+    def set_cache_dir(self, tmp_path, monkeypatch):
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        monkeypatch.setitem(Utility.environment['model_cache'], 'path', str(tmp_path / "cache"))
+
+    @staticmethod
+    def create_model(path, size: int):
+        import tarfile
+        from io import BytesIO
+
+        with tarfile.open(path, "w:gz") as tar:
+            info = tarfile.TarInfo("fingerprint.json")
+            info.size = size
+            tar.addfile(info, BytesIO(b"0" * size))
+        return str(path)
+
+    def test_get_unpacks_once(self, tmp_path, monkeypatch):
+        import rasa.model
+
+        model_path = self.create_model(tmp_path / "model.tar.gz", 10)
+        unpack_model = rasa.model.unpack_model
+        unpacked = []
+
+        def _unpack_model(*args, **kwargs):
+            unpacked.append(args[0])
+            return unpack_model(*args, **kwargs)
+
+        monkeypatch.setattr(rasa.model, "unpack_model", _unpack_model)
+        model_dir = ModelArtifactCache.get(model_path)
+        assert os.path.isfile(os.path.join(model_dir, "fingerprint.json"))
+        assert ModelArtifactCache.get(model_path) == model_dir
+        assert unpacked == [model_path]
+
+    def test_get_new_model(self, tmp_path):
+        model_dir = ModelArtifactCache.get(self.create_model(tmp_path / "model_1.tar.gz", 10))
+        new_model_dir = ModelArtifactCache.get(self.create_model(tmp_path / "model_2.tar.gz", 10))
+        assert model_dir != new_model_dir
+        assert os.path.isdir(model_dir)
+        assert os.path.isdir(new_model_dir)
+
+    def test_evict_least_recently_used(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(Utility.environment['model_cache'], 'disk_budget_mb', 1)
+        model_1 = ModelArtifactCache.get(self.create_model(tmp_path / "model_1.tar.gz", 400 * 1024))
+        os.utime(model_1, (0, 0))
+        model_2 = ModelArtifactCache.get(self.create_model(tmp_path / "model_2.tar.gz", 400 * 1024))
+        model_3 = ModelArtifactCache.get(self.create_model(tmp_path / "model_3.tar.gz", 400 * 1024))
+        assert not os.path.exists(model_1)
+        assert os.path.isdir(model_2)
+        assert os.path.isdir(model_3)
+
+    def test_evict_keeps_referenced_and_recent_models(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(Utility.environment['model_cache'], 'disk_budget_mb', 1)
+        model_1 = ModelArtifactCache.get(self.create_model(tmp_path / "model_1.tar.gz", 400 * 1024))
+        model_2 = ModelArtifactCache.get(self.create_model(tmp_path / "model_2.tar.gz", 400 * 1024))
+        os.utime(model_1, (0, 0))
+        os.utime(model_2, (0, 0))
+        ModelArtifactCache.add_reference(model_1)
+        try:
+            model_3 = ModelArtifactCache.get(self.create_model(tmp_path / "model_3.tar.gz", 400 * 1024))
+        finally:
+            ModelArtifactCache.remove_reference(model_1)
+        assert os.path.isdir(model_1)
+        assert not os.path.exists(model_2)
+        assert os.path.isdir(model_3)
+
+        monkeypatch.setattr(ModelArtifactCache, "get_disk_budget", staticmethod(lambda: 1))
+        model_4 = ModelArtifactCache.get(self.create_model(tmp_path / "model_4.tar.gz", 400 * 1024))
+        assert not os.path.exists(model_1)
+        assert os.path.isdir(model_3)
+        assert os.path.isdir(model_4)
+
+    def test_get_cleans_up_failed_unpack(self, tmp_path, monkeypatch):
+        import rasa.model
+
+        def _unpack_model(*args, **kwargs):
+            raise Exception("corrupt model")
+
+        monkeypatch.setattr(rasa.model, "unpack_model", _unpack_model)
+        with pytest.raises(Exception, match="corrupt model"):
+            ModelArtifactCache.get(self.create_model(tmp_path / "model.tar.gz", 10))
+        assert os.listdir(tmp_path / "cache") == []
+
+
+class TestBotAffinityRouter:
+
+    @pytest.fixture(autouse=True)
+    def reset_router(self):
+        yield
+        BotAffinityRouter.worker_id = None
+        BotAffinityRouter.num_workers = 1
+        BotAffinityRouter.ring = []
+        BotAffinityRouter.ring_workers = []
+
+    def test_single_process(self):
+        assert BotAffinityRouter.is_local("bot_1")
+        assert BotAffinityRouter.get_owner("bot_1") == 0
+
+    def test_bot_owned_by_single_worker(self):
+        bots = [f"bot_{i}" for i in range(1000)]
+        owners = {}
+        for worker in range(4):
+            BotAffinityRouter.initialize(worker, 4)
+            for bot in bots:
+                if BotAffinityRouter.is_local(bot):
+                    assert bot not in owners
+                    owners[bot] = worker
+        assert len(owners) == 1000
+        assert set(owners.values()) == {0, 1, 2, 3}
+        assert min(list(owners.values()).count(worker) for worker in range(4)) > 150
+
+    def test_consistent_on_worker_change(self):
+        bots = [f"bot_{i}" for i in range(1000)]
+        BotAffinityRouter.initialize(0, 4)
+        owners = {bot: BotAffinityRouter.get_owner(bot) for bot in bots}
+        BotAffinityRouter.initialize(0, 5)
+        moved = [bot for bot in bots if BotAffinityRouter.get_owner(bot) != owners[bot]]
+        assert all(BotAffinityRouter.get_owner(bot) == 4 for bot in moved)
+
+    def test_get_worker_url(self):
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        assert BotAffinityRouter.get_worker_url(2, "/api/bot/test/chat") == "http://127.0.0.1:5102/api/bot/test/chat"
+
+
+class TestWarmUpProcessor:
+
+    @pytest.fixture(autouse=True)
+    def load_environment(self):
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        yield
+        WarmUpProcessor.status = {"state": "not_started", "total": 0, "loaded": 0, "failed": 0}
+
+    def test_rank_bots(self, monkeypatch):
+        import time
+        import mongomock
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        client = mongomock.MongoClient()
+        db = client.get_database(Utility.environment['database']['test_db'])
+        now = time.time()
+        db.get_collection("bot_1").insert_many([{"sender_id": "a", "latest_event_time": now},
+                                                {"sender_id": "b", "latest_event_time": now}])
+        db.get_collection("bot_2").insert_many([{"sender_id": "a", "latest_event_time": now},
+                                                {"sender_id": "b", "latest_event_time": now},
+                                                {"sender_id": "c", "latest_event_time": now}])
+        db.get_collection("bot_3").insert_one({"sender_id": "a", "latest_event_time": now - 30 * 24 * 60 * 60})
+        db.get_collection("bot_4").insert_one({"sender_id": "a", "latest_event_time": now})
+        monkeypatch.setattr(KaironMongoTrackerStore, "client", client)
+        monkeypatch.setattr(os.path, "isdir", lambda path: not path.endswith("bot_4"))
+        assert WarmUpProcessor.rank_bots(10, 7) == ["bot_2", "bot_1"]
+        assert WarmUpProcessor.rank_bots(1, 7) == ["bot_2"]
+
+    @pytest.mark.asyncio
+    async def test_warm_up(self, monkeypatch):
+        loaded = []
+
+        async def _get_agent(bot):
+            if bot == "bot_2":
+                raise AppException("Bot has not been trained yet!")
+            loaded.append(bot)
+
+        monkeypatch.setattr(WarmUpProcessor, "rank_bots", lambda limit, days: ["bot_1", "bot_2", "bot_3"])
+        monkeypatch.setattr(AgentProcessor, "get_agent_async", _get_agent)
+        monkeypatch.setitem(Utility.environment['chat']['warm_up'], 'enable', True)
+        assert not WarmUpProcessor.is_ready()
+        await WarmUpProcessor.warm_up()
+        assert loaded == ["bot_1", "bot_3"]
+        assert WarmUpProcessor.status == {"state": "completed", "total": 3, "loaded": 2, "failed": 1}
+        assert WarmUpProcessor.is_ready()
+
+    def test_is_ready_warm_up_disabled(self):
+        assert WarmUpProcessor.is_ready()
+
+
+class TestMicroBatcher:
+
+    class Interpreter:
+
+        def __init__(self):
+            self.parsed = []
+
+        def parse(self, text):
+            if text == "error":
+                raise Exception("Failed to parse")
+            self.parsed.append(text)
+            return {"text": text, "intent": {"name": text}, "entities": []}
+
+    @pytest.mark.asyncio
+    async def test_parse_batches(self):
+        import asyncio
+
+        interpreter = self.Interpreter()
+        batcher = MicroBatcher("test_bot", 4, 5)
+        results = await asyncio.gather(*[batcher.parse(interpreter, f"text_{i}") for i in range(10)])
+        assert [result["text"] for result in results] == [f"text_{i}" for i in range(10)]
+        assert sorted(interpreter.parsed) == sorted([f"text_{i}" for i in range(10)])
+        assert batcher.histogram == {1: 2, 4: 2}
+        assert not batcher.running
+
+    @pytest.mark.asyncio
+    async def test_parse_single_message_without_wait(self):
+        interpreter = self.Interpreter()
+        batcher = MicroBatcher("test_bot", 8, 60000)
+        result = await batcher.parse(interpreter, "hello")
+        assert result["intent"]["name"] == "hello"
+        assert batcher.histogram == {1: 1}
+        assert not batcher.flush_handle
+
+    @pytest.mark.asyncio
+    async def test_parse_exception(self):
+        import asyncio
+
+        interpreter = self.Interpreter()
+        batcher = MicroBatcher("test_bot", 2, 5)
+        results = await asyncio.gather(batcher.parse(interpreter, "hello"), batcher.parse(interpreter, "error"),
+                                       batcher.parse(interpreter, "hi"), return_exceptions=True)
+        assert results[0]["text"] == "hello"
+        assert all(str(result) == "Failed to parse" for result in results[1:])
+        assert batcher.histogram == {1: 1, 2: 1}
+
+    @pytest.mark.asyncio
+    async def test_parse_new_interpreter_flushes_batch(self):
+        import asyncio
+
+        old_interpreter = self.Interpreter()
+        new_interpreter = self.Interpreter()
+        batcher = MicroBatcher("test_bot", 8, 5)
+        await asyncio.gather(batcher.parse(old_interpreter, "hello"), batcher.parse(new_interpreter, "hi"))
+        assert old_interpreter.parsed == ["hello"]
+        assert new_interpreter.parsed == ["hi"]
+
+    def test_get_instance(self):
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        batcher = MicroBatcher.get_instance("test_bot")
+        assert batcher.max_batch_size == 8
+        assert batcher.max_wait == 0.005
+        assert MicroBatcher.get_instance("test_bot") == batcher
+        assert "test_bot" in MicroBatcher.stats()
+
+
+class TestKaironMongoTrackerStore:
+
+    @pytest.fixture(autouse=True)
+    def mongo_client(self, monkeypatch):
+        import mongomock
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        os.environ["system_file"] = "./tests/testing_data/system.yaml"
+        Utility.load_environment()
+        monkeypatch.setattr(KaironMongoTrackerStore, "client", mongomock.MongoClient())
+
+    @staticmethod
+    def wait_for_writes():
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        for writer in KaironMongoTrackerStore.writers:
+            writer.submit(lambda: None).result()
+
+    def test_save_and_retrieve(self):
+        from rasa.shared.core.domain import Domain
+        from rasa.shared.core.events import UserUttered, ActionExecuted
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        store = KaironMongoTrackerStore(Domain.empty(), "tracker_store_bot")
+        assert not store.retrieve("user_1")
+        tracker = store.get_or_create_tracker("user_1")
+        tracker.update(UserUttered("hi", {"name": "greet"}))
+        store.save(tracker)
+        tracker.update(ActionExecuted("utter_greet"))
+        store.save(tracker)
+
+        new_store = KaironMongoTrackerStore(Domain.empty(), "tracker_store_bot")
+        assert new_store.client == store.client
+        tracker = new_store.retrieve("user_1")
+        assert len(tracker.events) == 3
+        stored = store.conversations.find_one({"sender_id": "user_1"})
+        assert [event["event"] for event in stored["events"]] == ["action", "user", "action"]
+        tracker.update(UserUttered("bye", {"name": "goodbye"}))
+        new_store.save(tracker)
+        self.wait_for_writes()
+        stored = store.conversations.find_one({"sender_id": "user_1"})
+        assert len(stored["events"]) == 4
+
+        store.save(tracker)
+        self.wait_for_writes()
+        stored = store.conversations.find_one({"sender_id": "user_1"})
+        assert len(stored["events"]) == 4
+        assert stored["version"] == 4
+
+    def test_save_after_concurrent_append(self):
+        from rasa.shared.core.domain import Domain
+        from rasa.shared.core.events import UserUttered, ActionExecuted
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        store = KaironMongoTrackerStore(Domain.empty(), "tracker_store_bot")
+        tracker = store.get_or_create_tracker("user_2")
+        tracker.update(UserUttered("hi", {"name": "greet"}))
+        store.save(tracker)
+        self.wait_for_writes()
+        store.conversations.update_one(
+            {"sender_id": "user_2"}, {"$inc": {"version": 1}, "$push": {"events": {"event": "user", "text": "hello"}}}
+        )
+        tracker.update(ActionExecuted("utter_greet"))
+        store.save(tracker)
+        self.wait_for_writes()
+        stored = store.conversations.find_one({"sender_id": "user_2"})
+        assert [event.get("text") or event.get("name") for event in stored["events"]] == [
+            "action_listen", "hi", "hello", "utter_greet"
+        ]
+        assert stored["version"] == 4
+
+    def test_retrieve_raises_failed_write(self, monkeypatch):
+        from rasa.shared.core.domain import Domain
+        from rasa.shared.core.events import UserUttered
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        def _raise_exception(*args, **kwargs):
+            raise Exception("Failed to connect")
+
+        store = KaironMongoTrackerStore(Domain.empty(), "tracker_store_bot")
+        tracker = store.get_or_create_tracker("user_3")
+        self.wait_for_writes()
+        monkeypatch.setattr(KaironMongoTrackerStore, "_KaironMongoTrackerStore__write", _raise_exception)
+        tracker.update(UserUttered("hi", {"name": "greet"}))
+        store.save(tracker)
+        with pytest.raises(AppException, match="Failed to save tracker of user_3: Failed to connect"):
+            store.retrieve("user_3")
+        assert len(store.retrieve("user_3").events) == 1
+
+    def test_count_events_since_session_start(self):
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        events = [{"event": "action", "name": "action_session_start"}, {"event": "session_started"},
+                  {"event": "user", "text": "hi"}]
+        assert KaironMongoTrackerStore.count_events_since_session_start(events) == 2
+        assert KaironMongoTrackerStore.count_events_since_session_start(events[2:]) == 1
+        assert KaironMongoTrackerStore.count_events_since_session_start([]) == 0
+
+    def test_get_local_mongo_store(self):
+        from rasa.shared.core.domain import Domain
+        from kairon.shared.tracker_store import KaironMongoTrackerStore
+
+        store = Utility.get_local_mongo_store("tracker_store_bot", Domain.empty())
+        assert isinstance(store, KaironMongoTrackerStore)
+        assert store.collection == "tracker_store_bot"
+        assert store.db.name == "test_conversations"
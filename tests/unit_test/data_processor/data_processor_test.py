@@ -5421,6 +5421,72 @@ class TestModelProcessor:
         assert actual_http_action['headers'][1]['parameter_type'] == "value"
         assert Utility.is_exist(Slots, raise_error=False, name__iexact="bot")
         assert Utility.is_exist(Actions, raise_error=False, name__iexact=action)
+        assert actual_http_action['cache_ttl'] is None
+
+    def test_add_http_action_config_with_cache_ttl(self):
+        processor = MongoProcessor()
+        bot = 'test_bot'
+        action = 'test_action_with_cache_ttl'
+        user = 'test_user'
+        http_action_config = HttpActionConfigRequest(
+            action_name=action,
+            response="json",
+            http_url='http://www.google.com',
+            request_method='GET',
+            cache_ttl=120
+        )
+        processor.add_http_action_config(http_action_config.dict(), user, bot)
+        actual_http_action = HttpActionConfig.objects(action_name=action, bot=bot, status=True).get()
+        assert actual_http_action['cache_ttl'] == 120
+
+    def test_add_http_action_config_invalid_cache_ttl(self):
+        with pytest.raises(ValueError, match="cache_ttl must be a positive number of seconds"):
+            HttpActionConfigRequest(action_name='test_action_invalid_ttl', response="json",
+                                    http_url='http://www.google.com', request_method='GET', cache_ttl=-1)
+
+    def test_add_http_action_config_with_requests(self):
+        processor = MongoProcessor()
+        bot = 'test_bot'
+        action = 'test_action_with_requests'
+        user = 'test_user'
+        http_action_config = HttpActionConfigRequest(
+            action_name=action,
+            response="${main.name} lives in ${weather.city}",
+            http_url='http://www.google.com',
+            request_method='GET',
+            requests=[{"name": "Weather", "http_url": "http://www.weather.com", "request_method": "post",
+                       "params_list": [{"key": "city", "value": "city", "parameter_type": "slot"}]}]
+        )
+        processor.add_http_action_config(http_action_config.dict(), user, bot)
+        actual_http_action = HttpActionConfig.objects(action_name=action, bot=bot, status=True).get()
+        assert len(actual_http_action.requests) == 1
+        assert actual_http_action.requests[0].name == "weather"
+        assert actual_http_action.requests[0].http_url == "http://www.weather.com"
+        assert actual_http_action.requests[0].request_method == "POST"
+        assert actual_http_action.requests[0].params_list[0].key == "city"
+        assert actual_http_action.requests[0].params_list[0].parameter_type == "slot"
+
+        http_action_config.requests = []
+        processor.update_http_config(http_action_config, user, bot)
+        actual_http_action = HttpActionConfig.objects(action_name=action, bot=bot, status=True).get()
+        assert actual_http_action.requests == []
+
+    def test_add_http_action_config_invalid_requests(self):
+        with pytest.raises(ValueError, match="request names must be unique"):
+            HttpActionConfigRequest(action_name='test_action_invalid_requests', response="json",
+                                    http_url='http://www.google.com', request_method='GET',
+                                    requests=[{"name": "a", "http_url": "http://www.a.com", "request_method": "GET"},
+                                              {"name": "A", "http_url": "http://www.b.com", "request_method": "GET"}])
+        with pytest.raises(ValueError, match="name cannot contain '.' or be 'main'"):
+            HttpActionConfigRequest(action_name='test_action_invalid_requests', response="json",
+                                    http_url='http://www.google.com', request_method='GET',
+                                    requests=[{"name": "main", "http_url": "http://www.a.com", "request_method": "GET"}])
+
+    def test_add_http_action_config_invalid_chat_log_window(self):
+        with pytest.raises(ValueError, match="chat_log value must be empty, 'session' or number of turns"):
+            HttpActionConfigRequest(action_name='test_action_invalid_window', response="json",
+                                    http_url='http://www.google.com', request_method='POST',
+                                    params_list=[{"key": "log", "value": "-1", "parameter_type": "chat_log"}])
 
     def test_add_http_action_config_missing_values(self):
         processor = MongoProcessor()
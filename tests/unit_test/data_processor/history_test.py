@@ -65,6 +65,30 @@ class TestHistory:
 
         monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
 
+    @pytest.fixture
+    def mock_duplicate_events(self, monkeypatch):
+        import time
+
+        now = int(time.time()) - 60
+        client = MongoClient(Utility.environment['tracker']['url'])
+        collection = client.get_database("conversation").get_collection("duplicate_event_tests")
+        collection.insert_one({"sender_id": "user_1", "latest_event_time": now + 7, "events": [
+            {"event": "action", "name": "action_session_start", "timestamp": now},
+            {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}},
+            {"event": "bot", "text": "hello", "timestamp": now + 2},
+            {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}},
+            {"event": "user", "text": "bye", "timestamp": now + 4, "parse_data": {"intent": {"name": "goodbye"}}},
+            {"event": "action", "name": "utter_goodbye", "timestamp": now + 5},
+            {"event": "bot", "text": "goodbye", "timestamp": now + 7}
+        ]})
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        yield now
+        collection.drop()
+
     def test_fetch_chat_users_db_error(self, mock_db_timeout):
         with pytest.raises(AppException) as e:
             users = HistoryProcessor.fetch_chat_users(collection="tests")
@@ -279,6 +303,42 @@ class TestHistory:
         assert f_count["conversation_data"] == []
         assert message
 
+    def test_flatten_conversations_with_duplicate_events(self, mock_duplicate_events):
+        now = mock_duplicate_events
+        flattened, message = HistoryProcessor.flatten_conversations("duplicate_event_tests")
+        assert message
+
+        def timestamp(offset):
+            return datetime.utcfromtimestamp(now + offset).strftime("%d-%m-%Y %H:%M:%S")
+
+        assert flattened["conversation_data"] == [
+            {"_id": "user_1", "user_input": "bye", "intent": "goodbye", "action": ["utter_goodbye"],
+             "timestamp": timestamp(4), "bot_response": ["goodbye"]},
+            {"_id": "user_1", "user_input": "hi", "intent": "greet", "action": [],
+             "timestamp": timestamp(1), "bot_response": ["hello"]},
+            {"_id": "user_1", "user_input": "hi", "intent": "greet", "action": [],
+             "timestamp": timestamp(1), "bot_response": []}
+        ]
+
+    def test_flatten_events(self):
+        events = [
+            {"event": "bot", "text": "welcome", "timestamp": 1},
+            {"event": "user", "text": "hi", "timestamp": 2, "parse_data": {"intent": {"name": "greet", "confidence": 0.9}}},
+            {"event": "action", "name": "utter_greet", "timestamp": 3},
+            {"event": "bot", "text": "hello", "timestamp": 4},
+            {"event": "user", "text": "hi", "timestamp": 2, "parse_data": {"intent": {"name": "greet", "confidence": 0.9}}},
+            {"event": "user", "text": "hi", "timestamp": 2, "parse_data": {"intent": {"name": "greet", "confidence": 0.9}}},
+        ] + [{"event": "action", "name": "action_listen", "timestamp": 5}] * 101
+        flattened = list(HistoryProcessor._HistoryProcessor__flatten_events("user_1", events))
+        assert flattened[:2] == [
+            {"_id": "user_1", "user_input": "hi", "intent": "greet", "confidence": 0.9, "action": ["utter_greet"],
+             "timestamp": 2, "bot_response": ["hello"]},
+            {"_id": "user_1", "user_input": "hi", "intent": "greet", "confidence": 0.9, "action": [],
+             "timestamp": 2, "bot_response": []}
+        ]
+        assert flattened[2]["action"] == ["action_listen"] * 100
+        assert len(flattened) == 3
+
     def test_total_conversation_range_error(self, mock_db_timeout):
         conversation_steps, message = HistoryProcessor.total_conversation_range("tests")
         assert conversation_steps["total_conversation_range"] == {}
@@ -394,3 +454,445 @@ class TestHistory:
         user_list, message = HistoryProcessor.session_count("tests")
         assert user_list == {}
         assert message
+
+    def test_get_compaction_index(self):
+        from kairon.history.archive import ConversationArchive
+
+        events = [{"event": "action", "name": "action_session_start", "timestamp": 10},
+                  {"event": "user", "timestamp": 11},
+                  {"event": "action", "name": "action_session_start", "timestamp": 20},
+                  {"event": "user", "timestamp": 21},
+                  {"event": "bot", "timestamp": 30}]
+        assert ConversationArchive.get_compaction_index(events, 15) == 2
+        assert ConversationArchive.get_compaction_index(events, 25) == 2
+        assert ConversationArchive.get_compaction_index(events, 5) == 0
+        assert ConversationArchive.get_compaction_index(events[3:], 25) == 0
+        assert ConversationArchive.get_compaction_index(events[3:], 50) == 0
+
+    def test_archive_conversations(self, monkeypatch):
+        import time
+
+        now = time.time()
+        old = now - 200 * 24 * 60 * 60
+        client = MongoClient(Utility.environment['tracker']['url'])
+        conversations = client.get_database("conversation").get_collection("archive_tests")
+        conversations.insert_many([
+            {"sender_id": "user_1", "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": old},
+                {"event": "user", "text": "hi", "timestamp": old + 1},
+                {"event": "bot", "text": "hello", "timestamp": old + 2},
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1}]},
+            {"sender_id": "user_2", "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1}]}
+        ])
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        monkeypatch.setitem(Utility.environment['tracker']['archive'], 'bucket_size', 2)
+        archived, message = HistoryProcessor.archive_conversations("archive_tests")
+        assert archived == {"senders": 1, "events": 3}
+        assert message
+
+        live = conversations.find_one({"sender_id": "user_1"})
+        assert [event["timestamp"] for event in live["events"]] == [now, now + 1]
+        assert len(conversations.find_one({"sender_id": "user_2"})["events"]) == 2
+        buckets = list(client.get_database("conversation").get_collection("archive_tests_archive").find())
+        assert [len(bucket["events"]) for bucket in buckets] == [2, 1]
+        assert [bucket["bucket"] for bucket in buckets] == [old, old + 2]
+
+        archived, _ = HistoryProcessor.archive_conversations("archive_tests")
+        assert archived == {"senders": 0, "events": 0}
+
+    def test_archive_conversations_after_interrupted_run(self, monkeypatch):
+        import time
+        from kairon.history.archive import ConversationArchive
+
+        now = time.time()
+        old = now - 200 * 24 * 60 * 60
+        client = MongoClient(Utility.environment['tracker']['url'])
+        db = client.get_database("conversation")
+        conversations = db.get_collection("interrupted_archive_tests")
+        conversations.insert_many([
+            {"sender_id": "user_1", "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": old},
+                {"event": "user", "text": "hi", "timestamp": old + 1},
+                {"event": "action", "name": "action_session_start", "timestamp": now}]},
+            {"sender_id": "user_2", "events": [
+                {"event": "user", "text": "hi", "timestamp": old},
+                {"event": "bot", "text": "hello", "timestamp": old + 1}]}
+        ])
+        archive = db.get_collection("interrupted_archive_tests_archive")
+        archive.insert_one({"sender_id": "user_1", "bucket": old, "events": [
+            {"event": "action", "name": "action_session_start", "timestamp": old},
+            {"event": "user", "text": "hi", "timestamp": old + 1}]})
+
+        assert ConversationArchive.compact(db, "interrupted_archive_tests") == {"senders": 1, "events": 2}
+        assert archive.count_documents({"sender_id": "user_1"}) == 1
+        assert len(conversations.find_one({"sender_id": "user_1"})["events"]) == 1
+        assert len(conversations.find_one({"sender_id": "user_2"})["events"]) == 2
+        assert archive.count_documents({"sender_id": "user_2"}) == 0
+
+    def test_find_with_archive(self, monkeypatch):
+        from kairon.history.archive import ConversationArchive
+
+        db = MongoClient(Utility.environment['tracker']['url']).get_database("conversation")
+        monkeypatch.setitem(Utility.environment['tracker']['archive'], 'enable', True)
+        conversations = ConversationArchive.get_collection(db, "tests")
+        pipelines = []
+        monkeypatch.setattr(conversations, "archive", type("Archive", (), {
+            "aggregate": lambda self, pipeline, **kwargs: pipelines.append(pipeline)})())
+        conversations.find({"sender_id": "user"}, {"_id": 0, "sender_id": 1})
+        assert pipelines == [
+            [{"$match": {"sender_id": "user"}},
+             {"$sort": {"sender_id": 1, "bucket": 1}},
+             {"$unionWith": {"coll": "tests", "pipeline": [{"$match": {"sender_id": "user"}}]}},
+             {"$project": {"_id": 0, "sender_id": 1}}]
+        ]
+
+    def test_get_collection_with_archive(self, monkeypatch):
+        from kairon.history.archive import ConversationArchive, ArchivedCollection
+
+        db = MongoClient(Utility.environment['tracker']['url']).get_database("conversation")
+        assert not isinstance(ConversationArchive.get_collection(db, "tests"), ArchivedCollection)
+
+        monkeypatch.setitem(Utility.environment['tracker']['archive'], 'enable', True)
+        conversations = ConversationArchive.get_collection(db, "tests")
+        assert isinstance(conversations, ArchivedCollection)
+        assert conversations.name == "tests"
+        pipelines = []
+        monkeypatch.setattr(conversations, "archive", type("Archive", (), {
+            "aggregate": lambda self, pipeline, **kwargs: pipelines.append(pipeline)})())
+        conversations.aggregate([{"$match": {"sender_id": "user"}}, {"$unwind": "$events"}], allowDiskUse=True)
+        conversations.aggregate([{"$unwind": "$events"}])
+        assert pipelines == [
+            [{"$match": {"sender_id": "user"}},
+             {"$sort": {"sender_id": 1, "bucket": 1}},
+             {"$unionWith": {"coll": "tests", "pipeline": [{"$match": {"sender_id": "user"}}]}},
+             {"$unwind": "$events"}],
+            [{"$sort": {"sender_id": 1, "bucket": 1}},
+             {"$unionWith": {"coll": "tests", "pipeline": []}}, {"$unwind": "$events"}]
+        ]
+
+    def test_get_client_shared_across_requests(self, monkeypatch):
+        import kairon.history.processor
+
+        created = []
+
+        def _mongo_client(*args, **kwargs):
+            created.append(kwargs)
+            return MongoClient(kwargs['host'])
+
+        monkeypatch.setattr(kairon.history.processor, "MongoClient", _mongo_client)
+        monkeypatch.setattr(HistoryProcessor, "client", None)
+        monkeypatch.setitem(Utility.environment['tracker'], 'pool_size', 10)
+        client, message = HistoryProcessor.get_mongo_connection()
+        assert message == 'Loading host:mongodb://test_kairon:27016, db:conversation'
+        assert HistoryProcessor.get_mongo_connection()[0] is client
+        assert len(created) == 1
+        assert created[0]['maxPoolSize'] == 10
+        assert created[0]['minPoolSize'] == 0
+
+        HistoryProcessor.close_client()
+        assert HistoryProcessor.client is None
+        assert HistoryProcessor.get_client() is not client
+        assert len(created) == 2
+
+    @pytest.mark.asyncio
+    async def test_run_in_executor(self, monkeypatch):
+        import threading
+
+        def _query(collection, month):
+            return threading.current_thread().name, f"{collection}:{month}"
+
+        monkeypatch.setattr(HistoryProcessor, "executor", None)
+        monkeypatch.setitem(Utility.environment['tracker'], 'workers', 2)
+        thread_name, message = await HistoryProcessor.run_in_executor(_query, "tests", 3)
+        assert thread_name.startswith("history")
+        assert message == "tests:3"
+        assert HistoryProcessor.executor._max_workers == 2
+
+        HistoryProcessor.close_client()
+        assert HistoryProcessor.executor is None
+
+    def test_metric_rollup_fold(self):
+        from kairon.history.rollup import MetricRollup
+
+        day = 100 * 24 * 60 * 60
+        events = [{"event": "action", "name": "action_session_start", "timestamp": day},
+                  {"event": "user", "timestamp": day + 10, "parse_data": {"intent": {"name": "greet"}}},
+                  {"event": "action", "name": "utter_greet", "timestamp": day + 11},
+                  {"event": "bot", "timestamp": day + 12},
+                  {"event": "user", "timestamp": day + 86399, "parse_data": {"intent": {"name": "bye"}}}]
+        days, state = MetricRollup.fold(events, None)
+        first_day = datetime.utcfromtimestamp(day)
+        assert list(days.keys()) == [first_day]
+        assert days[first_day]['steps'] == 1
+        assert days[first_day]['conversation_time'] == 2
+        assert days[first_day]['actions'] == 1
+        assert days[first_day]['new_user']
+        assert days[first_day]['intents'] == {"greet": 1, "bye": 1}
+        assert state == {"first_session": day, "last_event": "user", "last_timestamp": day + 86399}
+
+        next_days, state = MetricRollup.fold([{"event": "action", "name": "action_session_start",
+                                               "timestamp": day + 86400},
+                                              {"event": "bot", "timestamp": day + 86405}], state)
+        assert next_days[first_day]['steps'] == 1
+        assert next_days[first_day]['conversation_time'] == 6
+        assert not next_days[datetime.utcfromtimestamp(day + 86400)]['new_user']
+
+        rollup = MetricRollup.merge(MetricRollup.merge({}, days[first_day]), next_days[first_day])
+        assert rollup['steps'] == 2
+        assert rollup['conversation_time'] == 8
+        assert rollup['intents'] == [{"name": "greet", "count": 1}, {"name": "bye", "count": 1}]
+
+    def test_refresh_rollup(self, monkeypatch):
+        import time
+
+        now = time.time() - 120
+        client = MongoClient(Utility.environment['tracker']['url'])
+        db = client.get_database("conversation")
+        db.get_collection("rollup_tests").insert_many([
+            {"sender_id": "user_1", "latest_event_time": now + 3, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}},
+                {"event": "action", "name": "action_default_fallback", "timestamp": now + 2},
+                {"event": "bot", "text": "sorry", "timestamp": now + 3}]},
+            {"sender_id": "user_2", "latest_event_time": now + 1, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}}]}
+        ])
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        monkeypatch.setitem(Utility.environment['tracker']['rollup'], 'enable', True)
+        refreshed, message = HistoryProcessor.refresh_rollup("rollup_tests")
+        assert refreshed['senders'] == 2
+        assert refreshed['events'] == 6
+        assert message
+        assert db.get_collection("rollup_tests_rollup").count_documents({}) == 2
+
+        refreshed, _ = HistoryProcessor.refresh_rollup("rollup_tests")
+        assert refreshed['senders'] == 0
+
+        month = datetime.utcfromtimestamp(now).month
+        assert HistoryProcessor.new_users("rollup_tests")[0] == {"new_users": 2}
+        assert HistoryProcessor.engaged_users("rollup_tests", 1, 1)[0] == {"engaged_users": 1}
+        assert HistoryProcessor.visitor_hit_fallback("rollup_tests")[0] == {"fallback_count": 1, "total_count": 1}
+        assert HistoryProcessor.top_n_intents("rollup_tests")[0] == [{"_id": "greet", "count": 2}]
+        assert HistoryProcessor.total_conversation_range("rollup_tests")[0] == {
+            "total_conversation_range": {month: 2}}
+        assert HistoryProcessor.average_conversation_step_range("rollup_tests")[0] == {
+            "average_conversation_steps": {month: 0.5}, "total_conversation_steps": {month: 1}}
+        assert HistoryProcessor.fallback_count_range("rollup_tests")[0] == {
+            "fallback_count_rate": {month: 100.0}, "total_fallback_count": {month: 1}}
+
+    def test_refresh_rollup_retries_failed_window(self, monkeypatch):
+        import time
+        from kairon.history.rollup import MetricRollup
+
+        now = time.time() - 120
+        client = MongoClient(Utility.environment['tracker']['url'])
+        db = client.get_database("conversation")
+        db.get_collection("rollup_retry_tests").insert_many([
+            {"sender_id": f"user_{i}", "latest_event_time": now + 1, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}}]}
+            for i in range(2)
+        ])
+        save = getattr(MetricRollup, "_MetricRollup__save")
+        calls = []
+
+        def _save(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise Exception("Failed to save rollups")
+            return save(*args)
+
+        monkeypatch.setitem(Utility.environment['tracker']['rollup'], 'batch_size', 1)
+        with monkeypatch.context() as m:
+            m.setattr(MetricRollup, "_MetricRollup__save", _save)
+            with pytest.raises(Exception, match="Failed to save rollups"):
+                MetricRollup.refresh(db, "rollup_retry_tests")
+        assert MetricRollup.get_watermark(db, "rollup_retry_tests") == 0
+        assert "leased_at" not in db.get_collection("rollup_retry_tests_rollup_state").find_one(
+            {"_id": MetricRollup.watermark_id})
+
+        refreshed = MetricRollup.refresh(db, "rollup_retry_tests")
+        assert refreshed['senders'] == 1
+        assert refreshed['events'] == 2
+        assert MetricRollup.get_watermark(db, "rollup_retry_tests") == refreshed['watermark']
+        assert MetricRollup.new_users(db, "rollup_retry_tests") == {"new_users": 2}
+        assert MetricRollup.top_n_intents(db, "rollup_retry_tests") == [{"_id": "greet", "count": 2}]
+
+    def test_refresh_rollup_retries_after_rollups_saved(self, monkeypatch):
+        import time
+        from kairon.history.rollup import MetricRollup
+
+        now = time.time() - 120
+        client = MongoClient(Utility.environment['tracker']['url'])
+        db = client.get_database("conversation")
+        conversations = db.get_collection("rollup_idempotent_tests")
+        conversations.insert_one({"sender_id": "user_1", "latest_event_time": now + 2, "events": [
+            {"event": "action", "name": "action_session_start", "timestamp": now},
+            {"event": "user", "text": "hi", "timestamp": now + 1, "parse_data": {"intent": {"name": "greet"}}},
+            {"event": "bot", "text": "hello", "timestamp": now + 2}]})
+        states = db.get_collection("rollup_idempotent_tests_rollup_state")
+        bulk_write = type(states).bulk_write
+
+        def _bulk_write(collection, *args, **kwargs):
+            if collection.name == states.name:
+                raise Exception("Failed to save sender states")
+            return bulk_write(collection, *args, **kwargs)
+
+        with monkeypatch.context() as m:
+            m.setattr(type(states), "bulk_write", _bulk_write)
+            with pytest.raises(Exception, match="Failed to save sender states"):
+                MetricRollup.refresh(db, "rollup_idempotent_tests")
+        assert MetricRollup.get_watermark(db, "rollup_idempotent_tests") == 0
+        assert MetricRollup.engaged_users(db, "rollup_idempotent_tests", 1, 1) == {"engaged_users": 1}
+
+        conversations.update_one({"sender_id": "user_1"}, {"$push": {"events": {"$each": [
+            {"event": "user", "text": "bye", "timestamp": now + 3, "parse_data": {"intent": {"name": "goodbye"}}},
+            {"event": "bot", "text": "bye", "timestamp": now + 4}]}}})
+        refreshed = MetricRollup.refresh(db, "rollup_idempotent_tests")
+        assert refreshed['events'] == 5
+        assert MetricRollup.engaged_users(db, "rollup_idempotent_tests", 1, 2) == {"engaged_users": 1}
+        assert MetricRollup.engaged_users(db, "rollup_idempotent_tests", 1, 3) == {"engaged_users": 0}
+        assert MetricRollup.new_users(db, "rollup_idempotent_tests") == {"new_users": 1}
+        assert sorted(MetricRollup.top_n_intents(db, "rollup_idempotent_tests"), key=lambda d: d['_id']) == [
+            {"_id": "goodbye", "count": 1}, {"_id": "greet", "count": 1}]
+
+    def test_query_rollup_refreshes_in_background(self, monkeypatch):
+        import time
+        from kairon.history.rollup import MetricRollup
+
+        now = time.time() - 120
+        client = MongoClient(Utility.environment['tracker']['url'])
+        db = client.get_database("conversation")
+        db.get_collection("rollup_background_tests").insert_one(
+            {"sender_id": "user_1", "latest_event_time": now, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now}]}
+        )
+        submitted = []
+
+        class Executor:
+            def submit(self, method, *args):
+                submitted.append(method)
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        monkeypatch.setattr(HistoryProcessor, "get_executor", lambda: Executor())
+        monkeypatch.setitem(Utility.environment['tracker']['rollup'], 'enable', True)
+        assert HistoryProcessor.new_users("rollup_background_tests")[0] == {"new_users": 0}
+        assert HistoryProcessor.new_users("rollup_background_tests")[0] == {"new_users": 0}
+        assert len(submitted) == 1
+        submitted[0]()
+        assert HistoryProcessor.new_users("rollup_background_tests")[0] == {"new_users": 1}
+        assert len(submitted) == 1
+
+        def _raise(*args):
+            raise Exception("Failed to query rollups")
+
+        monkeypatch.setattr(MetricRollup, "new_users", _raise)
+        monkeypatch.setattr(MetricRollup, "top_n_intents", _raise)
+        new_users, message = HistoryProcessor.new_users("rollup_background_tests")
+        assert new_users == {"new_users": 0}
+        assert "Failed to query rollups" in message
+        with pytest.raises(AppException, match="Failed to query rollups"):
+            HistoryProcessor.top_n_intents("rollup_background_tests")
+
+    def test_dashboard(self, monkeypatch):
+        import time
+
+        now = time.time()
+        client = MongoClient(Utility.environment['tracker']['url'])
+        client.get_database("conversation").get_collection("dashboard_tests").insert_many([
+            {"sender_id": "user_1", "latest_event_time": now + 5, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now - 90 * 24 * 60 * 60},
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1},
+                {"event": "action", "name": "utter_greet", "timestamp": now + 2},
+                {"event": "bot", "text": "hello", "timestamp": now + 3},
+                {"event": "user", "text": "what?", "timestamp": now + 4},
+                {"event": "action", "name": "action_default_fallback", "timestamp": now + 5}]},
+            {"sender_id": "user_2", "latest_event_time": now + 2, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1},
+                {"event": "bot", "text": "hello", "timestamp": now + 2}]}
+        ])
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        metrics, message = HistoryProcessor.dashboard("dashboard_tests", 1, 1)
+        assert metrics == {
+            "fallback": {"fallback_count": 1, "total_count": 2},
+            "conversation_steps": [{"event": 1, "sender_id": "user_1"}, {"event": 1, "sender_id": "user_2"}],
+            "conversation_time": [{"time": 2, "sender_id": "user_1"}, {"time": 1, "sender_id": "user_2"}],
+            "engaged_users": {"engaged_users": 2},
+            "new_users": {"new_users": 1},
+            "successful_conversations": {"successful_conversations": 1, "total": 2},
+            "user_retention": {"user_retention": 50.0}
+        }
+        assert message
+
+    def test_dashboard_with_rollups_and_archived_sender(self, monkeypatch):
+        import time
+
+        now = int(time.time())
+        client = MongoClient(Utility.environment['tracker']['url'])
+        client.get_database("conversation").get_collection("dashboard_archive_tests").insert_many([
+            {"sender_id": "user_1", "latest_event_time": now - 60 * 24 * 60 * 60, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now - 61 * 24 * 60 * 60}]},
+            {"sender_id": "user_1", "latest_event_time": now + 2, "events": [
+                {"event": "action", "name": "action_session_start", "timestamp": now},
+                {"event": "user", "text": "hi", "timestamp": now + 1},
+                {"event": "bot", "text": "hello", "timestamp": now + 2}]}
+        ])
+
+        def db_client(*args, **kwargs):
+            return client, 'Loading host:mongodb://test_kairon:27016, db:conversation'
+
+        monkeypatch.setattr(HistoryProcessor, "get_mongo_connection", db_client)
+        monkeypatch.setitem(Utility.environment['tracker']['rollup'], 'enable', True)
+        monkeypatch.setattr(HistoryProcessor, "visitor_hit_fallback",
+                            lambda *args: ({"fallback_count": 3, "total_count": 9}, "rollup"))
+        monkeypatch.setattr(HistoryProcessor, "engaged_users", lambda *args: ({"engaged_users": 4}, "rollup"))
+        monkeypatch.setattr(HistoryProcessor, "new_users", lambda *args: ({"new_users": 5}, "rollup"))
+        metrics, message = HistoryProcessor.dashboard("dashboard_archive_tests", 1, 1)
+        assert metrics == {
+            "fallback": {"fallback_count": 3, "total_count": 9},
+            "conversation_steps": [{"event": 1, "sender_id": "user_1"}],
+            "conversation_time": [{"time": 1, "sender_id": "user_1"}],
+            "engaged_users": {"engaged_users": 4},
+            "new_users": {"new_users": 5},
+            "successful_conversations": {"successful_conversations": 1, "total": 1},
+            "user_retention": {"user_retention": 100.0}
+        }
+        assert message
+
+    def test_dashboard_with_duplicate_events(self, mock_duplicate_events):
+        metrics, message = HistoryProcessor.dashboard("duplicate_event_tests", 1, 2)
+        assert metrics["conversation_steps"] == [{"event": 2, "sender_id": "user_1"}]
+        assert metrics["conversation_time"] == [{"time": 4, "sender_id": "user_1"}]
+        assert metrics["engaged_users"] == {"engaged_users": 1}
+        assert message
+        metrics, message = HistoryProcessor.dashboard("duplicate_event_tests", 1, 3)
+        assert metrics["engaged_users"] == {"engaged_users": 0}
+
+    def test_dashboard_error(self, mock_db_timeout):
+        metrics, message = HistoryProcessor.dashboard("tests")
+        assert metrics["fallback"] == {"fallback_count": 0, "total_count": 0}
+        assert metrics["conversation_steps"] == []
+        assert metrics["successful_conversations"] == {"successful_conversations": 0, "total": 0}
+        assert metrics["user_retention"] == {"user_retention": 0}
+        assert message